@@ -3,6 +3,7 @@ import signal
 import subprocess
 import time
 
+import requests
 from airflow import DAG
 from airflow.operators.bash import BashOperator
 from airflow.operators.python import PythonOperator
@@ -12,11 +13,48 @@ from airflow.providers.amazon.aws.operators.athena import AthenaOperator
 
 # Variables globales
 API_PROCESS = None
+API_READY_URL = "http://127.0.0.1:8000/health/ready"
+# Délai maximal d'attente du préchargement des données (secondes) et intervalle entre deux vérifications
+API_READY_TIMEOUT = 120
+API_READY_INTERVAL = 0.5
+
+
+def wait_for_api(timeout=API_READY_TIMEOUT, interval=API_READY_INTERVAL):
+    """
+    Attend que l'api ait préchargé ses données, en interrogeant `/health/ready`.
+
+    Args:
+        timeout (float): Délai maximal d'attente en secondes.
+        interval (float): Intervalle entre deux vérifications en secondes.
+
+    Returns:
+        dict: Réponse de `/health/ready` (backend et versions des jeux de données chargés).
+
+    Exceptions:
+        RuntimeError: Si le processus de l'api s'arrête pendant le démarrage.
+        TimeoutError: Si l'api n'est pas prête dans le délai.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if API_PROCESS.poll() is not None:
+            raise RuntimeError(f"Le processus de l'API s'est arrêté (code {API_PROCESS.returncode}).")
+        try:
+            response = requests.get(API_READY_URL, timeout=interval)
+            if response.status_code == 200:
+                return response.json()
+        except requests.RequestException:
+            pass  # L'api n'écoute pas encore
+        time.sleep(interval)
+    raise TimeoutError(f"L'API n'est pas prête après {timeout} secondes.")
 
 
 def start_api():
     """
-    Démarre l'api avec uvicorn en arrière-plan.
+    Démarre l'api avec uvicorn en arrière-plan et attend qu'elle soit prête.
+
+    L'api est lancée sans rechargement automatique (`--reload`), dont la surveillance des fichiers est
+    inutile en production. Les sorties du serveur ne sont pas capturées : un tube jamais lu finirait par
+    se remplir et bloquer le serveur.
 
     Exceptions:
         RuntimeError: Si l'api ne peut pas être démarrée.
@@ -25,16 +63,17 @@ def start_api():
     try:
         airflow_logger.info("Démarrage de l'API avec uvicorn.")
         API_PROCESS = subprocess.Popen(
-            ["uvicorn", "src.api.main:app", "--reload"],
+            ["uvicorn", "src.api.main:app"],
             cwd="/home/ubuntu/RetailInsights-Simulator",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             preexec_fn=os.setsid,  # Permet de tuer le processus facilement
         )
-        time.sleep(5)  # Attendre que l'api soit prête
-        airflow_logger.info("API démarrée avec succès.")
+        readiness = wait_for_api()
+        airflow_logger.info(f"API démarrée avec succès, données chargées : {readiness['datasets']}.")
     except Exception as e:
         airflow_logger.error(f"Erreur lors du démarrage de l'API : {e}")
+        stop_api()
         raise RuntimeError("Échec du démarrage de l'API.")
 
 
@@ -114,12 +153,16 @@ with DAG(
         ),
     )
 
-    # Tâche 5 : Supprimer les fichiers temporaires pour libérer de l'espace et éviter les conflits
-    # lors de la prochaine exécution.
+    # Tâche 5 : Supprimer les partitions et les exports de la journée extraite (et les fichiers JSON complets
+    # du backend Arrow), ainsi que les lots du journal des modifications publiés avant aujourd'hui (déjà
+    # extraits), pour libérer de l'espace et éviter les conflits lors de la prochaine exécution.
     cleanup_files = BashOperator(
         task_id="cleanup_files",
-        bash_command="rm -rf ~/RetailInsights-Simulator/data_api/sales.json "
-        "~/RetailInsights-Simulator/data_api/retail_data.json",
+        bash_command="source ~/airflow_env/venv/bin/activate && "
+        "cd ~/RetailInsights-Simulator && "
+        "python -m src.api.partition_store drop --date $(date +%Y-%m-%d) && "
+        "python -m src.api.change_log prune --before $(date +%Y-%m-%d) && "
+        "rm -f data_api/sales.json data_api/retail_data.json data_api/exports/*/$(date +%Y-%m-%d).*",
         on_success_callback=lambda context: airflow_logger.info(
             "Tâche cleanup_files terminée avec succès."
         ),
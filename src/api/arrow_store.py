@@ -0,0 +1,386 @@
+"""
+Backend de données colonnaire : jeux de données convertis au format Arrow (Feather v2) et mappés en mémoire.
+
+Chaque fichier JSON de `data_api` est converti une seule fois en un fichier Arrow non compressé
+(`data_api/<nom>.arrow`). Les processus de l'api ouvrent ce fichier avec `pyarrow.memory_map` : les
+colonnes ne sont pas copiées dans le tas Python, elles pointent vers les pages du fichier, partagées
+par le cache du système entre tous les workers uvicorn. N workers coûtent ainsi la mémoire d'une
+seule copie des données.
+
+Les ventes et les données retail partitionnées (voir `src.api.partition_store`) sont converties depuis leurs
+partitions : le fichier témoin de leur version fait foi, et le fichier JSON complet peut être supprimé par le
+nettoyage du pipeline sans casser le backend. Un fichier Arrow plus ancien que sa source est reconverti au
+premier accès. La conversion est
+protégée par un verrou de fichier et publiée par renommage atomique : les workers ne voient jamais un
+fichier partiellement écrit.
+
+Les ventes et les données retail sont triées par date lors de la conversion. Un index des dates (première
+ligne de chaque date) permet alors de ne filtrer que la tranche contiguë d'une date ou d'une plage de dates.
+"""
+
+import fcntl
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from src.api import partition_store
+from src.api.data_store import VERSION_MARKER, dataset_path, dataset_version
+from src.api.metrics import timed
+
+# Jeux de données volumineux servis depuis Arrow (les magasins et produits restent lus en JSON)
+DATASETS = ("sales", "retail_data", "clients")
+# Colonne de date selon laquelle les jeux de données datés sont triés
+DATE_COLUMNS = {"sales": "sale_date", "retail_data": "date"}
+
+# Tables mappées par le processus courant : {nom: ((chemin, mtime, taille) du fichier Arrow, table)}
+_tables = {}
+# Version de la source (partitions ou fichier JSON) de chaque table mappée : {nom: version}
+_source_versions = {}
+# Index des dates de chaque table mappée : {nom: (version du fichier Arrow, index)}
+_date_indexes = {}
+_tables_lock = threading.Lock()
+
+
+def arrow_path(name):
+    """
+    Retourne le chemin du fichier Arrow d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données (par exemple 'sales').
+
+    Returns:
+        str: Chemin du fichier.
+    """
+    return os.path.splitext(dataset_path(name))[0] + ".arrow"
+
+
+def _version_marker(name):
+    """
+    Retourne le chemin du fichier témoin d'un jeu de données partitionné, s'il existe.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        str: Chemin du fichier témoin.
+        None: Si le jeu de données n'est pas partitionné (ou pas encore publié).
+    """
+    if name not in partition_store.PARTITION_KEYS:
+        return None
+    marker = os.path.join(partition_store.partition_root(name), VERSION_MARKER)
+    return marker if os.path.exists(marker) else None
+
+
+def is_stale(name):
+    """
+    Indique si le fichier Arrow d'un jeu de données doit être (re)construit.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        bool: True si le fichier Arrow est absent ou plus ancien que sa source (fichier témoin des partitions,
+        sinon fichier JSON).
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    source_mtime = os.stat(_version_marker(name) or dataset_path(name)).st_mtime_ns
+    try:
+        return os.stat(arrow_path(name)).st_mtime_ns < source_mtime
+    except FileNotFoundError:
+        return True
+
+
+def _source_rows(name):
+    """
+    Lit les lignes source d'un jeu de données : ses partitions, date par date, sinon son fichier JSON.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        list: Lignes du jeu de données.
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    if _version_marker(name):
+        return [
+            row for date in partition_store.list_dates(name) for row in partition_store.read_partitions(name, date)
+        ]
+    with open(dataset_path(name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convert_to_arrow(name):
+    """
+    Convertit un jeu de données (partitions ou fichier JSON) en fichier Arrow non compressé (mappable en mémoire).
+
+    La conversion n'est faite que si le fichier Arrow est absent ou périmé ; un verrou de fichier évite
+    que plusieurs workers la fassent en même temps.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        bool: True si le fichier a été (re)construit.
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    path = arrow_path(name)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Un autre worker a pu faire la conversion pendant l'attente du verrou
+        if not is_stale(name):
+            return False
+        table = pa.Table.from_pylist(_source_rows(name))
+        date_column = DATE_COLUMNS.get(name)
+        if date_column and table.num_rows:
+            # Tri stable : l'ordre des lignes d'une même date est conservé
+            table = table.sort_by(date_column)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    return True
+
+
+def prepare_arrow_datasets(names=DATASETS):
+    """
+    Convertit au format Arrow tous les jeux de données disponibles, avant le démarrage des workers.
+
+    Args:
+        names (iterable): Noms des jeux de données. Par défaut, tous les jeux de l'api.
+
+    Returns:
+        list: Noms des jeux de données convertis au format Arrow.
+    """
+    prepared = []
+    for name in names:
+        try:
+            convert_to_arrow(name)
+        except FileNotFoundError:
+            continue
+        prepared.append(name)
+    return prepared
+
+
+def open_table(name):
+    """
+    Retourne la table Arrow d'un jeu de données, mappée en mémoire en lecture seule.
+
+    La table est mise en cache dans le processus tant que le fichier Arrow ne change pas.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        pa.Table: Table dont les colonnes référencent directement le fichier mappé.
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    if is_stale(name):
+        convert_to_arrow(name)
+    path = arrow_path(name)
+    stat = os.stat(path)
+    version = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _tables_lock:
+        cached = _tables.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        _tables[name] = (version, table)
+        _source_versions[name] = dataset_version(name)
+    return table
+
+
+def date_index(name, table):
+    """
+    Retourne l'index des dates d'une table triée par date, calculé une fois par version du fichier Arrow.
+
+    Args:
+        name (str): Nom du jeu de données.
+        table (pa.Table): Table retournée par `open_table`.
+
+    Returns:
+        tuple: Dates distinctes triées et position de la première ligne de chacune (plus le nombre de
+        lignes en dernière position).
+        None: Si le jeu de données n'est pas daté ou si le fichier n'est pas trié par date (fichier
+        converti par une version antérieure).
+    """
+    date_column = DATE_COLUMNS.get(name)
+    if date_column is None or table.num_rows == 0:
+        return None
+    version = _tables.get(name, (None,))[0]
+    cached = _date_indexes.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    # Dans une table triée, les dates apparaissent par ordre croissant, chacune sur une tranche contiguë
+    counts = pc.value_counts(table[date_column])
+    dates = counts.field("values").to_pylist()
+    starts = [0]
+    for count in counts.field("counts").to_pylist():
+        starts.append(starts[-1] + count)
+    is_sorted = None not in dates and all(a < b for a, b in zip(dates, dates[1:]))
+    index = (dates, starts) if is_sorted else None
+    _date_indexes[name] = (version, index)
+    return index
+
+
+def date_slice(name, table, start_date, end_date):
+    """
+    Réduit une table aux lignes d'une plage de dates, sans parcourir les autres lignes.
+
+    Args:
+        name (str): Nom du jeu de données.
+        table (pa.Table): Table retournée par `open_table`.
+        start_date (str): Premier jour de la plage (inclus).
+        end_date (str): Dernier jour de la plage (inclus).
+
+    Returns:
+        pa.Table: Tranche de la table (la table entière si elle n'a pas d'index des dates).
+    """
+    index = date_index(name, table)
+    if index is None:
+        return table
+    dates, starts = index
+    first, last = bisect_left(dates, start_date), bisect_right(dates, end_date)
+    return table.slice(starts[first], starts[last] - starts[first])
+
+
+def loaded_versions():
+    """
+    Retourne la version de la source (partitions ou fichier JSON) de chaque table mappée par le processus courant.
+
+    Returns:
+        dict: Versions par jeu de données (uniquement les tables déjà mappées).
+    """
+    with _tables_lock:
+        return dict(_source_versions)
+
+
+def select(name, condition=None, columns=None, date_range=None, order_by=None, limit=None):
+    """
+    Sélectionne des lignes d'un jeu de données Arrow.
+
+    Args:
+        name (str): Nom du jeu de données.
+        condition (pyarrow.compute.Expression, optional): Filtre à appliquer. Par défaut, aucun.
+        columns (list, optional): Colonnes à conserver. Par défaut, toutes.
+        date_range (tuple, optional): Plage `(début, fin)` à extraire via l'index des dates avant le
+            filtrage. Par défaut, None (toute la table).
+        order_by (tuple, optional): Colonnes de tri (ordre croissant). Par défaut, ordre de la table.
+        limit (int, optional): Nombre maximal de lignes converties (avec `order_by`, une page). Par défaut, toutes.
+
+    Returns:
+        list: Lignes sélectionnées, sous forme de dictionnaires.
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    with timed("load"):
+        table = open_table(name)
+    return select_table(name, table, condition, columns, date_range, order_by, limit)
+
+
+def select_table(name, table, condition=None, columns=None, date_range=None, order_by=None, limit=None):
+    """
+    Sélectionne des lignes d'une table déjà ouverte, par exemple une même table servant plusieurs requêtes
+    d'un lot (`POST /query/batch`).
+
+    Args:
+        name (str): Nom du jeu de données.
+        table (pa.Table): Table retournée par `open_table`.
+        condition (pyarrow.compute.Expression, optional): Filtre à appliquer. Par défaut, aucun.
+        columns (list, optional): Colonnes à conserver. Par défaut, toutes.
+        date_range (tuple, optional): Plage `(début, fin)` à extraire via l'index des dates. Par défaut, None.
+        order_by (tuple, optional): Colonnes de tri (ordre croissant). Par défaut, ordre de la table.
+        limit (int, optional): Nombre maximal de lignes converties. Par défaut, toutes.
+
+    Returns:
+        list: Lignes sélectionnées, sous forme de dictionnaires.
+    """
+    # Une source vide donne une table sans colonne, sur laquelle aucun filtre n'est possible
+    if table.num_rows == 0:
+        return []
+    with timed("filter"):
+        if date_range is not None:
+            table = date_slice(name, table, *date_range)
+        if condition is not None:
+            table = table.filter(condition)
+        if order_by is not None:
+            sort_keys = [(column, "ascending") for column in order_by]
+            # Avec une limite, seules les premières lignes sont sélectionnées (pas de tri de la table entière)
+            if limit is not None and limit < table.num_rows:
+                table = table.take(pc.select_k_unstable(table, limit, sort_keys))
+            table = table.sort_by(sort_keys)
+        elif limit is not None:
+            table = table.slice(0, limit)
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pylist()
+
+
+def count(name, condition=None):
+    """
+    Compte les lignes d'un jeu de données Arrow correspondant à un filtre.
+
+    Args:
+        name (str): Nom du jeu de données.
+        condition (pyarrow.compute.Expression, optional): Filtre à appliquer. Par défaut, aucun.
+
+    Returns:
+        int: Nombre de lignes.
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    with timed("load"):
+        table = open_table(name)
+    if table.num_rows == 0 or condition is None:
+        return table.num_rows
+    with timed("filter"):
+        return table.filter(condition).num_rows
+
+
+def aggregate(name, condition, keys, measures, derived=None):
+    """
+    Agrège un jeu de données Arrow avec `Table.group_by`, sans convertir les lignes en objets Python.
+
+    Args:
+        name (str): Nom du jeu de données.
+        condition (pyarrow.compute.Expression): Filtre à appliquer avant l'agrégation.
+        keys (list): Colonnes de regroupement.
+        measures (list): Mesures `(nom_en_sortie, fonction, colonne)` (voir `src.api.routes.aggregation`).
+        derived (dict, optional): Colonnes calculées avant le regroupement, `{nom: fonction(table) -> tableau}`.
+
+    Returns:
+        list: Une ligne par groupe, triée sur les clés.
+
+    Raises:
+        FileNotFoundError: Si ni les partitions ni le fichier JSON source n'existent.
+    """
+    with timed("load"):
+        table = open_table(name)
+    if table.num_rows == 0:
+        return []
+    with timed("filter"):
+        table = table.filter(condition)
+        for column, compute in (derived or {}).items():
+            table = table.append_column(column, compute(table))
+        grouped = table.group_by(keys).aggregate([(column, function) for _, function, column in measures])
+        # Arrow nomme les mesures '<colonne>_<fonction>' : les renommer selon la description
+        renames = {f"{column}_{function}": output for output, function, column in measures}
+        grouped = grouped.rename_columns([renames.get(column, column) for column in grouped.column_names])
+        grouped = grouped.select(keys + [output for output, _, _ in measures])
+        return grouped.sort_by([(key, "ascending") for key in keys]).to_pylist()
@@ -0,0 +1,249 @@
+"""
+Journal des modifications des jeux de données, pour l'extraction incrémentale.
+
+Chaque lot de lignes publié par un générateur reçoit un numéro de séquence strictement croissant
+et est écrit dans son propre fichier (`data_api/changes/<nom>/<séquence>.jsonl`). Les routes
+`/sales/changes` et `/retail_data/changes` renvoient les lots postérieurs à une séquence donnée :
+un extracteur qui conserve la dernière séquence reçue (son « watermark ») ne récupère ensuite
+que les nouvelles lignes.
+
+Le journal est purgé par le nettoyage du pipeline (tâche `cleanup_files`), une fois les lots extraits :
+les lots publiés avant une date, ou jusqu'à une séquence (le plus ancien watermark), sont supprimés. Le
+compteur de séquences est conservé : les séquences suivantes ne réutilisent jamais celles des lots purgés.
+
+Usage :
+    python -m src.api.change_log prune --before 2024-12-14 [jeu_de_données ...]
+    python -m src.api.change_log prune --through 1200 [jeu_de_données ...]
+"""
+
+import argparse
+import fcntl
+import os
+from datetime import datetime
+
+import orjson
+
+from src.api import data_store
+
+# Nombre de lignes maximal renvoyé par défaut par un appel (les lots ne sont jamais coupés)
+DEFAULT_MAX_ROWS = 10000
+# Jeux de données journalisés par les générateurs
+DATASETS = ("sales", "retail_data")
+
+
+def changes_dir(name, data_dir=None):
+    """
+    Retourne le répertoire du journal d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données (par exemple 'sales').
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        str: Chemin du répertoire.
+    """
+    return os.path.join(data_dir or data_store.DATA_DIR, "changes", name)
+
+
+def _batch_path(directory, sequence):
+    return os.path.join(directory, f"{sequence:012d}.jsonl")
+
+
+def list_sequences(name, data_dir=None):
+    """
+    Liste les numéros de séquence des lots publiés pour un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        list: Séquences triées par ordre croissant (vide si aucun lot n'a été publié).
+    """
+    try:
+        files = os.listdir(changes_dir(name, data_dir))
+    except FileNotFoundError:
+        return []
+    return sorted(int(file[:-6]) for file in files if file.endswith(".jsonl") and file[:-6].isdigit())
+
+
+def latest_sequence(name, data_dir=None):
+    """
+    Retourne la dernière séquence attribuée pour un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        int: Dernière séquence, 0 si aucun lot n'a été publié.
+    """
+    try:
+        with open(os.path.join(changes_dir(name, data_dir), "sequence"), "r", encoding="utf-8") as f:
+            counter = int(f.read().strip() or 0)
+    except FileNotFoundError:
+        counter = 0
+    # Le compteur peut être en retard si l'écriture a été interrompue après celle du lot
+    sequences = list_sequences(name, data_dir)
+    return max(counter, sequences[-1] if sequences else 0)
+
+
+def append_batch(name, rows, data_dir=None):
+    """
+    Publie un lot de lignes dans le journal et lui attribue la séquence suivante.
+
+    Le compteur est protégé par un verrou de fichier : plusieurs générateurs peuvent publier en même
+    temps sans réutiliser une séquence. Le fichier du lot est écrit par renommage atomique.
+
+    Args:
+        name (str): Nom du jeu de données.
+        rows (list): Lignes du lot.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        int: Séquence attribuée au lot.
+    """
+    directory = changes_dir(name, data_dir)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sequence = latest_sequence(name, data_dir) + 1
+        tmp_path = _batch_path(directory, sequence) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for row in rows:
+                f.write(orjson.dumps(row) + b"\n")
+        os.replace(tmp_path, _batch_path(directory, sequence))
+        with open(os.path.join(directory, "sequence"), "w", encoding="utf-8") as f:
+            f.write(str(sequence))
+    return sequence
+
+
+def has_batch(name, sequence, data_dir=None):
+    """
+    Indique si le lot d'une séquence est publié, sans lister le répertoire du journal.
+
+    Les séquences étant attribuées une à une, un lecteur qui suit le journal n'a qu'à vérifier l'existence
+    du lot suivant. Le fichier d'un lot est publié par renommage atomique : s'il existe, il est complet.
+
+    Args:
+        name (str): Nom du jeu de données.
+        sequence (int): Séquence du lot.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        bool: True si le fichier du lot existe.
+    """
+    return os.path.exists(_batch_path(changes_dir(name, data_dir), sequence))
+
+
+def read_batch(name, sequence, data_dir=None):
+    """
+    Lit les lignes d'un lot.
+
+    Args:
+        name (str): Nom du jeu de données.
+        sequence (int): Séquence du lot.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        list: Lignes du lot.
+        None: Si le lot n'existe pas (ou vient d'être purgé).
+    """
+    try:
+        with open(_batch_path(changes_dir(name, data_dir), sequence), "rb") as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+
+
+def read_changes(name, since=0, max_rows=DEFAULT_MAX_ROWS):
+    """
+    Lit les lots publiés après une séquence donnée.
+
+    Les lots sont renvoyés entiers, dans l'ordre des séquences, jusqu'à dépasser `max_rows` lignes
+    (au moins un lot est toujours renvoyé s'il en existe). Les lots déjà purgés (voir `prune_batches`)
+    ne sont plus renvoyés.
+
+    Args:
+        name (str): Nom du jeu de données.
+        since (int): Dernière séquence déjà reçue par le client. Par défaut, 0 (depuis le début).
+        max_rows (int): Nombre de lignes au-delà duquel aucun lot supplémentaire n'est ajouté.
+
+    Returns:
+        dict: `since`, `sequence` (dernière séquence incluse, à renvoyer au prochain appel),
+        `has_more` (d'autres lots restent à lire) et `rows` (lignes des lots).
+    """
+    pending = [sequence for sequence in list_sequences(name) if sequence > since]
+    rows = []
+    included = 0
+    for batch in pending:
+        if included and len(rows) >= max_rows:
+            break
+        # Un lot purgé entre la liste et la lecture est ignoré
+        rows.extend(read_batch(name, batch) or [])
+        included += 1
+    return {
+        "since": since,
+        "sequence": pending[included - 1] if included else since,
+        "has_more": included < len(pending),
+        "rows": rows,
+    }
+
+
+def prune_batches(name, before=None, through=None, data_dir=None):
+    """
+    Supprime les anciens lots du journal d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données.
+        before (str, optional): Supprime les lots publiés avant ce jour (exclu), au format 'YYYY-MM-DD'.
+        through (int, optional): Supprime aussi les lots de séquence inférieure ou égale (le plus ancien
+            watermark des extracteurs).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        list: Séquences supprimées.
+
+    Raises:
+        ValueError: Si `before` n'est pas au format 'YYYY-MM-DD'.
+    """
+    cutoff = datetime.strptime(before, "%Y-%m-%d").timestamp() if before else None
+    directory = changes_dir(name, data_dir)
+    pruned = []
+    for sequence in list_sequences(name, data_dir):
+        path = _batch_path(directory, sequence)
+        try:
+            expired = (through is not None and sequence <= through) or (
+                cutoff is not None and os.stat(path).st_mtime < cutoff
+            )
+            if expired:
+                os.remove(path)
+                pruned.append(sequence)
+        except FileNotFoundError:
+            continue
+    return pruned
+
+
+# Purge manuelle ou planifiée du journal (tâche `cleanup_files` du pipeline)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune old batches of the API change log.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune = subparsers.add_parser("prune", help="Drop batches already extracted.")
+    prune.add_argument("datasets", nargs="*", help=f"Datasets among {', '.join(DATASETS)} (default: all).")
+    prune.add_argument("--before", help="Drop batches published before this day (YYYY-MM-DD).")
+    prune.add_argument("--through", type=int, help="Drop batches up to this sequence (oldest watermark).")
+    args = parser.parse_args()
+    if not args.before and args.through is None:
+        parser.error("prune requires --before or --through")
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+    if args.before:
+        try:
+            datetime.strptime(args.before, "%Y-%m-%d")
+        except ValueError:
+            parser.error(f"invalid date: {args.before}")
+
+    for dataset in args.datasets or DATASETS:
+        removed = prune_batches(dataset, args.before, args.through)
+        print(f"{dataset}: pruned {len(removed)} change batches")
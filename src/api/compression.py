@@ -0,0 +1,234 @@
+"""
+Middleware de compression négociée (zstd ou gzip) pour les réponses de l'api.
+
+Les réponses JSON des routes de données sont très répétitives (dates, identifiants de magasin, clés) :
+elles se compressent d'un ordre de grandeur. L'encodage est choisi d'après l'en-tête `Accept-Encoding`
+du client (zstd de préférence, sinon gzip). Les réponses plus petites que `minimum_size`, déjà encodées,
+dans un format déjà compressé (Parquet) ou servies depuis un fichier avec prise en charge des plages
+(`Accept-Ranges`, exports journaliers) sont transmises telles quelles. Les réponses diffusées en flux
+(NDJSON) sont compressées au fil de l'eau : le compresseur n'est vidé qu'après `flush_size` octets (ou
+à la fin de la réponse), et non à chaque message, pour compresser sur une fenêtre utile et non ligne
+par ligne. Un ETag fort devient faible une fois la réponse compressée.
+"""
+
+import zlib
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+
+# Types de contenu déjà compressés, inutiles à recompresser
+SKIP_MEDIA_TYPES = ("application/vnd.apache.parquet", "text/event-stream")
+
+
+def parse_accept_encoding(header):
+    """
+    Analyse un en-tête `Accept-Encoding` et retourne les encodages acceptés.
+
+    Args:
+        header (str): Valeur de l'en-tête.
+
+    Returns:
+        set: Encodages acceptés (qualité strictement positive), en minuscules.
+    """
+    accepted = set()
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        encoding = parts[0].strip().lower()
+        if not encoding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(encoding)
+    return accepted
+
+
+class GzipCompressor:
+    """
+    Compresseur gzip incrémental.
+
+    Args:
+        level (int): Niveau de compression (1 à 9).
+    """
+
+    encoding = "gzip"
+
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class ZstdCompressor:
+    """
+    Compresseur zstd incrémental.
+
+    Args:
+        level (int): Niveau de compression (1 à 22).
+    """
+
+    encoding = "zstd"
+
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI compressant les réponses HTTP selon l'encodage accepté par le client.
+
+    Args:
+        app (ASGIApp): Application ASGI à envelopper.
+        minimum_size (int): Taille minimale (en octets) d'une réponse pour être compressée.
+        gzip_level (int): Niveau de compression gzip.
+        zstd_level (int): Niveau de compression zstd.
+        flush_size (int): Volume (en octets, avant compression) accumulé avant d'envoyer un fragment d'une
+            réponse diffusée.
+    """
+
+    def __init__(self, app, minimum_size=1024, gzip_level=6, zstd_level=3, flush_size=64 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.flush_size = flush_size
+
+    def _compressor_for(self, accept_encoding):
+        accepted = parse_accept_encoding(accept_encoding)
+        if "zstd" in accepted:
+            return lambda: ZstdCompressor(self.zstd_level)
+        if "gzip" in accepted:
+            return lambda: GzipCompressor(self.gzip_level)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        factory = self._compressor_for(Headers(scope=scope).get("accept-encoding", ""))
+        if factory is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.app, factory, self.minimum_size, self.flush_size)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    """
+    Intercepte les messages `http.response.*` d'une requête pour compresser le corps de la réponse.
+    """
+
+    def __init__(self, app, factory, minimum_size, flush_size):
+        self.app = app
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.flush_size = flush_size
+        self.pending = 0
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Retarder l'envoi des en-têtes jusqu'au premier fragment du corps
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            # Une plage d'octets désigne le fichier tel quel : la réponse n'est jamais recompressée
+            self.passthrough = (
+                "content-encoding" in headers
+                or "accept-ranges" in headers
+                or content_type.startswith(SKIP_MEDIA_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+
+            # Réponse complète trop petite : la compression n'en vaut pas la peine
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+
+            self.compressor = self.factory()
+            headers["Content-Encoding"] = self.compressor.encoding
+            headers.add_vary_header("Accept-Encoding")
+            # La représentation compressée n'est plus identique octet pour octet : l'ETag devient faible
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+
+            if not more_body:
+                # Réponse complète : compresser en une fois et indiquer la taille finale
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            # Réponse diffusée : la taille finale est inconnue
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(start_message)
+
+        if not more_body:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": chunk})
+            return
+
+        # Vider le compresseur seulement une fois assez de données accumulées
+        chunk = self.compressor.compress(body)
+        self.pending += len(body)
+        if self.pending >= self.flush_size:
+            chunk += self.compressor.flush()
+            self.pending = 0
+        if chunk:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": True})
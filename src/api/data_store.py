@@ -0,0 +1,63 @@
+"""
+Accès aux fichiers de données de l'api (répertoire `data_api`).
+
+Chaque jeu de données (`sales`, `retail_data`, `clients`, `products`, `stores`) est stocké dans un fichier
+JSON produit par les générateurs. Sa version est dérivée de la date de modification et de la taille du
+fichier : elle change dès que les générateurs publient de nouvelles données. Les ventes et les données
+retail peuvent aussi être partitionnées par date et par magasin (voir `src.api.partition_store`) : leur
+version est alors celle d'un fichier témoin réécrit à chaque publication, même si un ancien fichier JSON
+complet subsiste à côté des partitions.
+
+Le backend de lecture des routes est choisi par la variable d'environnement `API_DATA_BACKEND` :
+- `json` (par défaut) : chaque requête relit le fichier JSON ;
+- `arrow` : les fichiers sont convertis en Arrow et mappés en mémoire (voir `src.api.arrow_store`) ;
+- `sqlite` : les données sont chargées dans une base SQLite indexée (voir `src.api.sql_store`).
+"""
+
+import os
+
+DATA_DIR = "data_api"
+
+JSON_BACKEND = "json"
+ARROW_BACKEND = "arrow"
+SQLITE_BACKEND = "sqlite"
+DATA_BACKEND = os.getenv("API_DATA_BACKEND", JSON_BACKEND)
+
+# Fichier témoin de la version d'un jeu de données partitionné (`data_api/<nom>/_version`)
+VERSION_MARKER = "_version"
+
+
+def dataset_path(name):
+    """
+    Retourne le chemin du fichier JSON d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données (par exemple 'sales').
+
+    Returns:
+        str: Chemin du fichier.
+    """
+    return os.path.join(DATA_DIR, f"{name}.json")
+
+
+def dataset_version(name):
+    """
+    Retourne la version courante d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        str: Version sous la forme '<mtime_ns>-<taille>' en hexadécimal.
+        None: Si ni le fichier témoin ni le fichier JSON n'existent.
+    """
+    # Une fois le jeu de données partitionné, le fichier témoin fait foi : un fichier JSON resté d'avant la
+    # migration ne change plus et figerait la version
+    try:
+        stat = os.stat(os.path.join(DATA_DIR, name, VERSION_MARKER))
+    except FileNotFoundError:
+        try:
+            stat = os.stat(dataset_path(name))
+        except FileNotFoundError:
+            return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
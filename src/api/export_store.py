@@ -0,0 +1,139 @@
+"""
+Exports journaliers des ventes et des données retail, servis tels quels par `/exports`.
+
+Chaque journée d'un jeu de données partitionné est matérialisée une fois, aux formats JSON Lines et Parquet :
+
+    data_api/exports/sales/2024-12-14.jsonl
+    data_api/exports/sales/2024-12-14.parquet
+
+Le générateur écrit les exports de la journée qu'il vient de produire. La route les sert ensuite directement
+depuis le disque (`FileResponse`), avec prise en charge des plages d'octets (`Range`) : aucune sérialisation
+n'a lieu par requête et un téléchargement interrompu peut reprendre là où il s'est arrêté. Un export absent
+ou plus ancien que les partitions de sa date est régénéré au premier accès.
+"""
+
+import os
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.api import data_store, partition_store
+
+# Formats d'export et type de contenu associé
+EXPORT_FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def exports_dir(name, data_dir=None):
+    """
+    Retourne le répertoire des exports d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données (`sales` ou `retail_data`).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        str: Chemin du répertoire.
+    """
+    return os.path.join(data_dir or data_store.DATA_DIR, "exports", name)
+
+
+def export_path(name, date, fmt, data_dir=None):
+    """
+    Retourne le chemin du fichier d'export d'une journée.
+
+    Args:
+        name (str): Nom du jeu de données.
+        date (str): Date exportée, au format 'YYYY-MM-DD'.
+        fmt (str): Format de l'export (`jsonl` ou `parquet`).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        str: Chemin du fichier.
+    """
+    return os.path.join(exports_dir(name, data_dir), f"{date}.{fmt}")
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def materialize(name, date, data_dir=None):
+    """
+    Écrit les exports JSON Lines et Parquet d'une journée à partir de ses partitions.
+
+    Les fichiers sont publiés par renommage atomique : une requête en cours continue de lire l'ancienne
+    version. Si la journée n'a plus de données, ses exports sont supprimés.
+
+    Args:
+        name (str): Nom du jeu de données.
+        date (str): Date exportée, au format 'YYYY-MM-DD'.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        int: Nombre de lignes exportées.
+    """
+    rows = list(partition_store.read_partitions(name, date, data_dir=data_dir))
+    if not rows:
+        for fmt in EXPORT_FORMATS:
+            try:
+                os.remove(export_path(name, date, fmt, data_dir))
+            except FileNotFoundError:
+                pass
+        return 0
+
+    os.makedirs(exports_dir(name, data_dir), exist_ok=True)
+
+    def write_jsonl(path):
+        with open(path, "wb") as f:
+            f.write(b"".join(orjson.dumps(row) + b"\n" for row in rows))
+
+    _write_atomic(export_path(name, date, "jsonl", data_dir), write_jsonl)
+    table = pa.Table.from_pylist(rows)
+    _write_atomic(
+        export_path(name, date, "parquet", data_dir), lambda path: pq.write_table(table, path, compression="zstd")
+    )
+    return len(rows)
+
+
+def _partitions_mtime(name, date, data_dir=None):
+    # Date de dernière modification des partitions d'une journée (0 si la journée n'existe pas)
+    mtimes = []
+    for store_id in partition_store.list_stores(name, date, data_dir):
+        try:
+            mtimes.append(os.stat(partition_store.partition_path(name, date, store_id, data_dir)).st_mtime_ns)
+        except FileNotFoundError:
+            continue
+    return max(mtimes, default=0)
+
+
+def ensure_export(name, date, fmt, data_dir=None):
+    """
+    Retourne le fichier d'export d'une journée, en le régénérant s'il est absent ou plus ancien que les
+    partitions de la date.
+
+    Args:
+        name (str): Nom du jeu de données.
+        date (str): Date exportée, au format 'YYYY-MM-DD'.
+        fmt (str): Format de l'export (`jsonl` ou `parquet`).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        str: Chemin du fichier d'export.
+        None: Si la journée n'a aucune donnée.
+    """
+    path = export_path(name, date, fmt, data_dir)
+    try:
+        exported = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        exported = None
+    partitions = _partitions_mtime(name, date, data_dir)
+    # Une journée supprimée (nettoyage des partitions) n'est plus exportée
+    if exported is None or partitions == 0 or exported < partitions:
+        materialize(name, date, data_dir)
+    return path if os.path.exists(path) else None
@@ -2,19 +2,102 @@
 Fichier principal pour configurer et démarrer l'api Retail Insights.
 
 Ce fichier inclut les routeurs définis dans différents modules et lance le serveur.
+
+Les routes de données sont synchrones (`def`) : FastAPI les exécute dans un pool de threads, si bien que
+la lecture et le filtrage des fichiers JSON ne bloquent pas la boucle d'événements. Une requête légère
+(`/stores`) reste servie pendant qu'une requête volumineuse (`/sales`) est en cours.
+
+Pour servir plus de requêtes, l'api peut être lancée avec plusieurs workers (`API_WORKERS`). Dans ce cas,
+il est conseillé d'utiliser le backend Arrow (`API_DATA_BACKEND=arrow`) : les jeux de données sont convertis
+une seule fois avant le démarrage des workers, puis chaque worker mappe les mêmes fichiers en lecture seule.
+La mémoire consommée reste celle d'une seule copie des données, quel que soit le nombre de workers :
+
+    API_DATA_BACKEND=arrow API_WORKERS=4 python -m src.api.main
+
+Les données sont préchargées au démarrage de chaque worker (fichiers Arrow mappés, tables SQLite chargées) :
+la première requête ne paie pas ce coût. `GET /health/ready` répond 200 une fois ce préchargement terminé,
+avec la version de chaque jeu de données servie, et permet d'attendre l'api sans délai arbitraire.
 """
 
+import os
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 
+from src.api import arrow_store, sql_store
+from src.api.compression import CompressionMiddleware
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND
+from src.api.metrics import MetricsMiddleware, metrics_response
+from src.api.response_cache import ResponseCacheMiddleware
 from src.api.routes.clients_route import router as client_router
+from src.api.routes.exports_route import router as exports_router
+from src.api.routes.health_route import router as health_router
 from src.api.routes.products_route import router as product_router
+from src.api.routes.query_route import router as query_router
 from src.api.routes.retail_data_route import router as retail_data_router
 from src.api.routes.sales_route import router as sales_router
 from src.api.routes.stores_route import router as store_router
 
-app = FastAPI()
+# Paramètres de compression des réponses (taille minimale en octets, niveaux de compression et volume
+# accumulé avant l'envoi d'un fragment compressé d'une réponse diffusée)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("API_COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("API_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("API_ZSTD_LEVEL", "3"))
+COMPRESSION_FLUSH_SIZE = int(os.getenv("API_COMPRESSION_FLUSH_SIZE", str(64 * 1024)))
+# Nombre maximal de requêtes de données traitées simultanément dans le pool de threads
+THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "40"))
+# Nombre de processus uvicorn lancés par `python -m src.api.main`
+WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+
+def warm_datasets():
+    """
+    Précharge les jeux de données disponibles dans le backend configuré : conversion et mappage des fichiers
+    Arrow, ou chargement des tables SQLite. Les jeux de données absents sont ignorés.
+    """
+    if DATA_BACKEND == ARROW_BACKEND:
+        for name in arrow_store.prepare_arrow_datasets():
+            arrow_store.open_table(name)
+    elif DATA_BACKEND == SQLITE_BACKEND:
+        for name in sql_store.TABLES:
+            try:
+                sql_store.sync_from_json(name)
+            except FileNotFoundError:
+                continue
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Configure le pool de threads utilisé pour exécuter les routes synchrones, précharge les jeux de données
+    puis marque l'api comme prête (`GET /health/ready`).
+
+    Args:
+        app (FastAPI): Application démarrée.
+    """
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    warm_datasets()
+    app.state.ready = True
+    yield
+    app.state.ready = False
 
 
+app = FastAPI(lifespan=lifespan)
+
+# Compression zstd/gzip négociée avec le client via l'en-tête Accept-Encoding
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=GZIP_LEVEL,
+    zstd_level=ZSTD_LEVEL,
+    flush_size=COMPRESSION_FLUSH_SIZE,
+)
+# Cache des réponses sérialisées (et compressées), indexé par la version des données
+app.add_middleware(ResponseCacheMiddleware)
+# Métriques par route (ajouté en dernier : mesure la durée totale et les octets réellement envoyés)
+app.add_middleware(MetricsMiddleware)
+
 # Routeur pour les ventes
 app.include_router(sales_router, prefix="/sales", tags=["Sales"])
 # Routeur pour les clients
@@ -25,6 +108,12 @@ app.include_router(product_router, prefix="/products", tags=["Products"])
 app.include_router(retail_data_router, prefix="/retail_data", tags=["RetailData"])
 # Routeur pour les stores
 app.include_router(store_router, prefix="/stores", tags=["Stores"])
+# Routeur pour les exports journaliers
+app.include_router(exports_router, prefix="/exports", tags=["Exports"])
+# Routeur pour les requêtes groupées
+app.include_router(query_router, prefix="/query", tags=["Query"])
+# Routeur pour l'état de l'api
+app.include_router(health_router, prefix="/health", tags=["Health"])
 
 
 @app.get("/")
@@ -38,8 +127,26 @@ def get_welcome():
     return {"message": "Bienvenue sur l'api Retail Insights!!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Point de terminaison des métriques de l'api, au format texte Prometheus.
+
+    Returns:
+        PlainTextResponse: Compteurs de requêtes, histogrammes de latence et de taille, temps de chargement
+        et de filtrage par route.
+    """
+    return metrics_response()
+
+
 # Lancer le serveur api localement pour tester
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="localhost", port=8000)
+    if DATA_BACKEND == ARROW_BACKEND:
+        # Conversion unique avant le démarrage des workers, qui se contentent ensuite de mapper les fichiers
+        arrow_store.prepare_arrow_datasets()
+    if WORKERS > 1:
+        uvicorn.run("src.api.main:app", host="localhost", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="localhost", port=8000)
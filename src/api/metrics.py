@@ -0,0 +1,242 @@
+"""
+Métriques des requêtes de l'api, exposées au format texte Prometheus sur `GET /metrics`.
+
+Pour chaque route (gabarit de chemin, par exemple `/sales/hour`) sont mesurés :
+- le nombre de requêtes, par méthode et code de statut ;
+- l'histogramme des latences ;
+- l'histogramme des tailles de réponse (octets réellement envoyés, après compression) ;
+- le temps passé à charger les données et à les filtrer (phases `load` et `filter`).
+
+Les métriques sont tenues en mémoire par chaque processus : avec plusieurs workers, chaque worker
+expose ses propres compteurs. Le coût par requête se limite à quelques mises à jour de dictionnaires.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.responses import PlainTextResponse
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bornes des histogrammes (secondes et octets)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Libellé des requêtes ne correspondant à aucune route (évite une série par chemin inconnu)
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Durées des phases de la requête en cours : {phase: secondes}
+_phases = ContextVar("request_phases", default=None)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à bornes fixes, au sens de Prometheus.
+
+    Args:
+        buckets (tuple): Bornes supérieures des intervalles, par ordre croissant.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        """
+        Retourne les lignes Prometheus de l'histogramme (`_bucket`, `_sum`, `_count`).
+
+        Args:
+            name (str): Nom de la métrique.
+            labels (str): Libellés déjà formatés, par exemple `route="/sales"`.
+
+        Returns:
+            list: Lignes au format texte Prometheus.
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques de l'api, partagé par la boucle d'événements et le pool de threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.latency = {}
+            self.sizes = {}
+            self.phases = {}
+            self.counters = {}
+
+    def observe_request(self, route, method, status, duration, size, phases):
+        """
+        Enregistre une requête terminée.
+
+        Args:
+            route (str): Gabarit de chemin de la route.
+            method (str): Méthode HTTP.
+            status (int): Code de statut de la réponse.
+            duration (float): Durée totale en secondes.
+            size (int): Taille du corps envoyé, en octets.
+            phases (dict): Durées des phases de la requête, en secondes.
+        """
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(route, Histogram(LATENCY_BUCKETS)).observe(duration)
+            self.sizes.setdefault(route, Histogram(SIZE_BUCKETS)).observe(size)
+            for phase, seconds in phases.items():
+                total, count = self.phases.get((route, phase), (0.0, 0))
+                self.phases[(route, phase)] = (total + seconds, count + 1)
+
+    def increment(self, name, amount=1):
+        """
+        Incrémente un compteur libre (par exemple les succès du cache de réponses).
+
+        Args:
+            name (str): Nom de la métrique Prometheus.
+            amount (int): Valeur à ajouter. Par défaut, 1.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def render(self):
+        """
+        Retourne toutes les métriques au format texte Prometheus.
+
+        Returns:
+            str: Exposition texte, terminée par un saut de ligne.
+        """
+        with self._lock:
+            lines = [
+                "# HELP api_requests_total Number of HTTP requests by route, method and status.",
+                "# TYPE api_requests_total counter",
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'api_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                "# HELP api_request_duration_seconds Request latency by route.",
+                "# TYPE api_request_duration_seconds histogram",
+            ]
+            for route, histogram in sorted(self.latency.items()):
+                lines += histogram.render("api_request_duration_seconds", f'route="{route}"')
+
+            lines += [
+                "# HELP api_response_size_bytes Response body size sent by route.",
+                "# TYPE api_response_size_bytes histogram",
+            ]
+            for route, histogram in sorted(self.sizes.items()):
+                lines += histogram.render("api_response_size_bytes", f'route="{route}"')
+
+            lines += [
+                "# HELP api_phase_duration_seconds Time spent loading and filtering data by route.",
+                "# TYPE api_phase_duration_seconds summary",
+            ]
+            for (route, phase), (total, count) in sorted(self.phases.items()):
+                labels = f'route="{route}",phase="{phase}"'
+                lines.append(f"api_phase_duration_seconds_sum{{{labels}}} {total}")
+                lines.append(f"api_phase_duration_seconds_count{{{labels}}} {count}")
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def timed(phase):
+    """
+    Mesure la durée d'une phase de la requête en cours (`load` ou `filter`).
+
+    Hors requête (scripts, tests unitaires), la mesure est ignorée.
+
+    Args:
+        phase (str): Nom de la phase.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = _phases.get()
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI enregistrant le nombre, la durée et la taille des réponses de chaque route.
+
+    Args:
+        app (ASGIApp): Application ASGI à envelopper.
+        registry (MetricsRegistry): Registre où enregistrer les mesures.
+    """
+
+    def __init__(self, app, registry=registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        # Le dictionnaire est partagé avec le thread qui exécute la route (contexte copié par anyio)
+        phases = {}
+        token = _phases.set(phases)
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _phases.reset(token)
+            # La route correspondante est ajoutée au scope par le routeur FastAPI
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            self.registry.observe_request(
+                route_path, scope["method"], status, time.perf_counter() - start, size, phases
+            )
+
+
+def metrics_response():
+    """
+    Construit la réponse de `GET /metrics`.
+
+    Returns:
+        PlainTextResponse: Métriques au format texte Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,330 @@
+"""
+Stockage partitionné des ventes et des données retail (backend JSON).
+
+Au lieu d'un fichier unique qui grossit chaque jour, chaque jeu de données est découpé par date et par
+magasin, un fichier JSON Lines par partition :
+
+    data_api/sales/sale_date=2024-12-14/store_id=store_1/part.jsonl
+    data_api/retail_data/date=2024-12-14/store_id=store_1/part.jsonl
+
+Une requête sur une date (et éventuellement quelques magasins) ne lit que les fichiers de ses partitions,
+quelle que soit la profondeur de l'historique. Le nettoyage supprime des dates entières.
+
+Usage :
+    python -m src.api.partition_store drop --date 2024-12-14 [jeu_de_données ...]
+    python -m src.api.partition_store drop --before 2024-12-01 [jeu_de_données ...]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import time
+
+import orjson
+
+from src.api import data_store
+
+# Colonnes de partitionnement de chaque jeu de données : (date, magasin)
+PARTITION_KEYS = {
+    "sales": ("sale_date", "store_id"),
+    "retail_data": ("date", "store_id"),
+}
+PART_FILE = "part.jsonl"
+# Format des dates de partition ('YYYY-MM-DD')
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def validate_key(date, store_id=None):
+    """
+    Vérifie qu'une date (et un magasin) peuvent nommer une partition sans sortir du répertoire des données.
+
+    Les identifiants de magasin viennent des requêtes (`/sales/bulk`, requêtes groupées) : un séparateur de
+    chemin ou `..` désignerait un fichier hors des partitions.
+
+    Args:
+        date (str): Date de la partition, au format 'YYYY-MM-DD'.
+        store_id (str, optional): Identifiant du magasin. Par défaut, None (date seule).
+
+    Raises:
+        ValueError: Si la date n'est pas au format 'YYYY-MM-DD' ou si l'identifiant du magasin est vide ou
+            contient un séparateur de chemin ou `..`.
+    """
+    if not isinstance(date, str) or not DATE_PATTERN.fullmatch(date):
+        raise ValueError(f"Invalid partition date: {date!r}")
+    if store_id is None:
+        return
+    separators = {"/", os.sep, os.altsep} - {None}
+    if not isinstance(store_id, str) or not store_id or ".." in store_id or separators & set(store_id):
+        raise ValueError(f"Invalid partition store_id: {store_id!r}")
+
+
+def _is_valid_key(date, store_id=None):
+    try:
+        validate_key(date, store_id)
+    except ValueError:
+        return False
+    return True
+
+
+def partition_root(name, data_dir=None):
+    """
+    Retourne le répertoire racine des partitions d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données (`sales` ou `retail_data`).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        str: Chemin du répertoire.
+    """
+    return os.path.join(data_dir or data_store.DATA_DIR, name)
+
+
+def partition_path(name, date, store_id, data_dir=None):
+    """
+    Retourne le chemin du fichier d'une partition.
+
+    Args:
+        name (str): Nom du jeu de données.
+        date (str): Date de la partition, au format 'YYYY-MM-DD'.
+        store_id (str): Identifiant du magasin.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        str: Chemin du fichier `part.jsonl`.
+
+    Raises:
+        ValueError: Si la date ou l'identifiant du magasin ne peuvent pas nommer une partition (voir `validate_key`).
+    """
+    validate_key(date, store_id)
+    date_key, store_key = PARTITION_KEYS[name]
+    return os.path.join(partition_root(name, data_dir), f"{date_key}={date}", f"{store_key}={store_id}", PART_FILE)
+
+
+def is_partitioned(name):
+    """
+    Indique si un jeu de données est stocké au format partitionné.
+
+    Args:
+        name (str): Nom du jeu de données.
+
+    Returns:
+        bool: True si le répertoire des partitions existe.
+    """
+    return name in PARTITION_KEYS and os.path.isdir(partition_root(name))
+
+
+def write_partitions(name, rows, data_dir=None, publish=True):
+    """
+    Écrit des lignes dans leurs partitions (date, magasin).
+
+    Chaque partition concernée est remplacée en entier par renommage atomique : un lecteur voit soit
+    l'ancienne, soit la nouvelle version, et régénérer une journée ne crée pas de doublons. Les lignes
+    sans date ou sans magasin (génération en erreur) sont ignorées.
+
+    Args:
+        name (str): Nom du jeu de données.
+        rows (list): Lignes à écrire.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+        publish (bool): Si False, la version du jeu de données n'est pas mise à jour : l'appelant la publie
+            ensuite avec `publish_version`. Par défaut, True.
+
+    Returns:
+        int: Nombre de partitions écrites.
+
+    Raises:
+        ValueError: Si une ligne porte une date ou un magasin qui ne peuvent pas nommer une partition ; rien
+            n'est alors écrit.
+    """
+    date_key, store_key = PARTITION_KEYS[name]
+    partitions = {}
+    for row in rows:
+        date, store_id = row.get(date_key), row.get(store_key)
+        if date is None or store_id is None:
+            continue
+        validate_key(date, store_id)
+        partitions.setdefault((date, store_id), []).append(row)
+
+    for (date, store_id), partition_rows in partitions.items():
+        path = partition_path(name, date, store_id, data_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(orjson.dumps(row) + b"\n" for row in partition_rows))
+        os.replace(tmp_path, path)
+
+    if partitions and publish:
+        publish_version(name, data_dir)
+    return len(partitions)
+
+
+def publish_version(name, data_dir=None):
+    """
+    Met à jour la version d'un jeu de données partitionné, portée par un fichier témoin (voir `dataset_version`).
+
+    Un appelant qui alimente aussi d'autres stockages avec les mêmes lignes (fichiers JSON du backend Arrow,
+    base SQLite) écrit les partitions avec `publish=False` et ne publie la version qu'une fois ces stockages
+    à jour : une nouvelle version n'est jamais associée aux anciennes données (cache des réponses, ETag).
+
+    Args:
+        name (str): Nom du jeu de données.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        bool: False si le jeu de données n'a encore aucune partition.
+    """
+    root = partition_root(name, data_dir)
+    if not os.path.isdir(root):
+        return False
+    with open(os.path.join(root, data_store.VERSION_MARKER), "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+    return True
+
+
+def _read_part(path):
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+    except FileNotFoundError:
+        return
+
+
+def list_stores(name, date, data_dir=None):
+    """
+    Liste les magasins présents dans les partitions d'une date.
+
+    Args:
+        name (str): Nom du jeu de données.
+        date (str): Date des partitions, au format 'YYYY-MM-DD'.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        list: Identifiants des magasins, triés (vide si la date n'existe pas).
+    """
+    date_key, store_key = PARTITION_KEYS[name]
+    try:
+        entries = sorted(os.listdir(os.path.join(partition_root(name, data_dir), f"{date_key}={date}")))
+    except FileNotFoundError:
+        return []
+    return [entry.split("=", 1)[1] for entry in entries if entry.startswith(f"{store_key}=")]
+
+
+def read_partitions(name, date, store_ids=None, data_dir=None):
+    """
+    Lit les lignes des partitions d'une date, pour tous les magasins ou seulement ceux demandés.
+
+    Une date ou un magasin qui ne peuvent pas nommer une partition (voir `validate_key`) n'ont aucune ligne.
+
+    Args:
+        name (str): Nom du jeu de données.
+        date (str): Date des partitions, au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Yields:
+        dict: Lignes des partitions, magasin par magasin.
+    """
+    if not _is_valid_key(date):
+        return
+    if store_ids is None:
+        store_ids = list_stores(name, date, data_dir)
+
+    for store_id in dict.fromkeys(store_ids):
+        if _is_valid_key(date, store_id):
+            yield from _read_part(partition_path(name, date, store_id, data_dir))
+
+
+def read_range(name, start_date, end_date, store_ids=None, data_dir=None):
+    """
+    Lit les lignes des partitions d'une plage de dates, date par date dans l'ordre croissant.
+
+    Seules les dates de la plage sont ouvertes : la liste des répertoires de dates sert d'index.
+
+    Args:
+        name (str): Nom du jeu de données.
+        start_date (str): Premier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        end_date (str): Dernier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Yields:
+        dict: Lignes des partitions.
+    """
+    for date in list_dates(name, data_dir):
+        if start_date <= date <= end_date:
+            yield from read_partitions(name, date, store_ids, data_dir)
+
+
+def list_dates(name, data_dir=None):
+    """
+    Liste les dates présentes dans les partitions d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        list: Dates triées par ordre croissant.
+    """
+    prefix = f"{PARTITION_KEYS[name][0]}="
+    try:
+        entries = os.listdir(partition_root(name, data_dir))
+    except FileNotFoundError:
+        return []
+    return sorted(entry[len(prefix):] for entry in entries if entry.startswith(prefix))
+
+
+def drop_partitions(name, dates=None, before=None, data_dir=None):
+    """
+    Supprime des dates entières d'un jeu de données partitionné.
+
+    Args:
+        name (str): Nom du jeu de données.
+        dates (list, optional): Dates à supprimer, au format 'YYYY-MM-DD'.
+        before (str, optional): Supprime aussi toutes les dates strictement antérieures à celle-ci.
+        data_dir (str, optional): Répertoire des données. Par défaut, celui de l'api.
+
+    Returns:
+        list: Dates supprimées.
+
+    Raises:
+        ValueError: Si une date n'est pas au format 'YYYY-MM-DD'.
+    """
+    for date in [*(dates or []), *([before] if before else [])]:
+        validate_key(date)
+    wanted = set(dates or [])
+    dropped = [date for date in list_dates(name, data_dir) if date in wanted or (before and date < before)]
+    for date in dropped:
+        shutil.rmtree(os.path.join(partition_root(name, data_dir), f"{PARTITION_KEYS[name][0]}={date}"))
+    if dropped:
+        publish_version(name, data_dir)
+    return dropped
+
+
+# Nettoyage manuel ou planifié des partitions (tâche `cleanup_files` du pipeline)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drop date partitions of the API datasets.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    drop = subparsers.add_parser("drop", help="Drop whole date partitions.")
+    drop.add_argument("datasets", nargs="*", help=f"Datasets among {', '.join(PARTITION_KEYS)} (default: all).")
+    drop.add_argument("--date", action="append", default=[], help="Date to drop (repeatable).")
+    drop.add_argument("--before", help="Drop every date strictly before this one.")
+    args = parser.parse_args()
+    if not args.date and not args.before:
+        parser.error("drop requires --date or --before")
+    unknown = set(args.datasets) - set(PARTITION_KEYS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+
+    try:
+        for date in [*args.date, *([args.before] if args.before else [])]:
+            validate_key(date)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for dataset in args.datasets or PARTITION_KEYS:
+        removed = drop_partitions(dataset, args.date, args.before)
+        print(f"{dataset}: dropped {len(removed)} date partitions {removed}")
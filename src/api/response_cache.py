@@ -0,0 +1,232 @@
+"""
+Cache des réponses sérialisées des routes de données.
+
+Les requêtes les plus fréquentes (`/retail_data?date=<aujourd'hui>`, `/stores`) produisent la même réponse
+tant que leurs données ne changent pas : le middleware conserve les octets finaux de la réponse (sérialisés
+et, le cas échéant, compressés) et les renvoie sans rappeler la route.
+
+La clé d'une réponse est formée de la route, de ses paramètres normalisés (triés), du format demandé
+(`Accept`), de l'encodage négocié (zstd, gzip ou aucun) et de la version des jeux de données lus par la route.
+Dès que le générateur publie de nouvelles données, la version change : les anciennes entrées ne sont plus
+jamais servies et sortent du cache par ordre d'utilisation (LRU). Le cache est borné en nombre d'entrées et
+en octets ; les réponses trop volumineuses, partielles (`Range`) ou conditionnelles (`If-None-Match`) ne sont
+pas mises en cache.
+
+Les succès, échecs et évictions sont comptés dans `/metrics` (`api_response_cache_*_total`). Comme les
+métriques, le cache est propre à chaque worker.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers
+
+from src.api.compression import parse_accept_encoding
+from src.api.data_store import dataset_version
+from src.api.metrics import registry
+
+# Taille du cache : nombre d'entrées (0 désactive le cache), octets au total et octets par réponse
+MAX_ENTRIES = int(os.getenv("API_RESPONSE_CACHE_ENTRIES", "256"))
+MAX_BYTES = int(os.getenv("API_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MAX_ENTRY_BYTES = int(os.getenv("API_RESPONSE_CACHE_ENTRY_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Routes mises en cache et jeux de données dont dépend leur réponse
+CACHED_ROUTES = {
+    "/sales": ("sales",),
+    "/sales/hour": ("sales",),
+    "/sales/bulk": ("sales",),
+    "/sales/summary": ("sales",),
+    "/retail_data": ("retail_data",),
+    "/retail_data/store": ("retail_data",),
+    "/retail_data/summary": ("retail_data",),
+    "/clients": ("clients",),
+    "/products": ("products",),
+    "/stores": ("stores",),
+}
+
+
+class ResponseCache:
+    """
+    Cache LRU de réponses sérialisées, borné en nombre d'entrées et en octets.
+
+    Args:
+        max_entries (int): Nombre maximal d'entrées (0 désactive le cache).
+        max_bytes (int): Taille cumulée maximale des corps conservés, en octets.
+        max_entry_bytes (int): Taille maximale du corps d'une réponse mise en cache, en octets.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, max_entry_bytes=MAX_ENTRY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Retourne une réponse en cache et la marque comme la plus récemment utilisée.
+
+        Args:
+            key (tuple): Clé de la réponse (voir `cache_key`).
+
+        Returns:
+            tuple: `(statut, en-têtes bruts, corps, route)`.
+            None: Si la réponse n'est pas en cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        """
+        Ajoute une réponse au cache, en évinçant les moins récemment utilisées si nécessaire.
+
+        Args:
+            key (tuple): Clé de la réponse.
+            entry (tuple): `(statut, en-têtes bruts, corps, route)`.
+        """
+        size = len(entry[2])
+        if self.max_entries <= 0 or size > min(self.max_entry_bytes, self.max_bytes):
+            return
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[2])
+            self._entries[key] = entry
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (_, _, body, _) = self._entries.popitem(last=False)
+                self._size -= len(body)
+                evicted += 1
+        if evicted:
+            registry.increment("api_response_cache_evictions_total", evicted)
+
+    def clear(self):
+        """
+        Vide le cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache()
+
+
+def negotiated_encoding(headers):
+    """
+    Retourne l'encodage que le middleware de compression choisira pour une requête.
+
+    Args:
+        headers (Headers): En-têtes de la requête.
+
+    Returns:
+        str: `zstd`, `gzip` ou `identity`.
+    """
+    accepted = parse_accept_encoding(headers.get("accept-encoding", ""))
+    for encoding in ("zstd", "gzip"):
+        if encoding in accepted:
+            return encoding
+    return "identity"
+
+
+def cache_key(path, query_string, headers, versions):
+    """
+    Construit la clé de cache d'une requête.
+
+    Args:
+        path (str): Chemin de la route.
+        query_string (str): Paramètres de la requête.
+        headers (Headers): En-têtes de la requête.
+        versions (tuple): Versions des jeux de données lus par la route.
+
+    Returns:
+        tuple: Clé de cache.
+    """
+    params = tuple(sorted(parse_qsl(query_string, keep_blank_values=True)))
+    accept = headers.get("accept", "").strip().lower()
+    return path, params, accept, negotiated_encoding(headers), versions
+
+
+class ResponseCacheMiddleware:
+    """
+    Middleware ASGI servant les réponses des routes de données depuis un cache de réponses sérialisées.
+
+    Il est placé à l'extérieur du middleware de compression : les octets conservés sont ceux réellement envoyés.
+
+    Args:
+        app (ASGIApp): Application ASGI à envelopper.
+        cache (ResponseCache): Cache à utiliser. Par défaut, le cache partagé du processus.
+        routes (dict): Routes mises en cache et jeux de données dont elles dépendent.
+    """
+
+    def __init__(self, app, cache=response_cache, routes=CACHED_ROUTES):
+        self.app = app
+        self.cache = cache
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or self.cache.max_entries <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        datasets = self.routes.get(scope["path"])
+        headers = Headers(scope=scope)
+        # Les réponses partielles et conditionnelles dépendent de la copie du client : pas de cache
+        if datasets is None or "range" in headers or "if-none-match" in headers:
+            await self.app(scope, receive, send)
+            return
+        versions = tuple(dataset_version(name) for name in datasets)
+        if None in versions:
+            await self.app(scope, receive, send)
+            return
+
+        key = cache_key(scope["path"], scope["query_string"].decode("latin-1"), headers, versions)
+        entry = self.cache.get(key)
+        if entry is not None:
+            registry.increment("api_response_cache_hits_total")
+            status, raw_headers, body, route = entry
+            # La route est renseignée comme si le routeur l'avait appelée (libellé des métriques)
+            if route is not None:
+                scope["route"] = route
+            await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        registry.increment("api_response_cache_misses_total")
+        start = {}
+        chunks = []
+        size = 0
+        cacheable = True
+
+        async def send_and_capture(message):
+            nonlocal size, cacheable
+            if message["type"] == "http.response.start":
+                start.update(message)
+                cache_control = Headers(raw=message["headers"]).get("cache-control", "")
+                cacheable = message["status"] == 200 and "no-store" not in cache_control
+            elif message["type"] == "http.response.body" and cacheable:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.cache.max_entry_bytes:
+                    # Réponse trop volumineuse : transmise sans être conservée
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+                    if not message.get("more_body", False):
+                        self.cache.put(
+                            key, (start["status"], list(start["headers"]), b"".join(chunks), scope.get("route"))
+                        )
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
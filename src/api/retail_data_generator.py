@@ -5,6 +5,8 @@ import sys
 from datetime import datetime
 from io import TextIOWrapper
 
+from src.api import change_log, export_store, partition_store, sql_store
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND
 from src.api.sale_generator import SaleGenerator
 from src.api.logger_generation import generation_logger
 
@@ -198,11 +200,99 @@ class RetailDataGenerator:
             except Exception as e:
                 generation_logger.error(f"Error processing store {store['name']}: {e}")
 
-        # Sauvegarder les données retail et ventes dans un fichier JSON
-        self.save_retail_data_to_file()
-        self.save_sales_to_file()
+        # Sauvegarder les données retail et ventes dans leurs partitions (date, magasin)
+        self.save_partitions()
+        self.save_exports()
+        # Le backend Arrow est converti depuis les fichiers JSON complets
+        if DATA_BACKEND == ARROW_BACKEND:
+            self.save_retail_data_to_file()
+            self.save_sales_to_file()
+        self.publish_changes()
+        # La nouvelle version n'est publiée qu'une fois tous les stockages à jour (dans la transaction SQLite)
+        if DATA_BACKEND == SQLITE_BACKEND:
+            self.save_day_to_database(date_str)
+        else:
+            self.publish_versions()
         generation_logger.info(f"Completed data generation for date {date_str}.")
 
+    def save_partitions(self):
+        """
+        Sauvegarde les données retail et les ventes générées dans leurs partitions par date et par magasin
+        (`<data_dir>/sales/sale_date=.../store_id=.../part.jsonl`), sans relire l'historique.
+
+        La version des jeux de données n'est pas mise à jour ici, mais par `publish_versions`.
+        """
+        retail_partitions = partition_store.write_partitions(
+            "retail_data", self.retail_data, self.data_dir, publish=False
+        )
+        sales_partitions = partition_store.write_partitions("sales", self.sales_buffer, self.data_dir, publish=False)
+        generation_logger.info(
+            f"Saved retail data to {retail_partitions} partitions and sales to {sales_partitions} partitions "
+            f"in {self.data_dir}."
+        )
+
+    def save_exports(self):
+        """
+        Matérialise les exports journaliers (JSON Lines et Parquet) des dates générées, servis par `/exports`.
+
+        Une erreur d'export est journalisée sans interrompre la génération : la route régénère un export
+        manquant au premier accès.
+        """
+        try:
+            for name, rows, date_key in (
+                ("sales", self.sales_buffer, "sale_date"),
+                ("retail_data", self.retail_data, "date"),
+            ):
+                for date in sorted({row[date_key] for row in rows if row.get(date_key)}):
+                    count = export_store.materialize(name, date, self.data_dir)
+                    generation_logger.info(f"Exported {count} {name} rows for {date}.")
+        except Exception as e:
+            generation_logger.error(f"Error writing daily exports: {e}")
+
+    def publish_versions(self):
+        """
+        Publie la nouvelle version des données retail et des ventes partitionnées (fichiers témoins), une fois
+        les fichiers JSON du backend Arrow ou la base SQLite à jour : l'api ne peut pas associer la nouvelle
+        version (cache des réponses, ETag) aux anciennes données.
+        """
+        for name in ("retail_data", "sales"):
+            partition_store.publish_version(name, self.data_dir)
+
+    def publish_changes(self):
+        """
+        Publie les ventes et les données retail générées dans le journal des modifications,
+        chacune sous un nouveau numéro de séquence, pour l'extraction incrémentale.
+
+        Une erreur de publication est journalisée sans interrompre la génération : les partitions
+        restent la source des routes.
+        """
+        try:
+            sales_sequence = change_log.append_batch("sales", self.sales_buffer, self.data_dir)
+            retail_sequence = change_log.append_batch("retail_data", self.retail_data, self.data_dir)
+            generation_logger.info(
+                f"Published sales batch {sales_sequence} and retail data batch {retail_sequence} to the change log."
+            )
+        except Exception as e:
+            generation_logger.error(f"Error publishing data to the change log: {e}")
+
+    def save_day_to_database(self, date_str):
+        """
+        Charge les données retail et les ventes de la journée dans la base SQLite, en une seule transaction,
+        et publie leur nouvelle version juste avant la validation.
+
+        Args:
+            date_str (str): La date des données générées, au format 'YYYY-MM-DD'.
+        """
+        sql_store.load_day(
+            date_str,
+            {"sales": self.sales_buffer, "retail_data": self.retail_data},
+            before_commit=self.publish_versions,
+        )
+        generation_logger.info(
+            f"Loaded {len(self.sales_buffer)} sales and {len(self.retail_data)} retail rows "
+            f"for {date_str} into {sql_store.DB_PATH}."
+        )
+
     def save_retail_data_to_file(self):
         """
         Sauvegarde les données retail générées dans le fichier 'retail_data.json'.
@@ -0,0 +1,53 @@
+"""
+Agrégations côté serveur pour les routes de synthèse (`/sales/summary`, `/retail_data/summary`).
+
+Une agrégation est décrite par des clés de regroupement et une liste de mesures
+`(nom_en_sortie, fonction, colonne)`, la fonction étant `sum`, `count` ou `count_distinct`.
+La même description est traduite par chaque backend : boucle Python pour le backend JSON,
+`Table.group_by` pour le backend Arrow et `GROUP BY` pour le backend SQLite.
+"""
+
+SUM = "sum"
+COUNT = "count"
+COUNT_DISTINCT = "count_distinct"
+
+
+def aggregate_rows(rows, keys, measures):
+    """
+    Agrège des lignes en un seul parcours (backend JSON).
+
+    Les valeurs nulles sont ignorées, comme en SQL : la somme d'un groupe sans valeur est None.
+
+    Args:
+        rows (iterable): Lignes à agréger.
+        keys (list): Colonnes de regroupement.
+        measures (list): Mesures `(nom_en_sortie, fonction, colonne)`.
+
+    Returns:
+        list: Une ligne par groupe, triée sur les clés.
+    """
+    groups = {}
+    for row in rows:
+        key = tuple(row[column] for column in keys)
+        state = groups.get(key)
+        if state is None:
+            state = groups[key] = [None if function == SUM else set() if function == COUNT_DISTINCT else 0
+                                   for _, function, _ in measures]
+        for i, (_, function, column) in enumerate(measures):
+            value = row[column]
+            if value is None:
+                continue
+            if function == SUM:
+                state[i] = value if state[i] is None else state[i] + value
+            elif function == COUNT_DISTINCT:
+                state[i].add(value)
+            else:
+                state[i] += 1
+
+    summary = []
+    for key in sorted(groups):
+        row = dict(zip(keys, key))
+        for (name, function, _), value in zip(measures, groups[key]):
+            row[name] = len(value) if function == COUNT_DISTINCT else value
+        summary.append(row)
+    return summary
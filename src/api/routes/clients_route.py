@@ -1,22 +1,45 @@
 import json
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter
+import pyarrow.compute as pc
+from fastapi import APIRouter, Query, Request, Response
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from src import schemas
+from src.api import arrow_store, sql_store
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND
+from src.api.metrics import timed
+from src.api.routes.conditional import is_not_modified, make_etag, not_modified_response, set_etag_headers
 from src.api.routes.logger_routes import logger
+from src.api.routes.pagination import (MAX_PAGE_SIZE, decode_cursor, keyset_clause, keyset_expression, paginate,
+                                       set_page_headers, take_page)
+from src.api.routes.responses import (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, backend_columns, format_response,
+                                      json_response, ndjson_response, negotiate_format, parse_fields,
+                                      project)
+from src.api.schemas import pydantic_model
 
 router = APIRouter()
 
 
-# Modèle Pydantic pour la réponse des clients
-class ClientResponse(BaseModel):
-    id: str
-    name: str
-    age: int
-    gender: str
-    loyalty_card: bool
-    city: str
+# Modèle Pydantic de la réponse des clients, dérivé du schéma partagé avec l'extraction
+ClientResponse = pydantic_model(schemas.ClientResponse)
+
+
+# Colonnes de la clé de tri utilisée par la pagination, et leurs types (vérification des curseurs)
+CLIENT_KEY_COLUMNS = ("id",)
+CLIENT_KEY_TYPES = (str,)
+
+
+def client_sort_key(client):
+    """
+    Clé de tri stable d'un client, utilisée pour la pagination par curseur.
+
+    Args:
+        client (dict): Informations du client.
+
+    Returns:
+        tuple: Clé `(id,)`.
+    """
+    return (client["id"],)
 
 
 # Charger les données des clients depuis le fichier JSON
@@ -40,35 +63,209 @@ def load_clients():
         return []
 
 
+def clients_filter(city):
+    """
+    Construit le filtre des clients d'une ville (insensible à la casse) dans la forme attendue par le backend
+    de données configuré.
+
+    Args:
+        city (str): Nom de la ville.
+
+    Returns:
+        pyarrow.compute.Expression: Avec le backend Arrow.
+        tuple: Clause WHERE paramétrée et ses paramètres, avec le backend SQLite.
+        callable: Prédicat sur un client, avec le backend JSON.
+    """
+    if DATA_BACKEND == ARROW_BACKEND:
+        return pc.utf8_lower(pc.field("city")) == city.lower()
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        return "city_key = ?", [city.lower()]
+
+    return lambda client: client["city"].lower() == city.lower()
+
+
+def select_clients(city, columns=None):
+    """
+    Sélectionne les clients d'une ville (insensible à la casse) depuis le backend de données configuré.
+
+    Args:
+        city (str): Nom de la ville.
+        columns (list, optional): Colonnes à lire avec un backend colonnaire ou SQL. Par défaut, toutes.
+
+    Returns:
+        iterable: Clients correspondants (générateur avec le backend JSON, liste avec le backend Arrow).
+
+    Raises:
+        FileNotFoundError: Si le jeu de données des clients est introuvable.
+    """
+    condition = clients_filter(city)
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.select("clients", condition, columns)
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        where, params = condition
+        return sql_store.select("clients", where, params, columns=columns)
+
+    with timed("load"):
+        clients = load_clients()
+    return (client for client in clients if condition(client))
+
+
+def count_clients(city):
+    """
+    Compte les clients d'une ville (insensible à la casse) sans les transférer.
+
+    Args:
+        city (str): Nom de la ville.
+
+    Returns:
+        int: Nombre de clients.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données des clients est introuvable.
+    """
+    condition = clients_filter(city)
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.count("clients", condition)
+    if DATA_BACKEND == SQLITE_BACKEND:
+        return sql_store.count("clients", *condition)
+    with timed("load"):
+        clients = load_clients()
+    with timed("filter"):
+        return sum(1 for client in clients if condition(client))
+
+
+def select_clients_page(city, limit=MAX_PAGE_SIZE, cursor=None, columns=None):
+    """
+    Sélectionne une page de clients d'une ville triés sur `CLIENT_KEY_COLUMNS`, à partir du curseur donné.
+
+    Comme pour les ventes, la page est sélectionnée par le backend SQLite ou Arrow (`clé > curseur ORDER BY clé
+    LIMIT limit + 1`) ; avec le backend JSON, les clients sont parcourus une seule fois (voir `paginate`).
+
+    Args:
+        city (str): Nom de la ville.
+        limit (int): Nombre maximal de clients dans la page. Par défaut, `MAX_PAGE_SIZE`.
+        cursor (str, optional): Curseur de la page précédente. Par défaut, None (première page).
+        columns (list, optional): Colonnes à lire avec un backend colonnaire ou SQL. Par défaut, toutes.
+
+    Returns:
+        tuple: Clients de la page, curseur de la page suivante (ou None) et nombre total de clients.
+
+    Raises:
+        ValueError: Si le curseur est mal formé.
+        FileNotFoundError: Si le jeu de données des clients est introuvable.
+    """
+    if DATA_BACKEND not in (ARROW_BACKEND, SQLITE_BACKEND):
+        return paginate(select_clients(city, columns), client_sort_key, limit, cursor)
+
+    after = decode_cursor(cursor, CLIENT_KEY_TYPES) if cursor else None
+    condition = clients_filter(city)
+    if DATA_BACKEND == ARROW_BACKEND:
+        if after is not None:
+            condition &= keyset_expression(CLIENT_KEY_COLUMNS, after)
+        rows = arrow_store.select("clients", condition, columns, order_by=CLIENT_KEY_COLUMNS, limit=limit + 1)
+    else:
+        where, params = condition
+        if after is not None:
+            clause, values = keyset_clause(CLIENT_KEY_COLUMNS, after)
+            where, params = f"{where} AND {clause}", params + values
+        rows = sql_store.select("clients", where, params, order_by=", ".join(CLIENT_KEY_COLUMNS), columns=columns,
+                                limit=limit + 1)
+
+    page, next_cursor = take_page(rows, client_sort_key, limit)
+    return page, next_cursor, count_clients(city)
+
+
 @router.get("", response_model=List[ClientResponse])
-async def get_clients(city: str):
+def get_clients(
+    request: Request,
+    response: Response,
+    city: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+):
     """
     Route GET pour récupérer la liste des clients dans une ville donnée.
 
+    Si `limit` est renseigné, les clients sont paginés par curseur (tri sur `id`) : le nombre total
+    de clients est renvoyé dans l'en-tête `X-Total-Count` et le curseur suivant dans `X-Next-Cursor`.
+
+    La réponse porte un ETag dérivé de la version du fichier et des paramètres : si le client le renvoie
+    dans `If-None-Match` et que rien n'a changé, la route répond `304 Not Modified`.
+
+    Avec `Accept: application/x-ndjson` ou `?stream=true`, les clients sont diffusés au format NDJSON
+    au fil du filtrage (un flux vide si aucun client ne correspond). Les en-têtes
+    `Accept: application/vnd.apache.arrow.stream` et `application/vnd.apache.parquet` renvoient
+    les clients au format colonnaire.
+
+    `fields` restreint les clients renvoyés aux champs listés (par exemple `?fields=id,age,loyalty_card`) ;
+    avec un backend colonnaire ou SQL, seules ces colonnes sont lues.
+
     Args:
+        request (Request): Requête entrante, utilisée pour la négociation du format et la revalidation.
+        response (Response): Réponse FastAPI, utilisée pour les en-têtes de pagination et l'ETag.
         city (str): Nom de la ville pour filtrer les clients.
+        limit (int, optional): Nombre maximal de clients par page. Par défaut, None (pas de pagination).
+        cursor (str, optional): Curseur renvoyé par la page précédente.
+        stream (bool): Si True, diffuse les clients au format NDJSON. Par défaut, False.
+        fields (str, optional): Champs à renvoyer, séparés par des virgules. Par défaut, tous.
 
     Returns:
         JSONResponse: Liste des clients correspondant à la ville, ou un message d'erreur si aucun client n'est trouvé.
     """
-    logger.info(f"GET /clients called with city={city}")
-    # Charger les données des clients
+    logger.info(f"GET /clients called with city={city}, limit={limit}")
+
+    # Vérifier les champs demandés
     try:
-        clients = load_clients()
+        projection = parse_fields(fields, ClientResponse)
+    except ValueError as e:
+        logger.error(f"Invalid fields received on /clients: {fields}")
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    # Revalidation de la copie du client (l'ETag dépend aussi de la ville, de la page et du format)
+    etag = make_etag("clients", request)
+    if is_not_modified(request, etag):
+        logger.info(f"Clients not modified since last request for city={city}")
+        return not_modified_response(etag)
+    set_etag_headers(response, etag)
+
+    # Charger les clients de la ville spécifiée (une seule page si `limit` est renseigné)
+    columns = backend_columns(projection, CLIENT_KEY_COLUMNS)
+    try:
+        if limit is not None:
+            filtered_clients, next_cursor, total = select_clients_page(city, limit, cursor, columns)
+        else:
+            clients = select_clients(city, columns=columns)
     except FileNotFoundError:
         logger.error("Error loading clients data.")
         return JSONResponse(
             content={"error": "Clients data file not found."},
             status_code=404,
         )
+    except ValueError:
+        logger.error(f"Invalid cursor received on /clients: {cursor}")
+        return JSONResponse(
+            content={"error": "Invalid cursor."},
+            status_code=400,
+        )
+
+    media_type = negotiate_format(request, stream)
 
-    # Filtrer les clients pour inclure uniquement ceux de la ville spécifiée (insensible à la casse)
-    filtered_clients = [
-        client for client in clients if client["city"].lower() == city.lower()
-    ]
+    if limit is None:
+        # Diffuser les clients au fil du filtrage, sans construire la liste complète
+        if media_type == NDJSON_MEDIA_TYPE:
+            logger.info(f"Streaming clients as NDJSON for city={city}")
+            return ndjson_response(project(clients, projection), headers=response.headers)
+
+        with timed("filter"):
+            filtered_clients = list(clients)
+        total = len(filtered_clients)
 
     # Si aucun client n'est trouvé pour la ville spécifiée
-    if not filtered_clients:
+    if not total:
         logger.warning(f"No clients found in city: {city}")
         return JSONResponse(
             content={"error": f"No clients found in city: {city}"},
@@ -76,5 +273,20 @@ async def get_clients(city: str):
         )
 
     logger.info(f"Clients retrieved successfully for city={city}")
+
+    # Ajouter les métadonnées de pagination si une taille de page est demandée
+    if limit is not None:
+        set_page_headers(response, total, next_cursor)
+
+    # Réduire les clients aux champs demandés
+    if projection is not None:
+        filtered_clients = list(project(filtered_clients, projection))
+
+    # Sérialiser dans le format négocié (NDJSON, Arrow ou Parquet)
+    if media_type != JSON_MEDIA_TYPE:
+        return format_response(
+            filtered_clients, media_type, ClientResponse, headers=response.headers, fields=projection
+        )
+
     # Retourner la liste des clients filtrés
-    return filtered_clients
+    return json_response(filtered_clients, headers=response.headers)
@@ -0,0 +1,83 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match) pour les routes des dimensions.
+
+L'ETag d'une réponse est dérivé de la version du jeu de données et des paramètres de la requête :
+tant que le fichier n'a pas changé, le client peut revalider sa copie et recevoir un `304 Not Modified`
+sans corps.
+"""
+
+import hashlib
+
+from fastapi.responses import Response
+
+from src.api.data_store import dataset_version
+
+
+def make_etag(name, request):
+    """
+    Calcule l'ETag fort d'une réponse construite à partir d'un jeu de données.
+
+    Args:
+        name (str): Nom du jeu de données.
+        request (Request): Requête entrante (paramètres et format demandés).
+
+    Returns:
+        str: ETag entre guillemets.
+        None: Si la version du jeu de données est inconnue (fichier introuvable).
+    """
+    version = dataset_version(name)
+    if version is None:
+        return None
+    key = f"{name}:{version}:{request.url.query}:{request.headers.get('accept', '')}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def is_not_modified(request, etag):
+    """
+    Indique si la copie du client, désignée par `If-None-Match`, est toujours à jour.
+
+    La comparaison est faible (RFC 9110) : un ETag reçu sous la forme `W/"..."`, par exemple après
+    compression de la réponse, correspond au même ETag fort.
+
+    Args:
+        request (Request): Requête entrante.
+        etag (str | None): ETag courant de la ressource.
+
+    Returns:
+        bool: True si la ressource n'a pas changé.
+    """
+    if etag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return etag in candidates
+
+
+def not_modified_response(etag):
+    """
+    Construit une réponse `304 Not Modified`.
+
+    Args:
+        etag (str): ETag courant de la ressource.
+
+    Returns:
+        Response: Réponse vide avec l'ETag.
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag_headers(response, etag):
+    """
+    Ajoute l'ETag et la politique de revalidation aux en-têtes de la réponse.
+
+    Args:
+        response (Response): Réponse FastAPI à compléter.
+        etag (str | None): ETag de la ressource.
+    """
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
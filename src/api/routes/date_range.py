@@ -0,0 +1,67 @@
+"""
+Plages de dates des routes de données (`start_date` / `end_date`).
+
+Une route peut être interrogée sur une seule date (`sale_date`, `date`) ou sur une plage inclusive
+`start_date`..`end_date`. Les deux formes sont ramenées à un couple `(début, fin)` ; une date seule
+est la plage `(date, date)`. L'une des deux formes est obligatoire : sans date ni `start_date`, les
+routes répondent 422, comme lorsque la date était un paramètre obligatoire.
+"""
+
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d"
+# Code HTTP renvoyé lorsqu'aucune date n'est fournie (celui de FastAPI pour un paramètre obligatoire absent)
+MISSING_DATE_STATUS = 422
+
+
+class MissingDateError(ValueError):
+    """Ni date ni `start_date` : la requête ne désigne aucune période."""
+
+
+def resolve_date_range(date=None, start_date=None, end_date=None):
+    """
+    Valide les paramètres de date d'une requête et retourne la plage correspondante.
+
+    Args:
+        date (str, optional): Date unique, au format 'YYYY-MM-DD'.
+        start_date (str, optional): Premier jour de la plage (inclus).
+        end_date (str, optional): Dernier jour de la plage (inclus).
+
+    Returns:
+        tuple: `(début, fin)` au format 'YYYY-MM-DD'.
+
+    Raises:
+        MissingDateError: Si ni la date ni `start_date` ne sont fournies.
+        ValueError: Si les paramètres sont combinés, incomplets, mal formés ou si la plage est inversée.
+    """
+    if date is not None and (start_date is not None or end_date is not None):
+        raise ValueError("Use either a single date or start_date/end_date, not both.")
+    if date is None and start_date is None:
+        raise MissingDateError("A date or both start_date and end_date are required.")
+    if date is not None:
+        start_date = end_date = date
+    elif end_date is None:
+        raise ValueError("A date or both start_date and end_date are required.")
+
+    try:
+        datetime.strptime(start_date, DATE_FORMAT)
+        datetime.strptime(end_date, DATE_FORMAT)
+    except ValueError:
+        raise ValueError("Date format is incorrect. Use 'YYYY-MM-DD'.")
+    if start_date > end_date:
+        raise ValueError("start_date must be before or equal to end_date.")
+    return start_date, end_date
+
+
+def describe_range(start_date, end_date):
+    """
+    Retourne une description lisible d'une plage de dates, pour les journaux et les messages d'erreur.
+
+    Args:
+        start_date (str): Premier jour de la plage.
+        end_date (str): Dernier jour de la plage.
+
+    Returns:
+        str: La date seule si la plage ne couvre qu'un jour, sinon 'début..fin'.
+    """
+    return start_date if start_date == end_date else f"{start_date}..{end_date}"
@@ -0,0 +1,163 @@
+"""
+Flux Server-Sent Events (SSE) alimentés par le journal des modifications.
+
+Chaque lot publié par le générateur (voir `src.api.change_log`) est poussé au client dès son écriture,
+sous la forme d'un événement SSE :
+
+    id: 12:7
+    event: sales
+    data: {"sequence": 12, "rows": [...]}
+
+L'identifiant d'événement concatène la dernière séquence envoyée de chaque jeu de données du flux. Un client
+qui se reconnecte le renvoie dans l'en-tête `Last-Event-ID` (ce que fait `EventSource` automatiquement) et
+reprend exactement après le dernier lot reçu.
+"""
+
+import os
+from collections import deque
+
+import orjson
+from anyio import sleep, to_thread
+
+from src.api import change_log
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Intervalle de scrutation du journal, intervalle des commentaires de maintien de la connexion (secondes)
+# et délai de reconnexion conseillé au client (millisecondes)
+POLL_INTERVAL = float(os.getenv("API_SSE_POLL_INTERVAL", "1.0"))
+HEARTBEAT_INTERVAL = float(os.getenv("API_SSE_HEARTBEAT_INTERVAL", "15"))
+RETRY_MS = int(os.getenv("API_SSE_RETRY_MS", "3000"))
+
+
+def format_event(data, event=None, event_id=None):
+    """
+    Sérialise un événement SSE.
+
+    Args:
+        data (dict): Contenu de l'événement, sérialisé en JSON sur une seule ligne.
+        event (str, optional): Type de l'événement. Par défaut, None (`message`).
+        event_id (str, optional): Identifiant de l'événement, renvoyé par le client à la reconnexion.
+
+    Returns:
+        bytes: Événement terminé par une ligne vide.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}".encode("utf-8"))
+    if event is not None:
+        lines.append(f"event: {event}".encode("utf-8"))
+    lines.append(b"data: " + orjson.dumps(data))
+    return b"\n".join(lines) + b"\n\n"
+
+
+def encode_event_id(names, sequences):
+    """
+    Construit l'identifiant d'événement à partir des séquences atteintes.
+
+    Args:
+        names (tuple): Jeux de données du flux, dans l'ordre.
+        sequences (dict): Dernière séquence envoyée par jeu de données.
+
+    Returns:
+        str: Séquences séparées par ':', par exemple '12:7'.
+    """
+    return ":".join(str(sequences[name]) for name in names)
+
+
+def parse_event_id(event_id, names):
+    """
+    Retrouve les séquences atteintes à partir d'un identifiant d'événement (`Last-Event-ID`).
+
+    Args:
+        event_id (str): Identifiant reçu du client.
+        names (tuple): Jeux de données du flux, dans l'ordre.
+
+    Returns:
+        dict: Dernière séquence reçue par jeu de données.
+
+    Raises:
+        ValueError: Si l'identifiant ne correspond pas aux jeux de données du flux.
+    """
+    parts = event_id.strip().split(":")
+    if len(parts) != len(names) or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid Last-Event-ID: {event_id}")
+    return {name: int(part) for name, part in zip(names, parts)}
+
+
+def latest_sequences(names):
+    """
+    Retourne la dernière séquence publiée de chaque jeu de données (point de départ d'un nouveau flux).
+
+    Args:
+        names (tuple): Jeux de données du flux.
+
+    Returns:
+        dict: Dernière séquence par jeu de données.
+    """
+    return {name: change_log.latest_sequence(name) for name in names}
+
+
+async def tail_changes(names, sequences, limit=None, poll_interval=None, heartbeat_interval=None):
+    """
+    Diffuse les lots publiés après les séquences données, puis ceux publiés ensuite, au fil de l'eau.
+
+    Un lot donne un événement. Le journal est scruté dans le pool de threads pour ne pas bloquer la boucle
+    d'événements ; un commentaire est envoyé régulièrement en l'absence de lot pour maintenir la connexion.
+    Le répertoire du journal n'est listé qu'une fois par jeu de données, au démarrage du flux (lots à rattraper
+    après une reconnexion) : les séquences étant attribuées une à une, chaque scrutation ne vérifie ensuite que
+    l'existence du lot suivant.
+
+    Args:
+        names (tuple): Jeux de données du flux, dans l'ordre de l'identifiant d'événement.
+        sequences (dict): Dernière séquence déjà reçue par le client, par jeu de données.
+        limit (int, optional): Nombre d'événements après lequel le flux se termine. Par défaut, None (sans fin).
+        poll_interval (float, optional): Intervalle de scrutation. Par défaut, `POLL_INTERVAL`.
+        heartbeat_interval (float, optional): Intervalle de maintien. Par défaut, `HEARTBEAT_INTERVAL`.
+
+    Yields:
+        bytes: Événements SSE et commentaires de maintien.
+    """
+    poll_interval = POLL_INTERVAL if poll_interval is None else poll_interval
+    heartbeat_interval = HEARTBEAT_INTERVAL if heartbeat_interval is None else heartbeat_interval
+    sequences = dict(sequences)
+    sent = 0
+    idle = 0.0
+    yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+
+    # Séquences publiées et pas encore envoyées, par jeu de données
+    pending = {}
+    for name in names:
+        listed = await to_thread.run_sync(change_log.list_sequences, name)
+        pending[name] = deque(sequence for sequence in listed if sequence > sequences[name])
+
+    while True:
+        for name in names:
+            while True:
+                if not pending[name]:
+                    next_sequence = sequences[name] + 1
+                    if not await to_thread.run_sync(change_log.has_batch, name, next_sequence):
+                        break
+                    pending[name].append(next_sequence)
+                # Un lot à la fois : chaque événement porte la séquence de son lot
+                sequence = pending[name].popleft()
+                rows = await to_thread.run_sync(change_log.read_batch, name, sequence)
+                sequences[name] = sequence
+                # Lot purgé entre-temps par la rétention du journal
+                if rows is None:
+                    continue
+                yield format_event(
+                    {"sequence": sequence, "rows": rows},
+                    event=name,
+                    event_id=encode_event_id(names, sequences),
+                )
+                sent += 1
+                idle = 0.0
+                if limit is not None and sent >= limit:
+                    return
+
+        await sleep(poll_interval)
+        idle += poll_interval
+        if idle >= heartbeat_interval:
+            idle = 0.0
+            yield b": keep-alive\n\n"
@@ -0,0 +1,57 @@
+from fastapi import APIRouter
+from fastapi.responses import FileResponse, JSONResponse
+from src.api import export_store, partition_store
+from src.api.metrics import timed
+from src.api.routes.date_range import resolve_date_range
+from src.api.routes.logger_routes import logger
+
+router = APIRouter()
+
+
+# Deux routes distinctes (et non `api_route`) : chaque méthode a son propre identifiant d'opération OpenAPI
+@router.get("/{dataset}/{date}.{fmt}")
+@router.head("/{dataset}/{date}.{fmt}")
+def get_export(dataset: str, date: str, fmt: str):
+    """
+    Route GET (et HEAD) servant l'export journalier d'un jeu de données, au format JSON Lines ou Parquet.
+
+    Le fichier pré-calculé est envoyé tel quel depuis le disque, sans sérialisation. Les requêtes `Range`
+    (éventuellement conditionnées par `If-Range`) renvoient `206 Partial Content` : un client peut reprendre
+    un téléchargement interrompu. `HEAD` renvoie la taille (`Content-Length`) et l'ETag sans le corps.
+
+    Args:
+        dataset (str): Jeu de données exporté (`sales` ou `retail_data`).
+        date (str): La date exportée, au format 'YYYY-MM-DD'.
+        fmt (str): Format du fichier (`jsonl` ou `parquet`).
+
+    Returns:
+        FileResponse: Fichier d'export de la journée.
+        JSONResponse: Erreur 400 si la date est invalide, 404 si le jeu de données, le format ou la journée
+        n'existent pas.
+    """
+    logger.info(f"GET /exports called with dataset={dataset}, date={date}, format={fmt}")
+
+    if dataset not in partition_store.PARTITION_KEYS:
+        logger.error(f"Unknown export dataset: {dataset}")
+        return JSONResponse(content={"error": f"Unknown dataset: {dataset}"}, status_code=404)
+    if fmt not in export_store.EXPORT_FORMATS:
+        logger.error(f"Unknown export format: {fmt}")
+        return JSONResponse(
+            content={"error": f"Unknown export format: {fmt}. Use {' or '.join(export_store.EXPORT_FORMATS)}."},
+            status_code=404,
+        )
+    try:
+        resolve_date_range(date)
+    except ValueError as e:
+        logger.error(f"Invalid date received on /exports: {date}")
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    # Régénérer l'export si les partitions de la date ont changé depuis sa création
+    with timed("load"):
+        path = export_store.ensure_export(dataset, date, fmt)
+    if path is None:
+        logger.warning(f"No {dataset} export available for {date}")
+        return JSONResponse(content={"error": f"No {dataset} data found on {date}"}, status_code=404)
+
+    logger.info(f"Serving {dataset} export for {date} from {path}")
+    return FileResponse(path, media_type=export_store.EXPORT_FORMATS[fmt], filename=f"{dataset}_{date}.{fmt}")
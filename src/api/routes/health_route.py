@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from src.api import arrow_store, sql_store
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND, dataset_version
+from src.api.routes.logger_routes import logger
+
+router = APIRouter()
+
+# Jeux de données dont la version est rapportée par `/health/ready`
+DATASETS = ("sales", "retail_data", "clients", "products", "stores")
+
+
+def loaded_versions():
+    """
+    Retourne la version de chaque jeu de données actuellement servie par le backend configuré.
+
+    Avec le backend JSON, les fichiers sont relus à chaque requête : la version servie est celle du fichier.
+    Avec les backends Arrow et SQLite, c'est celle du fichier JSON converti ou chargé (None si le jeu de
+    données n'a pas encore été chargé).
+
+    Returns:
+        dict: Versions par jeu de données.
+    """
+    versions = {name: dataset_version(name) for name in DATASETS}
+    if DATA_BACKEND == ARROW_BACKEND:
+        preloaded = arrow_store.loaded_versions()
+        versions.update({name: preloaded.get(name) for name in arrow_store.DATASETS})
+    elif DATA_BACKEND == SQLITE_BACKEND:
+        preloaded = sql_store.loaded_versions()
+        versions.update({name: preloaded.get(name) for name in sql_store.TABLES})
+    return versions
+
+
+@router.get("/ready")
+def get_ready(request: Request):
+    """
+    Route GET indiquant si l'api a terminé son démarrage et peut servir les requêtes de données.
+
+    L'api est prête une fois les jeux de données préchargés par le backend configuré (fichiers Arrow
+    mappés, tables SQLite chargées). La réponse indique, pour chaque jeu de données, la version
+    actuellement servie (`loaded`) et celle du fichier JSON (`current`) : elles diffèrent tant qu'une
+    nouvelle publication des générateurs n'a pas encore été rechargée.
+
+    Args:
+        request (Request): Requête entrante, donnant accès à l'état de l'application.
+
+    Returns:
+        dict: Statut, backend et versions des jeux de données si l'api est prête.
+        JSONResponse: 503 si le démarrage n'est pas terminé.
+    """
+    if not getattr(request.app.state, "ready", False):
+        logger.warning("GET /health/ready called before startup completed.")
+        return JSONResponse(content={"status": "starting"}, status_code=503)
+
+    loaded = loaded_versions()
+    datasets = {name: {"loaded": loaded[name], "current": dataset_version(name)} for name in DATASETS}
+    return {"status": "ready", "backend": DATA_BACKEND, "datasets": datasets}
@@ -0,0 +1,177 @@
+"""
+Pagination par curseur (keyset) pour les routes de l'api.
+
+Les lignes sont triées sur une clé stable (par exemple `(sale_time, sale_id, product_id)`),
+et le curseur transmis au client encode la clé de la dernière ligne renvoyée. La page suivante
+est la sélection `clé > curseur ORDER BY clé LIMIT n + 1` (pas de `OFFSET`) :
+- avec les backends SQLite et Arrow, elle est exécutée par le backend (`keyset_clause`,
+  `keyset_expression`) : seules les `n + 1` premières lignes sont triées et converties ;
+- avec le backend JSON, `paginate` parcourt les lignes une seule fois en ne gardant que les `n + 1`
+  plus petites clés, sans trier ni conserver l'ensemble filtré.
+"""
+
+import base64
+import binascii
+import heapq
+import json
+from operator import itemgetter
+
+import pyarrow.compute as pc
+
+# Taille maximale d'une page acceptée par les routes
+MAX_PAGE_SIZE = 10000
+
+# En-têtes HTTP portant les métadonnées de pagination
+TOTAL_COUNT_HEADER = "X-Total-Count"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key):
+    """
+    Encode une clé de tri en curseur opaque.
+
+    Args:
+        key (tuple): Clé de tri de la dernière ligne renvoyée.
+
+    Returns:
+        str: Curseur encodé en base64 (URL-safe, sans padding).
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, types=None):
+    """
+    Décode un curseur opaque en clé de tri.
+
+    Args:
+        cursor (str): Curseur reçu du client.
+        types (tuple, optional): Types attendus des colonnes de la clé, vérifiés avant de transmettre la clé
+            à un backend. Par défaut, None (pas de vérification).
+
+    Returns:
+        tuple: Clé de tri encodée dans le curseur.
+
+    Raises:
+        ValueError: Si le curseur est mal formé ou ne correspond pas aux types attendus.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(key, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if types is not None and (
+        len(key) != len(types)
+        or not all(isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(key, types))
+    ):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return tuple(key)
+
+
+def keyset_clause(columns, key):
+    """
+    Construit la condition SQL `clé > curseur` (comparaison de valeurs de ligne SQLite).
+
+    Args:
+        columns (tuple): Colonnes de la clé de tri.
+        key (tuple): Clé décodée du curseur.
+
+    Returns:
+        tuple: Condition paramétrée et ses paramètres.
+    """
+    placeholders = ", ".join("?" * len(columns))
+    return f"({', '.join(columns)}) > ({placeholders})", list(key)
+
+
+def keyset_expression(columns, key):
+    """
+    Construit le filtre Arrow `clé > curseur` (ordre lexicographique sur les colonnes de la clé).
+
+    Args:
+        columns (tuple): Colonnes de la clé de tri.
+        key (tuple): Clé décodée du curseur.
+
+    Returns:
+        pyarrow.compute.Expression: Filtre à combiner avec celui de la requête.
+    """
+    condition = pc.field(columns[-1]) > key[-1]
+    for column, value in zip(reversed(columns[:-1]), reversed(key[:-1])):
+        condition = (pc.field(column) > value) | ((pc.field(column) == value) & condition)
+    return condition
+
+
+def take_page(rows, sort_key, limit):
+    """
+    Découpe une page dans les lignes suivant le curseur, déjà triées et limitées à `limit + 1` lignes.
+
+    Args:
+        rows (list): Lignes triées sur la clé, au plus `limit + 1`.
+        sort_key (callable): Fonction retournant la clé de tri (tuple) d'une ligne.
+        limit (int): Nombre maximal de lignes dans la page.
+
+    Returns:
+        tuple: Contient deux éléments :
+            list: Lignes de la page.
+            str | None: Curseur de la page suivante, ou None s'il s'agit de la dernière page.
+    """
+    page = rows[:limit]
+    next_cursor = encode_cursor(sort_key(page[-1])) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def paginate(rows, sort_key, limit, cursor=None):
+    """
+    Retourne une page de lignes triées sur `sort_key`, à partir du curseur donné.
+
+    Les lignes sont parcourues une seule fois : seules les `limit + 1` plus petites clés suivant le curseur
+    sont conservées (tas borné), ce qui évite de trier et de garder en mémoire l'ensemble filtré.
+
+    Args:
+        rows (iterable): Lignes filtrées à paginer.
+        sort_key (callable): Fonction retournant la clé de tri (tuple) d'une ligne.
+        limit (int): Nombre maximal de lignes dans la page.
+        cursor (str, optional): Curseur de la page précédente. Par défaut, None (première page).
+
+    Returns:
+        tuple: Contient trois éléments :
+            list: Lignes de la page.
+            str | None: Curseur de la page suivante, ou None s'il s'agit de la dernière page.
+            int: Nombre total de lignes correspondant au filtre.
+
+    Raises:
+        ValueError: Si le curseur est mal formé ou incompatible avec la clé de tri.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    total = 0
+
+    def following():
+        nonlocal total
+        for row in rows:
+            total += 1
+            key = sort_key(row)
+            if after is None or key > after:
+                yield key, row
+
+    try:
+        smallest = heapq.nsmallest(limit + 1, following(), key=itemgetter(0))
+    except TypeError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    page, next_cursor = take_page([row for _, row in smallest], sort_key, limit)
+    return page, next_cursor, total
+
+
+def set_page_headers(response, total, next_cursor):
+    """
+    Ajoute les métadonnées de pagination (total et curseur suivant) aux en-têtes de la réponse.
+
+    Args:
+        response (Response): Réponse FastAPI à compléter.
+        total (int): Nombre total de lignes correspondant au filtre.
+        next_cursor (str | None): Curseur de la page suivante.
+    """
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -1,20 +1,19 @@
 import json
 from typing import List
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Request, Response
+from src import schemas
+from src.api.metrics import timed
+from src.api.routes.conditional import is_not_modified, make_etag, not_modified_response, set_etag_headers
 from src.api.routes.logger_routes import logger
+from src.api.routes.responses import json_response
+from src.api.schemas import pydantic_model
 
 router = APIRouter()
 
 
-# Modèle Pydantic pour la réponse des produits
-class ProductResponse(BaseModel):
-    id: str
-    name: str
-    category: str
-    price: float
-    cost: float
+# Modèle Pydantic de la réponse des produits, dérivé du schéma partagé avec l'extraction
+ProductResponse = pydantic_model(schemas.ProductResponse)
 
 
 # Charger les données des produits depuis le fichier JSON
@@ -40,28 +39,43 @@ def load_products():
 
 
 @router.get("", response_model=List[ProductResponse])
-async def get_products():
+def get_products(request: Request, response: Response):
     """
     Route GET pour récupérer la liste des produits depuis le fichier 'products.json'.
 
+    La réponse porte un ETag dérivé de la version du fichier : si le client renvoie cet ETag
+    dans `If-None-Match` et que le fichier n'a pas changé, la route répond `304 Not Modified`.
+
+    Args:
+        request (Request): Requête entrante, utilisée pour la revalidation.
+        response (Response): Réponse FastAPI, utilisée pour l'en-tête ETag.
+
     Returns:
         List[ProductResponse]: Liste des produits si le fichier est chargé avec succès.
         dict: Message d'erreur si le fichier 'products.json' est introuvable.
     """
     logger.info("GET /products called.")
 
+    # Revalidation de la copie du client
+    etag = make_etag("products", request)
+    if is_not_modified(request, etag):
+        logger.info("Products not modified since last request.")
+        return not_modified_response(etag)
+
     # Charger les données des produits
     try:
-        products = load_products()
+        with timed("load"):
+            products = load_products()
     except FileNotFoundError:
         logger.error("Error loading products data.")
-        return [{"error": "Products data file not found."}]
+        return json_response([{"error": "Products data file not found."}])
 
     if not products:  # si le fichier est vide
         logger.warning("No products found in products.json.")
-        return [{"error": "No products available."}]
+        return json_response([{"error": "No products available."}])
 
     logger.info(f"{len(products)} products retrieved successfully.")
+    set_etag_headers(response, etag)
 
-    # Retourner la liste des produits tels que définis dans le fichier JSON
-    return products
+    # Sérialiser les produits tels que définis dans le fichier JSON, sans validation Pydantic ligne par ligne
+    return json_response(products, headers=response.headers)
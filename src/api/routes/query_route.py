@@ -0,0 +1,323 @@
+"""
+Requêtes groupées (`POST /query/batch`).
+
+Un client qui envoie de nombreuses petites requêtes similaires (l'extracteur, des scripts ponctuels) peut les
+regrouper en un seul appel : chaque requête décrit une ressource et ses filtres, et les résultats sont renvoyés
+par identifiant de requête. Tous les jeux de données concernés sont chargés une seule fois pour le lot, et
+toutes les requêtes sont servies depuis ce même instantané :
+- backend JSON : chaque fichier (ou l'ensemble des partitions de dates demandées) est lu une seule fois ;
+- backend Arrow : chaque table est ouverte une seule fois et partagée par les requêtes ;
+- backend SQLite : les requêtes sont exécutées dans une même transaction de lecture.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from src.api import arrow_store, sql_store
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND, dataset_version
+from src.api.metrics import timed
+from src.api.routes import clients_route, products_route, retail_data_route, sales_route, stores_route
+from src.api.routes.date_range import resolve_date_range
+from src.api.routes.logger_routes import logger
+from src.api.routes.responses import json_response, parse_fields, project
+
+router = APIRouter()
+
+# Nombre maximal de requêtes dans un lot
+MAX_BATCH_QUERIES = 100
+
+# Jeux de données de référence, toujours lus depuis leur fichier JSON quel que soit le backend (chargeurs des
+# routes, résolus à l'appel)
+REFERENCE_LOADERS = {
+    "products": lambda: products_route.load_products(),
+    "stores": lambda: stores_route.load_stores(),
+}
+
+
+# Modèles Pydantic d'un lot de requêtes
+class BatchQuery(BaseModel):
+    id: str
+    resource: Literal["sales", "retail_data", "clients", "products", "stores"]
+    filters: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    queries: List[BatchQuery] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+# Filtres acceptés par ressource (mêmes paramètres que les routes GET correspondantes)
+class SalesFilters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    sale_date: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    store_ids: Optional[List[str]] = None
+    hour: Optional[int] = Field(None, ge=0, le=23)
+    fields: Optional[str] = None
+
+
+class RetailFilters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    date: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    store_id: Optional[str] = None
+    fields: Optional[str] = None
+
+
+class ClientFilters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    city: str
+    fields: Optional[str] = None
+
+
+class ReferenceFilters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    fields: Optional[str] = None
+
+
+FILTERS = {
+    "sales": SalesFilters,
+    "retail_data": RetailFilters,
+    "clients": ClientFilters,
+    "products": ReferenceFilters,
+    "stores": ReferenceFilters,
+}
+
+ROW_MODELS = {
+    "sales": sales_route.SaleDataResponse,
+    "retail_data": retail_data_route.RetailResponse,
+    "clients": clients_route.ClientResponse,
+    "products": products_route.ProductResponse,
+    "stores": stores_route.StoreDataResponse,
+}
+
+
+def plan_query(query):
+    """
+    Valide les filtres d'une requête du lot et prépare sa sélection.
+
+    Args:
+        query (BatchQuery): Requête du lot.
+
+    Returns:
+        dict: `dataset`, `condition` (filtre dans la forme du backend configuré, None pour les jeux de données
+        de référence), `date_range` et `store_ids` (périmètre à charger) et `fields` (projection).
+
+    Raises:
+        ValueError: Si les filtres sont inconnus, mal formés ou incohérents.
+    """
+    try:
+        filters = FILTERS[query.resource].model_validate(query.filters)
+    except ValidationError as e:
+        details = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        raise ValueError(f"Invalid filters: {details}")
+    plan = {
+        "dataset": query.resource,
+        "condition": None,
+        "date_range": None,
+        "store_ids": None,
+        "fields": parse_fields(filters.fields, ROW_MODELS[query.resource]),
+    }
+
+    if query.resource == "sales":
+        start, end = resolve_date_range(filters.sale_date, filters.start_date, filters.end_date)
+        plan["condition"] = sales_route.sales_filter(start, filters.store_ids, filters.hour, end)
+        plan["date_range"], plan["store_ids"] = (start, end), filters.store_ids
+    elif query.resource == "retail_data":
+        start, end = resolve_date_range(filters.date, filters.start_date, filters.end_date)
+        plan["condition"] = retail_data_route.retail_filter(start, filters.store_id, end)
+        plan["date_range"] = (start, end)
+        plan["store_ids"] = None if filters.store_id is None else [filters.store_id]
+    elif query.resource == "clients":
+        plan["condition"] = clients_route.clients_filter(filters.city)
+    return plan
+
+
+def _bounds(plans):
+    # Périmètre commun des requêtes d'un jeu de données daté : plage couvrant toutes les dates demandées
+    # et union des magasins (None dès qu'une requête porte sur tous les magasins)
+    start = min(plan["date_range"][0] for plan in plans)
+    end = max(plan["date_range"][1] for plan in plans)
+    if any(plan["store_ids"] is None for plan in plans):
+        return start, end, None
+    return start, end, sorted({store_id for plan in plans for store_id in plan["store_ids"]})
+
+
+class BatchSnapshot:
+    """
+    Instantané des données servant toutes les requêtes d'un lot : chaque jeu de données est chargé au plus une
+    fois, au premier accès, puis partagé.
+
+    Args:
+        plans (list): Requêtes préparées par `plan_query`.
+    """
+
+    def __init__(self, plans):
+        self.plans = plans
+        self.versions = {}
+        self.missing = set()
+        self._rows = {}
+        self._tables = {}
+
+    def datasets(self):
+        """
+        Retourne les jeux de données interrogés par le lot.
+
+        Returns:
+            list: Noms des jeux de données, dans l'ordre de leur première requête.
+        """
+        return list(dict.fromkeys(plan["dataset"] for plan in self.plans))
+
+    @contextmanager
+    def open(self):
+        """
+        Ouvre l'instantané. Avec le backend SQLite, les tables sont synchronisées puis lues dans une même
+        transaction de lecture.
+
+        Yields:
+            BatchSnapshot: L'instantané ouvert.
+        """
+        if DATA_BACKEND != SQLITE_BACKEND:
+            yield self
+            return
+
+        tables = [name for name in self.datasets() if name in sql_store.TABLES]
+        for name in tables:
+            try:
+                with timed("load"):
+                    sql_store.sync_from_json(name)
+            except FileNotFoundError:
+                self.missing.add(name)
+        with sql_store.snapshot() as conn:
+            self.versions.update(
+                {name: version for name, version in sql_store.loaded_versions(conn).items() if name in tables}
+            )
+            yield self
+
+    def _load_rows(self, dataset):
+        # Lignes d'un jeu de données lu depuis ses fichiers JSON, chargées une seule fois pour le lot
+        if dataset not in self._rows:
+            plans = [plan for plan in self.plans if plan["dataset"] == dataset]
+            with timed("load"):
+                if dataset in REFERENCE_LOADERS:
+                    rows = REFERENCE_LOADERS[dataset]()
+                elif dataset == "sales":
+                    start, end, store_ids = _bounds(plans)
+                    rows = list(sales_route.load_sales_partitions(start, store_ids, end))
+                elif dataset == "retail_data":
+                    start, end, store_ids = _bounds(plans)
+                    # Un seul magasin peut être lu dans les partitions : sinon, tous les magasins
+                    store_id = store_ids[0] if store_ids is not None and len(store_ids) == 1 else None
+                    rows = list(retail_data_route.load_retail_data_partitions(start, store_id, end))
+                else:
+                    rows = clients_route.load_clients()
+            self._rows[dataset] = rows
+            self.versions[dataset] = dataset_version(dataset)
+        return self._rows[dataset]
+
+    def _open_table(self, dataset):
+        # Table Arrow ouverte une seule fois pour le lot : toutes les requêtes lisent la même version
+        if dataset not in self._tables:
+            with timed("load"):
+                self._tables[dataset] = arrow_store.open_table(dataset)
+            self.versions[dataset] = arrow_store.loaded_versions().get(dataset)
+        return self._tables[dataset]
+
+    def select(self, plan):
+        """
+        Exécute une requête préparée sur l'instantané.
+
+        Args:
+            plan (dict): Requête préparée par `plan_query`.
+
+        Returns:
+            list: Lignes sélectionnées, réduites aux champs demandés.
+
+        Raises:
+            FileNotFoundError: Si le jeu de données de la requête est introuvable.
+        """
+        dataset, condition, fields = plan["dataset"], plan["condition"], plan["fields"]
+        if dataset in self.missing:
+            raise FileNotFoundError(dataset)
+
+        if dataset in REFERENCE_LOADERS or DATA_BACKEND not in (ARROW_BACKEND, SQLITE_BACKEND):
+            rows = self._load_rows(dataset)
+            with timed("filter"):
+                if condition is not None:
+                    rows = [row for row in rows if condition(row)]
+                return list(project(rows, fields))
+
+        if DATA_BACKEND == ARROW_BACKEND:
+            try:
+                table = self._open_table(dataset)
+            except FileNotFoundError:
+                self.missing.add(dataset)
+                raise
+            rows = arrow_store.select_table(dataset, table, condition, fields, plan["date_range"])
+            return list(project(rows, fields))
+
+        where, params = condition
+        return list(project(sql_store.select(dataset, where, params, columns=fields, sync=False), fields))
+
+
+@router.post("/batch")
+def post_query_batch(batch: BatchRequest):
+    """
+    Route POST exécutant un lot de requêtes sur un même instantané des données.
+
+    Chaque requête porte un identifiant, une ressource (`sales`, `retail_data`, `clients`, `products`, `stores`)
+    et les filtres de la route GET correspondante, par exemple :
+
+        {"queries": [
+            {"id": "s1", "resource": "sales", "filters": {"sale_date": "2024-12-14", "store_ids": ["store_1"]}},
+            {"id": "r1", "resource": "retail_data", "filters": {"start_date": "2024-12-13", "end_date": "2024-12-14"}}
+        ]}
+
+    Une requête invalide ne fait pas échouer le lot : son résultat contient alors un message d'erreur.
+
+    Args:
+        batch (BatchRequest): Lot de requêtes.
+
+    Returns:
+        Response: `versions` (version de chaque jeu de données de l'instantané) et `results`
+        (`{"count", "rows"}` ou `{"error"}` par identifiant de requête, dans l'ordre du lot).
+        JSONResponse: Erreur 400 si des identifiants de requête sont dupliqués.
+    """
+    ids = [query.id for query in batch.queries]
+    duplicates = sorted({query_id for query_id in ids if ids.count(query_id) > 1})
+    if duplicates:
+        logger.error(f"Duplicate query ids received on /query/batch: {duplicates}")
+        return JSONResponse(content={"error": f"Duplicate query ids: {', '.join(duplicates)}"}, status_code=400)
+    logger.info(f"POST /query/batch called with {len(batch.queries)} queries")
+
+    # Valider et préparer chaque requête (une requête invalide n'empêche pas les autres)
+    results, plans = {}, {}
+    for query in batch.queries:
+        try:
+            plans[query.id] = plan_query(query)
+        except ValueError as e:
+            logger.warning(f"Invalid query {query.id} on /query/batch: {e}")
+            results[query.id] = {"error": str(e)}
+
+    # Servir toutes les requêtes depuis le même instantané
+    snapshot = BatchSnapshot(list(plans.values()))
+    with snapshot.open():
+        for query_id, plan in plans.items():
+            try:
+                rows = snapshot.select(plan)
+            except FileNotFoundError:
+                logger.error(f"Dataset {plan['dataset']} not found for query {query_id} on /query/batch")
+                results[query_id] = {"error": f"Dataset not found: {plan['dataset']}"}
+                continue
+            results[query_id] = {"count": len(rows), "rows": rows}
+
+    logger.info(f"Answered {len(plans)} queries on datasets {snapshot.datasets()} from one snapshot")
+    return json_response({"versions": snapshot.versions, "results": {query_id: results[query_id] for query_id in ids}})
@@ -0,0 +1,232 @@
+"""
+Formats de réponse alternatifs pour les routes de données de l'api.
+
+Le format est choisi par négociation de contenu (en-tête `Accept`) ou par un paramètre de requête :
+- `application/x-ndjson` (ou `?stream=true`) : un objet JSON par ligne, diffusé en flux ;
+- `application/vnd.apache.arrow.stream` : flux Arrow IPC ;
+- `application/vnd.apache.parquet` : fichier Parquet ;
+- à défaut, la liste JSON habituelle.
+
+Le paramètre `fields` restreint les lignes servies aux champs demandés (projection), quel que soit le format.
+
+Les lignes servies proviennent des fichiers produits par les générateurs : elles sont déjà conformes
+aux modèles Pydantic des routes. Elles sont donc sérialisées directement par l'encodeur JSON de msgspec
+(la bibliothèque du schéma partagé `src.schemas`), sans repasser par la validation ligne par ligne de
+FastAPI ; le `response_model` des routes reste déclaré pour le schéma OpenAPI.
+"""
+
+import io
+import typing
+
+import msgspec
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import Response, StreamingResponse
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Encodeur JSON partagé par les réponses (sans état entre deux appels, utilisable depuis plusieurs threads)
+_json_encoder = msgspec.json.Encoder()
+
+# Correspondance entre les types des modèles Pydantic et les types Arrow
+ARROW_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+}
+
+
+def negotiate_format(request, stream=False):
+    """
+    Détermine le format de réponse demandé par le client.
+
+    Args:
+        request (Request): Requête entrante.
+        stream (bool): Valeur du paramètre `?stream=true`. Par défaut, False.
+
+    Returns:
+        str: Type MIME du format retenu.
+    """
+    if stream:
+        return NDJSON_MEDIA_TYPE
+    accept = request.headers.get("accept", "")
+    for media_type in (ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, NDJSON_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def parse_fields(fields, model):
+    """
+    Analyse le paramètre de projection `fields` (noms de champs séparés par des virgules).
+
+    Args:
+        fields (str | None): Valeur du paramètre, par exemple 'sale_date,store_id,quantity'.
+        model (type[BaseModel]): Modèle Pydantic décrivant une ligne.
+
+    Returns:
+        list: Champs demandés, dans l'ordre et sans doublon.
+        None: Si aucune projection n'est demandée.
+
+    Raises:
+        ValueError: Si un champ n'existe pas dans le modèle.
+    """
+    if not fields:
+        return None
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
+
+
+def backend_columns(fields, key_columns):
+    """
+    Retourne les colonnes à lire dans le backend pour servir une projection.
+
+    Les colonnes de la clé de tri sont ajoutées à la projection : la pagination en a besoin avant
+    que les lignes ne soient réduites aux champs demandés.
+
+    Args:
+        fields (list | None): Champs demandés par `parse_fields`.
+        key_columns (tuple): Colonnes de la clé de tri de la route.
+
+    Returns:
+        list: Colonnes à lire.
+        None: Si toutes les colonnes sont nécessaires.
+    """
+    if fields is None:
+        return None
+    return fields + [column for column in key_columns if column not in fields]
+
+
+def project(rows, fields):
+    """
+    Réduit chaque ligne aux champs demandés, au fil de l'eau.
+
+    Args:
+        rows (iterable): Lignes à réduire.
+        fields (list | None): Champs à conserver.
+
+    Returns:
+        iterable: `rows` inchangé si `fields` est None, sinon un générateur de lignes réduites.
+    """
+    if fields is None:
+        return rows
+    return ({name: row[name] for name in fields} for row in rows)
+
+
+def arrow_schema(model, fields=None):
+    """
+    Construit le schéma Arrow correspondant à un modèle Pydantic de réponse.
+
+    Args:
+        model (type[BaseModel]): Modèle Pydantic décrivant une ligne.
+        fields (list, optional): Champs à conserver, dans cet ordre. Par défaut, tous les champs du modèle.
+
+    Returns:
+        pa.Schema: Schéma Arrow avec un champ par attribut retenu.
+    """
+    fields = fields or list(model.model_fields)
+    schema_fields = []
+    for name in fields:
+        field = model.model_fields[name]
+        annotation = field.annotation
+        # Optional[X] est représenté par Union[X, None]
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+            annotation = args[0]
+        schema_fields.append(pa.field(name, ARROW_TYPES[annotation]))
+    return pa.schema(schema_fields)
+
+
+def json_response(rows, headers=None):
+    """
+    Sérialise une liste de lignes en JSON avec msgspec, sans validation Pydantic ligne par ligne.
+
+    Args:
+        rows (list): Lignes à sérialiser.
+        headers (Mapping, optional): En-têtes supplémentaires (pagination par exemple).
+
+    Returns:
+        Response: Réponse JSON.
+    """
+    return Response(content=_json_encoder.encode(rows), media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def iter_ndjson(rows):
+    """
+    Sérialise les lignes une à une au format NDJSON (un objet JSON par ligne).
+
+    Args:
+        rows (iterable): Lignes à sérialiser, consommées au fil de l'eau.
+
+    Yields:
+        bytes: Ligne JSON terminée par un saut de ligne.
+    """
+    for row in rows:
+        yield _json_encoder.encode(row) + b"\n"
+
+
+def ndjson_response(rows, headers=None):
+    """
+    Construit une réponse NDJSON diffusée ligne par ligne.
+
+    Les lignes sont sérialisées au fur et à mesure qu'elles sont produites : si `rows` est un
+    générateur qui filtre la source de données, ni la liste filtrée ni le document JSON complet
+    ne sont construits en mémoire.
+
+    Args:
+        rows (iterable): Lignes à diffuser.
+        headers (Mapping, optional): En-têtes supplémentaires (pagination par exemple).
+
+    Returns:
+        StreamingResponse: Réponse diffusée de type `application/x-ndjson`.
+    """
+    return StreamingResponse(iter_ndjson(rows), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def columnar_response(rows, media_type, schema, headers=None):
+    """
+    Construit une réponse colonnaire (flux Arrow IPC ou fichier Parquet).
+
+    Args:
+        rows (list): Lignes à sérialiser.
+        media_type (str): `ARROW_STREAM_MEDIA_TYPE` ou `PARQUET_MEDIA_TYPE`.
+        schema (pa.Schema): Schéma Arrow des lignes.
+        headers (Mapping, optional): En-têtes supplémentaires (pagination par exemple).
+
+    Returns:
+        Response: Réponse binaire au format demandé.
+    """
+    table = pa.Table.from_pylist(rows, schema=schema)
+    sink = io.BytesIO()
+    if media_type == PARQUET_MEDIA_TYPE:
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return Response(content=sink.getvalue(), media_type=media_type, headers=headers)
+
+
+def format_response(rows, media_type, model, headers=None, fields=None):
+    """
+    Sérialise les lignes dans le format négocié, hors JSON classique.
+
+    Args:
+        rows (iterable): Lignes à sérialiser.
+        media_type (str): Type MIME retenu par `negotiate_format`.
+        model (type[BaseModel]): Modèle Pydantic décrivant une ligne (pour le schéma colonnaire).
+        headers (Mapping, optional): En-têtes supplémentaires.
+        fields (list, optional): Champs projetés (pour le schéma colonnaire). Par défaut, tous.
+
+    Returns:
+        Response: Réponse au format demandé.
+    """
+    if media_type == NDJSON_MEDIA_TYPE:
+        return ndjson_response(rows, headers=headers)
+    return columnar_response(list(rows), media_type, arrow_schema(model, fields), headers=headers)
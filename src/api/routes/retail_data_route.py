@@ -2,29 +2,84 @@ import json
 from datetime import datetime
 from typing import List, Optional, Union
 
-from fastapi import APIRouter
+import pyarrow.compute as pc
+from fastapi import APIRouter, Query, Request, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from src import schemas
+from src.api import arrow_store, change_log, partition_store, sql_store
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND
+from src.api.metrics import timed
+from src.api.routes.aggregation import SUM, aggregate_rows
+from src.api.routes.date_range import MISSING_DATE_STATUS, MissingDateError, describe_range, resolve_date_range
 from src.api.routes.logger_routes import logger
+from src.api.routes.pagination import (MAX_PAGE_SIZE, decode_cursor, keyset_clause, keyset_expression, paginate,
+                                       set_page_headers, take_page)
+from src.api.routes.responses import (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, backend_columns, format_response,
+                                      json_response, ndjson_response, negotiate_format, parse_fields,
+                                      project)
+from src.api.schemas import pydantic_model
 
 router = APIRouter()
 
 
-# Modèle Pydantic pour la réponse des visiteurs
-class RetailResponse(BaseModel):
+# Modèle Pydantic de la réponse des visiteurs, dérivé du schéma partagé avec l'extraction
+RetailResponse = pydantic_model(schemas.RetailResponse)
+
+
+class ErrorResponse(BaseModel):
+    error: str
+
+
+RetailDataResponse = Union[RetailResponse, ErrorResponse]
+
+
+# Modèles Pydantic pour la synthèse des données retail
+class RetailSummaryResponse(BaseModel):
     store_id: str
-    store_name: str
     date: str
-    hour: int
+    hour: Optional[int] = None
     visitors: Optional[int]
     sales: Optional[int]
 
 
-class ErrorResponse(BaseModel):
-    error: str
+class CountResponse(BaseModel):
+    count: int
 
 
-RetailDataResponse = Union[RetailResponse, ErrorResponse]
+RetailSummary = Union[RetailSummaryResponse, ErrorResponse]
+
+
+# Modèle Pydantic pour le journal des modifications des données retail
+class RetailChangesResponse(BaseModel):
+    since: int
+    sequence: int
+    has_more: bool
+    rows: List[RetailResponse]
+
+
+# Colonnes de la clé de tri utilisée par la pagination, et leurs types (vérification des curseurs)
+RETAIL_KEY_COLUMNS = ("date", "store_id", "hour")
+RETAIL_KEY_TYPES = (str, str, int)
+
+# Mesures de la synthèse des données retail : visiteurs et ventes cumulés
+RETAIL_MEASURES = [
+    ("visitors", SUM, "visitors"),
+    ("sales", SUM, "sales"),
+]
+
+
+def retail_sort_key(entry):
+    """
+    Clé de tri stable d'une ligne retail, utilisée pour la pagination par curseur.
+
+    Args:
+        entry (dict): Ligne de données retail.
+
+    Returns:
+        tuple: Clé `(date, store_id, hour)`.
+    """
+    return entry["date"], entry["store_id"], entry["hour"]
 
 
 # Charger les données des visiteurs depuis le fichier JSON retail_data
@@ -49,64 +104,325 @@ def load_retail_data():
         return []
 
 
+def load_retail_data_partitions(date, store_id=None, end_date=None):
+    """
+    Charge les données retail d'une date (ou d'une plage de dates) pour le backend JSON : seules les
+    partitions des dates et du magasin demandés sont lues si les données sont partitionnées, sinon le
+    fichier 'retail_data.json' complet.
+
+    Args:
+        date (str): La date des données (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_id (str, optional): L'identifiant du magasin. Par défaut, None (tous les magasins).
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        iterable: Lignes retail à filtrer, par date croissante si elles sont partitionnées.
+    """
+    if partition_store.is_partitioned("retail_data"):
+        store_ids = None if store_id is None else [store_id]
+        if end_date is None or end_date == date:
+            return partition_store.read_partitions("retail_data", date, store_ids)
+        return partition_store.read_range("retail_data", date, end_date, store_ids)
+    return load_retail_data()
+
+
+def retail_filter(date, store_id=None, end_date=None):
+    """
+    Construit le filtre des données retail dans la forme attendue par le backend de données configuré.
+
+    Args:
+        date (str): La date des données (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_id (str, optional): L'identifiant du magasin. Par défaut, None (tous les magasins).
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        pyarrow.compute.Expression: Avec le backend Arrow.
+        tuple: Clause WHERE paramétrée et ses paramètres, avec le backend SQLite.
+        callable: Prédicat sur une ligne, avec le backend JSON.
+    """
+    end_date = end_date or date
+    if DATA_BACKEND == ARROW_BACKEND:
+        if end_date == date:
+            condition = pc.field("date") == date
+        else:
+            condition = (pc.field("date") >= date) & (pc.field("date") <= end_date)
+        if store_id is not None:
+            condition &= pc.field("store_id") == store_id
+        return condition
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        if end_date == date:
+            where, params = "date = ?", [date]
+        else:
+            where, params = "date BETWEEN ? AND ?", [date, end_date]
+        if store_id is None:
+            return where, params
+        return f"{where} AND store_id = ?", params + [store_id]
+
+    return lambda entry: date <= entry["date"] <= end_date and (store_id is None or entry["store_id"] == store_id)
+
+
+def select_retail_data(date, store_id=None, columns=None, end_date=None):
+    """
+    Sélectionne les données retail d'une date (ou d'une plage de dates) depuis le backend de données configuré.
+
+    Comme pour les ventes, une plage est lue en un seul parcours de l'index des dates du backend.
+
+    Args:
+        date (str): La date des données (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_id (str, optional): L'identifiant du magasin. Par défaut, None (tous les magasins).
+        columns (list, optional): Colonnes à lire avec un backend colonnaire ou SQL. Par défaut, toutes.
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        iterable: Lignes correspondantes, par date croissante pour une plage (générateur avec le backend JSON,
+        sauf plage lue dans le fichier 'retail_data.json' complet, liste avec le backend Arrow).
+
+    Raises:
+        FileNotFoundError: Si le jeu de données retail est introuvable.
+    """
+    condition = retail_filter(date, store_id, end_date)
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.select("retail_data", condition, columns, date_range=(date, end_date or date))
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        where, params = condition
+        order_by = "date" if end_date not in (None, date) else None
+        return sql_store.select("retail_data", where, params, order_by=order_by, columns=columns)
+
+    with timed("load"):
+        retail_data = load_retail_data_partitions(date, store_id, end_date)
+    selected = (entry for entry in retail_data if condition(entry))
+    # Les partitions sont lues date par date, mais le fichier 'retail_data.json' complet n'est pas trié par date
+    if end_date not in (None, date) and not partition_store.is_partitioned("retail_data"):
+        with timed("filter"):
+            return sorted(selected, key=lambda entry: entry["date"])
+    return selected
+
+
+def select_retail_data_page(date, limit=MAX_PAGE_SIZE, cursor=None, columns=None, end_date=None):
+    """
+    Sélectionne une page de données retail triées sur `RETAIL_KEY_COLUMNS`, à partir du curseur donné.
+
+    Comme pour les ventes, la page est sélectionnée par le backend SQLite ou Arrow (`clé > curseur ORDER BY clé
+    LIMIT limit + 1`) ; avec le backend JSON, les lignes sont parcourues une seule fois (voir `paginate`).
+
+    Args:
+        date (str): La date des données (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        limit (int): Nombre maximal de lignes dans la page. Par défaut, `MAX_PAGE_SIZE`.
+        cursor (str, optional): Curseur de la page précédente. Par défaut, None (première page).
+        columns (list, optional): Colonnes à lire avec un backend colonnaire ou SQL. Par défaut, toutes.
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        tuple: Lignes de la page, curseur de la page suivante (ou None) et nombre total de lignes.
+
+    Raises:
+        ValueError: Si le curseur est mal formé.
+        FileNotFoundError: Si le jeu de données retail est introuvable.
+    """
+    if DATA_BACKEND not in (ARROW_BACKEND, SQLITE_BACKEND):
+        return paginate(select_retail_data(date, columns=columns, end_date=end_date), retail_sort_key, limit, cursor)
+
+    after = decode_cursor(cursor, RETAIL_KEY_TYPES) if cursor else None
+    condition = retail_filter(date, end_date=end_date)
+    if DATA_BACKEND == ARROW_BACKEND:
+        if after is not None:
+            condition &= keyset_expression(RETAIL_KEY_COLUMNS, after)
+        rows = arrow_store.select("retail_data", condition, columns, date_range=(date, end_date or date),
+                                  order_by=RETAIL_KEY_COLUMNS, limit=limit + 1)
+    else:
+        where, params = condition
+        if after is not None:
+            clause, values = keyset_clause(RETAIL_KEY_COLUMNS, after)
+            where, params = f"{where} AND {clause}", params + values
+        rows = sql_store.select("retail_data", where, params, order_by=", ".join(RETAIL_KEY_COLUMNS),
+                                columns=columns, limit=limit + 1)
+
+    page, next_cursor = take_page(rows, retail_sort_key, limit)
+    return page, next_cursor, count_retail_data(date, end_date=end_date)
+
+
+def summarize_retail_data(date, store_id=None, by_hour=False):
+    """
+    Calcule les totaux de fréquentation et de ventes par magasin et par jour (et par heure si demandé).
+
+    Args:
+        date (str): La date des données, au format 'YYYY-MM-DD'.
+        store_id (str, optional): L'identifiant du magasin. Par défaut, None (tous les magasins).
+        by_hour (bool): Si True, ajoute l'heure aux clés de regroupement. Par défaut, False.
+
+    Returns:
+        list: Une ligne par groupe avec `visitors` et `sales`.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données retail est introuvable.
+    """
+    keys = ["store_id", "date"] + (["hour"] if by_hour else [])
+    condition = retail_filter(date, store_id)
+
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.aggregate("retail_data", condition, keys, RETAIL_MEASURES)
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        where, params = condition
+        return sql_store.aggregate("retail_data", keys, RETAIL_MEASURES, where, params)
+
+    with timed("load"):
+        retail_data = load_retail_data_partitions(date, store_id)
+    with timed("filter"):
+        return aggregate_rows((entry for entry in retail_data if condition(entry)), keys, RETAIL_MEASURES)
+
+
+def count_retail_data(date, store_id=None, end_date=None):
+    """
+    Compte les lignes retail d'une date (ou d'une plage de dates) sans les transférer.
+
+    Args:
+        date (str): La date des données (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_id (str, optional): L'identifiant du magasin. Par défaut, None (tous les magasins).
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        int: Nombre de lignes.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données retail est introuvable.
+    """
+    condition = retail_filter(date, store_id, end_date)
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.count("retail_data", condition)
+    if DATA_BACKEND == SQLITE_BACKEND:
+        return sql_store.count("retail_data", *condition)
+    with timed("load"):
+        retail_data = load_retail_data_partitions(date, store_id, end_date)
+    with timed("filter"):
+        return sum(1 for entry in retail_data if condition(entry))
+
+
 @router.get("", response_model=List[RetailDataResponse])
-async def get_visitors(date: str):
+def get_visitors(
+    request: Request,
+    response: Response,
+    date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+):
     """
-    Route GET pour récupérer les données retail d'une date spécifique.
+    Route GET pour récupérer les données retail d'une date spécifique ou d'une plage de dates.
+
+    La plage `start_date`..`end_date` (bornes incluses) remplace `date` ; elle est lue en un seul
+    parcours de l'index des dates du backend et se combine avec la pagination. `date` ou `start_date` est
+    obligatoire : sans l'un ni l'autre, la route répond 422.
+
+    Si `limit` est renseigné, les données sont paginées par curseur (tri sur `date`, `store_id`, `hour`) :
+    le nombre total de lignes est renvoyé dans l'en-tête `X-Total-Count` et le curseur suivant
+    dans `X-Next-Cursor`.
+
+    Avec `Accept: application/x-ndjson` ou `?stream=true`, les lignes sont diffusées au format NDJSON
+    au fil du filtrage. Les en-têtes `Accept: application/vnd.apache.arrow.stream` et
+    `application/vnd.apache.parquet` renvoient les lignes au format colonnaire.
+
+    `fields` restreint les lignes renvoyées aux champs listés (par exemple `?fields=store_id,hour,visitors`) ;
+    avec un backend colonnaire ou SQL, seules ces colonnes sont lues.
 
     Args:
-        date (str): La date pour laquelle récupérer les données, au format 'YYYY-MM-DD'.
+        request (Request): Requête entrante, utilisée pour la négociation du format.
+        response (Response): Réponse FastAPI, utilisée pour les en-têtes de pagination.
+        date (str, optional): La date pour laquelle récupérer les données, au format 'YYYY-MM-DD'.
+        start_date (str, optional): Premier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        end_date (str, optional): Dernier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        limit (int, optional): Nombre maximal de lignes par page. Par défaut, None (pas de pagination).
+        cursor (str, optional): Curseur renvoyé par la page précédente.
+        stream (bool): Si True, diffuse les lignes au format NDJSON. Par défaut, False.
+        fields (str, optional): Champs à renvoyer, séparés par des virgules. Par défaut, tous.
 
     Returns:
-        List[RetailDataResponse]: Liste des données retail pour la date donnée.
-        JSONResponse: Erreur si la date est invalide ou si les données ne sont pas disponibles.
+        List[RetailDataResponse]: Liste des données retail pour la date (ou la plage) donnée.
+        JSONResponse: Erreur si la date est absente (422) ou invalide (400), ou si les données ne sont pas
+        disponibles.
     """
-    logger.info(f"GET /retail_data called with date={date}")
+    logger.info(
+        f"GET /retail_data called with date={date}, start_date={start_date}, end_date={end_date}, limit={limit}"
+    )
 
-    # Vérifier si la date est valide
+    # Vérifier la date ou la plage de dates demandée
     try:
-        datetime.strptime(date, "%Y-%m-%d")
-    except ValueError:
-        logger.error(f"Invalid date format: {date}. Expected 'YYYY-MM-DD'.")
-        return JSONResponse(
-            content={"error": "Date format is incorrect. Use 'YYYY-MM-DD'."},
-            status_code=400,
-        )
+        start, end = resolve_date_range(date, start_date, end_date)
+    except MissingDateError as e:
+        logger.error("No date received on /retail_data")
+        return JSONResponse(content={"error": str(e)}, status_code=MISSING_DATE_STATUS)
+    except ValueError as e:
+        logger.error(f"Invalid date range received on /retail_data: {e}")
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    period = describe_range(start, end)
 
-    # Charger les données de retail
+    # Vérifier les champs demandés
     try:
-        retail_data = load_retail_data()  # Cette fonction charge les données du fichier
+        projection = parse_fields(fields, RetailResponse)
+    except ValueError as e:
+        logger.error(f"Invalid fields received on /retail_data: {fields}")
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    # Charger les données de retail de la date (une seule page si `limit` est renseigné)
+    columns = backend_columns(projection, RETAIL_KEY_COLUMNS)
+    try:
+        if limit is not None:
+            filtered_data, next_cursor, total = select_retail_data_page(start, limit, cursor, columns, end)
+        else:
+            retail_data = select_retail_data(start, columns=columns, end_date=end)
     except FileNotFoundError:
         logger.error("Error loading retail data.")
         return JSONResponse(
             content={"error": "Retail data file not found."},
             status_code=404,
         )
+    except ValueError:
+        logger.error(f"Invalid cursor received on /retail_data: {cursor}")
+        return JSONResponse(
+            content={"error": "Invalid cursor."},
+            status_code=400,
+        )
+
+    media_type = negotiate_format(request, stream)
+
+    if limit is None:
+        # Diffuser les données au fil du filtrage, sans construire la liste complète
+        if media_type == NDJSON_MEDIA_TYPE:
+            logger.info(f"Streaming retail data as NDJSON for date: {period}")
+            return ndjson_response(project(retail_data, projection))
+
+        with timed("filter"):
+            filtered_data = list(retail_data)
+    else:
+        # Ajouter les métadonnées de pagination
+        set_page_headers(response, total, next_cursor)
 
-    # Filtrer les données pour inclure uniquement celles correspondant à la date
-    response = [
-        RetailDataResponse(
-            store_id=entry["store_id"],
-            store_name=entry["store_name"],
-            date=entry["date"],
-            hour=entry["hour"],
-            visitors=entry["visitors"],
-            sales=entry["sales"],
+    # Réduire les lignes aux champs demandés
+    if projection is not None:
+        filtered_data = list(project(filtered_data, projection))
+
+    # Sérialiser dans le format négocié (NDJSON, Arrow ou Parquet)
+    if media_type != JSON_MEDIA_TYPE:
+        return format_response(
+            filtered_data, media_type, RetailResponse, headers=response.headers, fields=projection
         )
-        for entry in retail_data
-        if entry["date"] == date
-    ]
 
-    if not response:
-        logger.warning(f"No data found for date: {date}")
+    if not filtered_data:
+        logger.warning(f"No data found for date: {period}")
     else:
-        logger.info(f"Retrieved {len(response)} records for date: {date}")
+        logger.info(f"Retrieved {len(filtered_data)} records for date: {period}")
 
-    return response
+    # Les lignes du fichier sont déjà au format RetailResponse : sérialisation directe
+    return json_response(filtered_data, headers=response.headers)
 
 
 @router.get("/store", response_model=List[RetailDataResponse])
-async def get_store_visitors(date: str, store_id: str):
+def get_store_visitors(date: str, store_id: str):
     """
     Route GET pour récupérer les données retail d'un magasin spécifique à une date donnée.
 
@@ -126,26 +442,26 @@ async def get_store_visitors(date: str, store_id: str):
         logger.error(f"Invalid date format: {date}. Expected 'YYYY-MM-DD'.")
         return [{"error": "Date format is incorrect. Use 'YYYY-MM-DD'."}]
 
-    # Charger les données de retail
+    # Charger les données de retail de la date et du magasin
     try:
-        retail_data = load_retail_data()
+        retail_data = select_retail_data(date, store_id)
     except FileNotFoundError:
         logger.error("Error loading retail data.")
         return [{"error": "Retail data file not found."}]
 
-    # Filtrer les données pour inclure uniquement celles correspondant à la date et au store_id
-    filtered_data = [
-        {
-            "store_id": entry["store_id"],
-            "store_name": entry["store_name"],
-            "date": entry["date"],
-            "hour": entry["hour"],
-            "visitors": entry["visitors"],
-            "sales": entry["sales"],
-        }
-        for entry in retail_data
-        if entry["date"] == date and entry["store_id"] == store_id
-    ]
+    # Ne conserver que les champs de la réponse
+    with timed("filter"):
+        filtered_data = [
+            {
+                "store_id": entry["store_id"],
+                "store_name": entry["store_name"],
+                "date": entry["date"],
+                "hour": entry["hour"],
+                "visitors": entry["visitors"],
+                "sales": entry["sales"],
+            }
+            for entry in retail_data
+        ]
 
     # Si aucune donnée n'est trouvée
     if not filtered_data:
@@ -154,4 +470,91 @@ async def get_store_visitors(date: str, store_id: str):
     else:
         logger.info(f"Retrieved {len(filtered_data)} records for store_id={store_id} on date={date}")
 
-    return filtered_data
+    return json_response(filtered_data)
+
+
+@router.get("/summary", response_model=Union[List[RetailSummary], CountResponse])
+def get_retail_data_summary(
+    date: str,
+    store_id: Optional[str] = None,
+    by_hour: bool = False,
+    count_only: bool = False,
+):
+    """
+    Route GET pour récupérer les totaux de visiteurs et de ventes par magasin et par jour, calculés côté serveur.
+
+    Avec `by_hour=true`, les totaux sont détaillés par heure. Avec `count_only=true`, seul le nombre
+    de lignes retail correspondantes est renvoyé.
+
+    Args:
+        date (str): La date des données, au format 'YYYY-MM-DD'.
+        store_id (str, optional): L'identifiant du magasin. Par défaut, None (tous les magasins).
+        by_hour (bool): Si True, détaille les totaux par heure. Par défaut, False.
+        count_only (bool): Si True, renvoie uniquement le nombre de lignes. Par défaut, False.
+
+    Returns:
+        List[RetailSummary]: Totaux par magasin, par jour (et par heure).
+        CountResponse: Nombre de lignes retail, avec `count_only=true`.
+        JSONResponse: Erreur si la date est invalide ou si les données ne sont pas disponibles.
+    """
+    logger.info(
+        f"GET /retail_data/summary called with date={date}, store_id={store_id}, "
+        f"by_hour={by_hour}, count_only={count_only}"
+    )
+
+    # Vérifier si la date est valide
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        logger.error(f"Invalid date format: {date}. Expected 'YYYY-MM-DD'.")
+        return JSONResponse(
+            content={"error": "Date format is incorrect. Use 'YYYY-MM-DD'."},
+            status_code=400,
+        )
+
+    try:
+        if count_only:
+            count = count_retail_data(date, store_id)
+            logger.info(f"Counted {count} retail records for date: {date}")
+            return json_response({"count": count})
+        summary = summarize_retail_data(date, store_id, by_hour)
+    except FileNotFoundError:
+        logger.error("Error loading retail data.")
+        return JSONResponse(
+            content={"error": "Retail data file not found."},
+            status_code=404,
+        )
+
+    if not summary:
+        logger.warning(f"No data found for date: {date}")
+    else:
+        logger.info(f"Summarized retail data into {len(summary)} groups for date: {date}")
+
+    return json_response(summary)
+
+
+@router.get("/changes", response_model=RetailChangesResponse)
+def get_retail_data_changes(
+    since: int = Query(0, ge=0),
+    max_rows: int = Query(change_log.DEFAULT_MAX_ROWS, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Route GET pour récupérer les données retail publiées après une séquence donnée (extraction incrémentale).
+
+    Args:
+        since (int): Dernière séquence déjà reçue. Par défaut, 0 (depuis le premier lot).
+        max_rows (int): Nombre de lignes au-delà duquel aucun lot supplémentaire n'est ajouté.
+
+    Returns:
+        RetailChangesResponse: Séquence atteinte, indicateur de lots restants et lignes des lots.
+    """
+    logger.info(f"GET /retail_data/changes called with since={since}, max_rows={max_rows}")
+
+    with timed("load"):
+        changes = change_log.read_changes("retail_data", since, max_rows)
+
+    logger.info(
+        f"Returning {len(changes['rows'])} retail records from sequence {since} to {changes['sequence']} "
+        f"(has_more={changes['has_more']})"
+    )
+    return json_response(changes)
@@ -1,24 +1,30 @@
 import json
-from typing import List, Union
+from typing import List, Optional, Union
 
-from fastapi import APIRouter
+import pyarrow.compute as pc
+from fastapi import APIRouter, Header, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from src import schemas
+from src.api import arrow_store, change_log, partition_store, sql_store
+from src.api.data_store import ARROW_BACKEND, DATA_BACKEND, SQLITE_BACKEND
+from src.api.metrics import timed
+from src.api.routes.aggregation import COUNT_DISTINCT, SUM, aggregate_rows
+from src.api.routes.date_range import MISSING_DATE_STATUS, MissingDateError, describe_range, resolve_date_range
+from src.api.routes.events import SSE_MEDIA_TYPE, latest_sequences, parse_event_id, tail_changes
 from src.api.routes.logger_routes import logger
+from src.api.routes.pagination import (MAX_PAGE_SIZE, decode_cursor, keyset_clause, keyset_expression, paginate,
+                                       set_page_headers, take_page)
+from src.api.routes.responses import (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, backend_columns, format_response,
+                                      json_response, ndjson_response, negotiate_format, parse_fields,
+                                      project)
+from src.api.schemas import pydantic_model
 
 router = APIRouter()
 
 
-# Modèle Pydantic pour la réponse des ventes
-class SaleDataResponse(BaseModel):
-    sale_id: str
-    nb_type_product: int
-    product_id: str
-    client_id: str
-    store_id: str
-    quantity: int
-    sale_amount: float
-    sale_date: str
-    sale_time: str
+# Modèle Pydantic de la réponse des ventes, dérivé du schéma partagé avec l'extraction
+SaleDataResponse = pydantic_model(schemas.SaleDataResponse)
 
 
 class ErrorResponse(BaseModel):
@@ -28,6 +34,56 @@ class ErrorResponse(BaseModel):
 SaleResponse = Union[SaleDataResponse, ErrorResponse]
 
 
+# Modèles Pydantic pour la synthèse des ventes
+class SaleSummaryResponse(BaseModel):
+    store_id: str
+    sale_date: str
+    hour: Optional[int] = None
+    quantity: int
+    revenue: float
+    transactions: int
+
+
+class CountResponse(BaseModel):
+    count: int
+
+
+SaleSummary = Union[SaleSummaryResponse, ErrorResponse]
+
+
+# Modèle Pydantic pour le journal des modifications des ventes
+class SaleChangesResponse(BaseModel):
+    since: int
+    sequence: int
+    has_more: bool
+    rows: List[SaleDataResponse]
+
+
+# Colonnes de la clé de tri utilisée par la pagination, et leurs types (vérification des curseurs)
+SALE_KEY_COLUMNS = ("sale_date", "sale_time", "sale_id", "product_id")
+SALE_KEY_TYPES = (str, str, str, str)
+
+# Mesures de la synthèse des ventes : quantité, chiffre d'affaires et nombre de transactions distinctes
+SALES_MEASURES = [
+    ("quantity", SUM, "quantity"),
+    ("revenue", SUM, "sale_amount"),
+    ("transactions", COUNT_DISTINCT, "sale_id"),
+]
+
+
+def sale_sort_key(sale):
+    """
+    Clé de tri stable d'une ligne de vente, utilisée pour la pagination par curseur.
+
+    Args:
+        sale (dict): Ligne de vente.
+
+    Returns:
+        tuple: Clé `(sale_date, sale_time, sale_id, product_id)`.
+    """
+    return sale["sale_date"], sale["sale_time"], sale["sale_id"], sale["product_id"]
+
+
 # Charger les données des ventes depuis le fichier JSON
 def load_sales():
     """
@@ -50,47 +106,352 @@ def load_sales():
         return []
 
 
-@router.get("", response_model=List[SaleResponse])
-async def get_sales(sale_date: str, store_id: str):
+def load_sales_partitions(sale_date, store_ids=None, end_date=None):
+    """
+    Charge les ventes d'une date (ou d'une plage de dates) pour le backend JSON : seules les partitions des
+    dates et des magasins demandés sont lues si les ventes sont partitionnées, sinon le fichier 'sales.json'
+    complet.
+
+    Args:
+        sale_date (str): La date des ventes (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        iterable: Ventes à filtrer, par date croissante si elles sont partitionnées.
+    """
+    if partition_store.is_partitioned("sales"):
+        if end_date is None or end_date == sale_date:
+            return partition_store.read_partitions("sales", sale_date, store_ids)
+        return partition_store.read_range("sales", sale_date, end_date, store_ids)
+    return load_sales()
+
+
+def sales_filter(sale_date, store_ids=None, hour=None, end_date=None):
     """
-    Route GET pour récupérer les ventes d'un magasin à une date donnée.
+    Construit le filtre des ventes dans la forme attendue par le backend de données configuré.
+
+    Args:
+        sale_date (str): La date des ventes (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        hour (str, optional): L'heure des ventes, au format 'HH'. Par défaut, None (toute la journée).
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        pyarrow.compute.Expression: Avec le backend Arrow.
+        tuple: Clause WHERE paramétrée et ses paramètres, avec le backend SQLite.
+        callable: Prédicat sur une ligne, avec le backend JSON.
+    """
+    end_date = end_date or sale_date
+    if DATA_BACKEND == ARROW_BACKEND:
+        if end_date == sale_date:
+            condition = pc.field("sale_date") == sale_date
+        else:
+            condition = (pc.field("sale_date") >= sale_date) & (pc.field("sale_date") <= end_date)
+        if store_ids is not None:
+            condition &= pc.field("store_id").isin(store_ids)
+        if hour is not None:
+            condition &= pc.utf8_slice_codeunits(pc.field("sale_time"), 0, 2) == f"{int(hour):02}"
+        return condition
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        if end_date == sale_date:
+            clauses, params = ["sale_date = ?"], [sale_date]
+        else:
+            clauses, params = ["sale_date BETWEEN ? AND ?"], [sale_date, end_date]
+        if store_ids is not None:
+            clauses.append(f"store_id IN ({', '.join('?' * len(store_ids))})")
+            params.extend(store_ids)
+        if hour is not None:
+            clauses.append("sale_hour = ?")
+            params.append(int(hour))
+        return " AND ".join(clauses), params
+
+    wanted_stores = set(store_ids) if store_ids is not None else None
+    return lambda sale: (
+        sale_date <= sale["sale_date"] <= end_date
+        and (wanted_stores is None or sale["store_id"] in wanted_stores)
+        and (hour is None or int(sale["sale_time"][:2]) == int(hour))
+    )
+
+
+def select_sales(sale_date, store_ids=None, hour=None, columns=None, end_date=None):
+    """
+    Sélectionne les ventes d'une date (ou d'une plage de dates) depuis le backend de données configuré.
+
+    Les plages sont servies par l'index des dates de chaque backend, en un seul parcours : tranche de la
+    table Arrow triée par date, index `(sale_date, ...)` de SQLite ou partitions de dates du backend JSON.
+
+    Args:
+        sale_date (str): La date des ventes (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        hour (str, optional): L'heure des ventes, au format 'HH'. Par défaut, None (toute la journée).
+        columns (list, optional): Colonnes à lire avec un backend colonnaire ou SQL. Par défaut, toutes.
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        iterable: Ventes correspondantes, par date croissante pour une plage (générateur avec le backend JSON,
+        sauf plage lue dans le fichier 'sales.json' complet, liste avec le backend Arrow).
+
+    Raises:
+        FileNotFoundError: Si le jeu de données des ventes est introuvable.
+    """
+    condition = sales_filter(sale_date, store_ids, hour, end_date)
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.select("sales", condition, columns, date_range=(sale_date, end_date or sale_date))
+
+    if DATA_BACKEND == SQLITE_BACKEND:
+        where, params = condition
+        order_by = "sale_date" if end_date not in (None, sale_date) else None
+        return sql_store.select("sales", where, params, order_by=order_by, columns=columns)
+
+    with timed("load"):
+        sales = load_sales_partitions(sale_date, store_ids, end_date)
+    selected = (sale for sale in sales if condition(sale))
+    # Les partitions sont lues date par date, mais le fichier 'sales.json' complet n'est pas trié par date
+    if end_date not in (None, sale_date) and not partition_store.is_partitioned("sales"):
+        with timed("filter"):
+            return sorted(selected, key=lambda sale: sale["sale_date"])
+    return selected
+
+
+def select_sales_page(sale_date, store_ids=None, limit=MAX_PAGE_SIZE, cursor=None, columns=None, end_date=None):
+    """
+    Sélectionne une page de ventes triées sur `SALE_KEY_COLUMNS`, à partir du curseur donné.
+
+    Avec les backends SQLite et Arrow, la page est sélectionnée par le backend (`clé > curseur ORDER BY clé
+    LIMIT limit + 1`) et le total est un simple comptage. Avec le backend JSON, les ventes sont parcourues une
+    seule fois (voir `paginate`).
+
+    Args:
+        sale_date (str): La date des ventes (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        limit (int): Nombre maximal de ventes dans la page. Par défaut, `MAX_PAGE_SIZE`.
+        cursor (str, optional): Curseur de la page précédente. Par défaut, None (première page).
+        columns (list, optional): Colonnes à lire avec un backend colonnaire ou SQL. Par défaut, toutes.
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        tuple: Ventes de la page, curseur de la page suivante (ou None) et nombre total de ventes.
+
+    Raises:
+        ValueError: Si le curseur est mal formé.
+        FileNotFoundError: Si le jeu de données des ventes est introuvable.
+    """
+    if DATA_BACKEND not in (ARROW_BACKEND, SQLITE_BACKEND):
+        return paginate(select_sales(sale_date, store_ids, columns=columns, end_date=end_date), sale_sort_key,
+                        limit, cursor)
+
+    after = decode_cursor(cursor, SALE_KEY_TYPES) if cursor else None
+    condition = sales_filter(sale_date, store_ids, end_date=end_date)
+    if DATA_BACKEND == ARROW_BACKEND:
+        if after is not None:
+            condition &= keyset_expression(SALE_KEY_COLUMNS, after)
+        rows = arrow_store.select("sales", condition, columns, date_range=(sale_date, end_date or sale_date),
+                                  order_by=SALE_KEY_COLUMNS, limit=limit + 1)
+    else:
+        where, params = condition
+        if after is not None:
+            clause, values = keyset_clause(SALE_KEY_COLUMNS, after)
+            where, params = f"{where} AND {clause}", params + values
+        rows = sql_store.select("sales", where, params, order_by=", ".join(SALE_KEY_COLUMNS), columns=columns,
+                                limit=limit + 1)
+
+    page, next_cursor = take_page(rows, sale_sort_key, limit)
+    return page, next_cursor, count_sales(sale_date, store_ids, end_date)
+
+
+def summarize_sales(sale_date, store_ids=None, by_hour=False):
+    """
+    Calcule les totaux des ventes par magasin et par jour (et par heure si demandé) dans le backend.
 
     Args:
         sale_date (str): La date des ventes, au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        by_hour (bool): Si True, ajoute l'heure aux clés de regroupement. Par défaut, False.
+
+    Returns:
+        list: Une ligne par groupe avec `quantity`, `revenue` et `transactions`.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données des ventes est introuvable.
+    """
+    keys = ["store_id", "sale_date"] + (["sale_hour"] if by_hour else [])
+    condition = sales_filter(sale_date, store_ids)
+
+    if DATA_BACKEND == ARROW_BACKEND:
+        derived = {"sale_hour": lambda table: pc.cast(pc.utf8_slice_codeunits(table["sale_time"], 0, 2), "int64")}
+        summary = arrow_store.aggregate("sales", condition, keys, SALES_MEASURES, derived if by_hour else None)
+    elif DATA_BACKEND == SQLITE_BACKEND:
+        where, params = condition
+        summary = sql_store.aggregate("sales", keys, SALES_MEASURES, where, params)
+    else:
+        with timed("load"):
+            sales = load_sales_partitions(sale_date, store_ids)
+        with timed("filter"):
+            rows = (sale for sale in sales if condition(sale))
+            if by_hour:
+                rows = (dict(sale, sale_hour=int(sale["sale_time"][:2])) for sale in rows)
+            summary = aggregate_rows(rows, keys, SALES_MEASURES)
+
+    for row in summary:
+        row["revenue"] = round(row["revenue"], 2)
+    if by_hour:
+        summary = [{("hour" if key == "sale_hour" else key): value for key, value in row.items()} for row in summary]
+    return summary
+
+
+def count_sales(sale_date, store_ids=None, end_date=None):
+    """
+    Compte les lignes de ventes d'une date (ou d'une plage de dates) sans les transférer.
+
+    Args:
+        sale_date (str): La date des ventes (premier jour si `end_date` est renseigné), au format 'YYYY-MM-DD'.
+        store_ids (list, optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        end_date (str, optional): Dernier jour de la plage (inclus). Par défaut, None (une seule date).
+
+    Returns:
+        int: Nombre de lignes de ventes.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données des ventes est introuvable.
+    """
+    condition = sales_filter(sale_date, store_ids, end_date=end_date)
+    if DATA_BACKEND == ARROW_BACKEND:
+        return arrow_store.count("sales", condition)
+    if DATA_BACKEND == SQLITE_BACKEND:
+        return sql_store.count("sales", *condition)
+    with timed("load"):
+        sales = load_sales_partitions(sale_date, store_ids, end_date)
+    with timed("filter"):
+        return sum(1 for sale in sales if condition(sale))
+
+
+@router.get("", response_model=List[SaleResponse])
+def get_sales(
+    request: Request,
+    response: Response,
+    store_id: str,
+    sale_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+):
+    """
+    Route GET pour récupérer les ventes d'un magasin à une date donnée ou sur une plage de dates.
+
+    La plage `start_date`..`end_date` (bornes incluses) remplace `sale_date` ; elle est lue en un seul
+    parcours de l'index des dates du backend et se combine avec la pagination, les ventes étant
+    ordonnées par date puis par heure. `sale_date` ou `start_date` est obligatoire : sans l'un ni l'autre,
+    la route répond 422.
+
+    Si `limit` est renseigné, les ventes sont paginées par curseur : le nombre total de ventes
+    est renvoyé dans l'en-tête `X-Total-Count` et le curseur de la page suivante dans `X-Next-Cursor`.
+
+    Avec `Accept: application/x-ndjson` ou `?stream=true`, les ventes sont diffusées au format NDJSON
+    au fil du filtrage (un flux vide si aucune vente ne correspond). Les en-têtes
+    `Accept: application/vnd.apache.arrow.stream` et `application/vnd.apache.parquet` renvoient
+    les ventes au format colonnaire.
+
+    `fields` restreint les ventes renvoyées aux champs listés (par exemple
+    `?fields=sale_date,store_id,product_id,quantity,sale_amount`) ; avec un backend colonnaire ou SQL,
+    seules ces colonnes sont lues.
+
+    Args:
+        request (Request): Requête entrante, utilisée pour la négociation du format.
+        response (Response): Réponse FastAPI, utilisée pour les en-têtes de pagination.
         store_id (str): L'identifiant du magasin.
+        sale_date (str, optional): La date des ventes, au format 'YYYY-MM-DD'.
+        start_date (str, optional): Premier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        end_date (str, optional): Dernier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        limit (int, optional): Nombre maximal de ventes par page. Par défaut, None (pas de pagination).
+        cursor (str, optional): Curseur renvoyé par la page précédente.
+        stream (bool): Si True, diffuse les ventes au format NDJSON. Par défaut, False.
+        fields (str, optional): Champs à renvoyer, séparés par des virgules. Par défaut, tous.
 
     Returns:
-        List[SaleResponse]: Liste des ventes filtrées pour la date et le magasin donnés.
+        List[SaleResponse]: Liste des ventes filtrées pour la date (ou la plage) et le magasin donnés.
+        JSONResponse: Erreur 422 si ni `sale_date` ni `start_date` ne sont fournies.
     """
-    logger.info(f"GET /sales called with sale_date={sale_date}, store_id={store_id}")
+    logger.info(
+        f"GET /sales called with sale_date={sale_date}, start_date={start_date}, end_date={end_date}, "
+        f"store_id={store_id}, limit={limit}"
+    )
+
+    # Vérifier la date ou la plage de dates demandée
+    try:
+        start, end = resolve_date_range(sale_date, start_date, end_date)
+    except MissingDateError as e:
+        logger.error("No date received on /sales")
+        return JSONResponse(content={"error": str(e)}, status_code=MISSING_DATE_STATUS)
+    except ValueError as e:
+        logger.error(f"Invalid date range received on /sales: {e}")
+        return [{"error": str(e)}]
+    period = describe_range(start, end)
+
+    # Vérifier les champs demandés
+    try:
+        projection = parse_fields(fields, SaleDataResponse)
+    except ValueError as e:
+        logger.error(f"Invalid fields received on /sales: {fields}")
+        return [{"error": str(e)}]
 
-    # Charger les données des ventes
+    # Charger les ventes correspondant aux critères spécifiés (une seule page si `limit` est renseigné)
+    columns = backend_columns(projection, SALE_KEY_COLUMNS)
     try:
-        sales = load_sales()
+        if limit is not None:
+            filtered_sales, next_cursor, total = select_sales_page(start, [store_id], limit, cursor, columns, end)
+        else:
+            sales = select_sales(start, [store_id], columns=columns, end_date=end)
     except FileNotFoundError:
         logger.error("Error loading sales data.")
         return [{"error": "Le fichier sales n'existe pas."}]
+    except ValueError:
+        logger.error(f"Invalid cursor received on /sales: {cursor}")
+        return [{"error": "Invalid cursor."}]
 
-    # Filtrer les ventes pour inclure uniquement celles correspondant aux critères spécifiés
-    filtered_sales = [
-        sale
-        for sale in sales
-        if sale["sale_date"] == sale_date and sale["store_id"] == store_id
-    ]
+    media_type = negotiate_format(request, stream)
+
+    if limit is None:
+        # Diffuser les ventes au fil du filtrage, sans construire la liste complète
+        if media_type == NDJSON_MEDIA_TYPE:
+            logger.info(f"Streaming sales as NDJSON for store_id={store_id} on sale_date={period}")
+            return ndjson_response(project(sales, projection))
+
+        with timed("filter"):
+            filtered_sales = list(sales)
+        total = len(filtered_sales)
 
     # Si aucune vente n'est trouvée pour la date et le magasin spécifiés
-    if not filtered_sales:
-        logger.warning(f"No sales found for store_id={store_id} on sale_date={sale_date}")
-        return [{"error": f"No sales found for store ID: {store_id} on {sale_date}"}]
+    if not total:
+        logger.warning(f"No sales found for store_id={store_id} on sale_date={period}")
+        return [{"error": f"No sales found for store ID: {store_id} on {period}"}]
 
-    logger.info(f"Retrieved {len(filtered_sales)} sales for store_id={store_id} on sale_date={sale_date}")
+    logger.info(f"Retrieved {total} sales for store_id={store_id} on sale_date={period}")
+
+    # Ajouter les métadonnées de pagination si une taille de page est demandée
+    if limit is not None:
+        set_page_headers(response, total, next_cursor)
+
+    # Réduire les ventes aux champs demandés
+    if projection is not None:
+        filtered_sales = list(project(filtered_sales, projection))
+
+    # Sérialiser dans le format négocié (NDJSON, Arrow ou Parquet)
+    if media_type != JSON_MEDIA_TYPE:
+        return format_response(
+            filtered_sales, media_type, SaleDataResponse, headers=response.headers, fields=projection
+        )
 
     # Retourner la liste des ventes filtrées
-    return filtered_sales
+    return json_response(filtered_sales, headers=response.headers)
 
 
 @router.get("/hour", response_model=List[SaleResponse])
-async def get_sales_by_hour(sale_date: str, hour: str):
+def get_sales_by_hour(sale_date: str, hour: str):
     """
     Route GET pour récupérer les ventes à une date et une heure donnée.
 
@@ -103,20 +464,15 @@ async def get_sales_by_hour(sale_date: str, hour: str):
     """
     logger.info(f"GET /sales/hour called with sale_date={sale_date}, hour={hour}")
 
-    # Charger les données des ventes
+    # Charger les ventes correspondant aux critères spécifiés
     try:
-        sales = load_sales()
+        sales = select_sales(sale_date, hour=hour)
     except FileNotFoundError:
         logger.error("Error loading sales data.")
         return [{"error": "Le fichier sales n'existe pas."}]
 
-    # Filtrer les ventes pour inclure uniquement celles correspondant aux critères spécifiés
-    filtered_sales = [
-        sale
-        for sale in sales
-        if int(sale["sale_time"][:2]) == int(hour.zfill(2))
-        and sale["sale_date"] == sale_date
-    ]
+    with timed("filter"):
+        filtered_sales = list(sales)
 
     # Si aucune vente n'est trouvée pour la date et l'heure spécifiés
     if not filtered_sales:
@@ -126,4 +482,215 @@ async def get_sales_by_hour(sale_date: str, hour: str):
     logger.info(f"Retrieved {len(filtered_sales)} sales for hour={hour} on sale_date={sale_date}")
 
     # Retourner la liste des ventes filtrées
-    return filtered_sales
+    return json_response(filtered_sales)
+
+
+@router.get("/bulk", response_model=List[SaleResponse])
+def get_sales_bulk(
+    request: Request,
+    sale_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    store_ids: Optional[List[str]] = Query(None),
+    stream: bool = False,
+    fields: Optional[str] = None,
+):
+    """
+    Route GET pour récupérer en une seule requête les ventes de plusieurs magasins à une date donnée.
+
+    Les ventes sont sélectionnées en un seul parcours des données. Sans `store_ids`, toutes les ventes
+    de la date sont renvoyées ; sinon, seules celles des magasins listés (`?store_ids=a&store_ids=b`).
+    La plage `start_date`..`end_date` (bornes incluses) remplace `sale_date` comme pour `GET /sales` ; sans
+    `sale_date` ni `start_date`, la route répond 422.
+    Les formats NDJSON, Arrow et Parquet et la projection `fields` fonctionnent comme pour `GET /sales`.
+
+    Args:
+        request (Request): Requête entrante, utilisée pour la négociation du format.
+        sale_date (str, optional): La date des ventes, au format 'YYYY-MM-DD'.
+        start_date (str, optional): Premier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        end_date (str, optional): Dernier jour de la plage (inclus), au format 'YYYY-MM-DD'.
+        store_ids (List[str], optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        stream (bool): Si True, diffuse les ventes au format NDJSON. Par défaut, False.
+        fields (str, optional): Champs à renvoyer, séparés par des virgules. Par défaut, tous.
+
+    Returns:
+        List[SaleResponse]: Liste des ventes de la date pour les magasins demandés.
+        JSONResponse: Erreur 422 si ni `sale_date` ni `start_date` ne sont fournies.
+    """
+    logger.info(
+        f"GET /sales/bulk called with sale_date={sale_date}, start_date={start_date}, end_date={end_date}, "
+        f"store_ids={store_ids}"
+    )
+
+    # Vérifier la date ou la plage de dates demandée
+    try:
+        start, end = resolve_date_range(sale_date, start_date, end_date)
+    except MissingDateError as e:
+        logger.error("No date received on /sales/bulk")
+        return JSONResponse(content={"error": str(e)}, status_code=MISSING_DATE_STATUS)
+    except ValueError as e:
+        logger.error(f"Invalid date range received on /sales/bulk: {e}")
+        return [{"error": str(e)}]
+    period = describe_range(start, end)
+
+    # Vérifier les champs demandés
+    try:
+        projection = parse_fields(fields, SaleDataResponse)
+    except ValueError as e:
+        logger.error(f"Invalid fields received on /sales/bulk: {fields}")
+        return [{"error": str(e)}]
+
+    # Sélectionner les ventes en un seul parcours pour tous les magasins demandés
+    try:
+        sales = select_sales(start, store_ids or None, columns=projection, end_date=end)
+    except FileNotFoundError:
+        logger.error("Error loading sales data.")
+        return [{"error": "Le fichier sales n'existe pas."}]
+
+    media_type = negotiate_format(request, stream)
+
+    # Diffuser les ventes au fil du filtrage, sans construire la liste complète
+    if media_type == NDJSON_MEDIA_TYPE:
+        logger.info(f"Streaming bulk sales as NDJSON on sale_date={period}")
+        return ndjson_response(project(sales, projection))
+
+    with timed("filter"):
+        filtered_sales = list(project(sales, projection))
+
+    # Si aucune vente n'est trouvée pour la date et les magasins spécifiés
+    if not filtered_sales:
+        logger.warning(f"No sales found for store_ids={store_ids} on sale_date={period}")
+        return [{"error": f"No sales found on {period}"}]
+
+    scope = f"{len(set(store_ids))} stores" if store_ids else "all stores"
+    logger.info(f"Retrieved {len(filtered_sales)} sales for {scope} on sale_date={period}")
+
+    # Sérialiser dans un format colonnaire si demandé (Arrow ou Parquet)
+    if media_type != JSON_MEDIA_TYPE:
+        return format_response(filtered_sales, media_type, SaleDataResponse, fields=projection)
+
+    # Retourner la liste des ventes filtrées
+    return json_response(filtered_sales)
+
+
+@router.get("/summary", response_model=Union[List[SaleSummary], CountResponse])
+def get_sales_summary(
+    sale_date: str,
+    store_ids: Optional[List[str]] = Query(None),
+    by_hour: bool = False,
+    count_only: bool = False,
+):
+    """
+    Route GET pour récupérer les totaux des ventes par magasin et par jour, calculés côté serveur.
+
+    Pour chaque magasin (et chaque heure si `by_hour=true`), la route renvoie la quantité vendue,
+    le chiffre d'affaires et le nombre de transactions distinctes, sans transférer les lignes de ventes.
+    Avec `count_only=true`, seul le nombre de lignes de ventes correspondantes est renvoyé.
+
+    Args:
+        sale_date (str): La date des ventes, au format 'YYYY-MM-DD'.
+        store_ids (List[str], optional): Identifiants des magasins. Par défaut, None (tous les magasins).
+        by_hour (bool): Si True, détaille les totaux par heure. Par défaut, False.
+        count_only (bool): Si True, renvoie uniquement le nombre de lignes. Par défaut, False.
+
+    Returns:
+        List[SaleSummary]: Totaux par magasin, par jour (et par heure).
+        CountResponse: Nombre de lignes de ventes, avec `count_only=true`.
+    """
+    logger.info(
+        f"GET /sales/summary called with sale_date={sale_date}, store_ids={store_ids}, "
+        f"by_hour={by_hour}, count_only={count_only}"
+    )
+
+    try:
+        if count_only:
+            count = count_sales(sale_date, store_ids or None)
+            logger.info(f"Counted {count} sales on sale_date={sale_date}")
+            return json_response({"count": count})
+        summary = summarize_sales(sale_date, store_ids or None, by_hour)
+    except FileNotFoundError:
+        logger.error("Error loading sales data.")
+        return [{"error": "Le fichier sales n'existe pas."}]
+
+    # Si aucune vente n'est trouvée pour la date et les magasins spécifiés
+    if not summary:
+        logger.warning(f"No sales found for store_ids={store_ids} on sale_date={sale_date}")
+        return [{"error": f"No sales found on {sale_date}"}]
+
+    logger.info(f"Summarized sales into {len(summary)} groups on sale_date={sale_date}")
+    return json_response(summary)
+
+
+@router.get("/changes", response_model=SaleChangesResponse)
+def get_sales_changes(
+    since: int = Query(0, ge=0),
+    max_rows: int = Query(change_log.DEFAULT_MAX_ROWS, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Route GET pour récupérer les ventes publiées après une séquence donnée (extraction incrémentale).
+
+    Chaque lot publié par le générateur porte un numéro de séquence croissant. Le client renvoie la
+    séquence reçue au prochain appel (`since`) et ne récupère que les nouvelles ventes, tant que
+    `has_more` est vrai.
+
+    Args:
+        since (int): Dernière séquence déjà reçue. Par défaut, 0 (depuis le premier lot).
+        max_rows (int): Nombre de lignes au-delà duquel aucun lot supplémentaire n'est ajouté.
+
+    Returns:
+        SaleChangesResponse: Séquence atteinte, indicateur de lots restants et ventes des lots.
+    """
+    logger.info(f"GET /sales/changes called with since={since}, max_rows={max_rows}")
+
+    with timed("load"):
+        changes = change_log.read_changes("sales", since, max_rows)
+
+    logger.info(
+        f"Returning {len(changes['rows'])} sales from sequence {since} to {changes['sequence']} "
+        f"(has_more={changes['has_more']})"
+    )
+    return json_response(changes)
+
+
+@router.get("/stream")
+async def get_sales_stream(
+    include_retail: bool = True,
+    limit: Optional[int] = Query(None, ge=1),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Route GET diffusant en continu (Server-Sent Events) les ventes et les données retail horaires dès leur
+    publication par le générateur.
+
+    Chaque lot du journal des modifications donne un événement `sales` ou `retail_data`. Un client qui se
+    reconnecte renvoie l'identifiant du dernier événement reçu (en-tête `Last-Event-ID`) et reprend juste
+    après ; sans identifiant, le flux commence aux prochains lots publiés. La route est asynchrone : une
+    connexion ouverte n'occupe pas de thread entre deux lots.
+
+    Args:
+        include_retail (bool): Diffuser aussi les données retail horaires. Par défaut, True.
+        limit (int, optional): Nombre d'événements après lequel le flux se termine. Par défaut, sans fin.
+        last_event_id (str, optional): Identifiant du dernier événement reçu (en-tête `Last-Event-ID`).
+
+    Returns:
+        StreamingResponse: Flux `text/event-stream`.
+        JSONResponse: Erreur 400 si l'identifiant d'événement est invalide.
+    """
+    names = ("sales", "retail_data") if include_retail else ("sales",)
+    logger.info(f"GET /sales/stream called with datasets={list(names)}, last_event_id={last_event_id}")
+
+    if last_event_id:
+        try:
+            sequences = parse_event_id(last_event_id, names)
+        except ValueError as e:
+            logger.error(f"Invalid Last-Event-ID on /sales/stream: {last_event_id}")
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+    else:
+        sequences = latest_sequences(names)
+
+    logger.info(f"Streaming changes after sequences {sequences}")
+    return StreamingResponse(
+        tail_changes(names, sequences, limit),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,21 +1,20 @@
 import json
 from typing import List, Union
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
+from src import schemas
+from src.api.metrics import timed
+from src.api.routes.conditional import is_not_modified, make_etag, not_modified_response, set_etag_headers
 from src.api.routes.logger_routes import logger
+from src.api.routes.responses import json_response
+from src.api.schemas import pydantic_model
 
 router = APIRouter()
 
 
-# Modèle Pydantic pour la réponse des magasins
-class StoreDataResponse(BaseModel):
-    id: str
-    name: str
-    location: str
-    capacity: int
-    opening_hour: str
-    closing_hour: str
+# Modèle Pydantic de la réponse des magasins, dérivé du schéma partagé avec l'extraction
+StoreDataResponse = pydantic_model(schemas.StoreDataResponse)
 
 
 class ErrorResponse(BaseModel):
@@ -48,18 +47,32 @@ def load_stores():
 
 
 @router.get("", response_model=List[StoreResponse])
-async def get_stores():
+def get_stores(request: Request, response: Response):
     """
     Route GET pour récupérer la liste des magasins depuis le fichier 'stores.json'.
 
+    La réponse porte un ETag dérivé de la version du fichier : si le client renvoie cet ETag
+    dans `If-None-Match` et que le fichier n'a pas changé, la route répond `304 Not Modified`.
+
+    Args:
+        request (Request): Requête entrante, utilisée pour la revalidation.
+        response (Response): Réponse FastAPI, utilisée pour l'en-tête ETag.
+
     Returns:
         List[StoreResponse]: Liste des magasins si le fichier est chargé avec succès.
     """
     logger.info("GET /stores called.")
 
+    # Revalidation de la copie du client
+    etag = make_etag("stores", request)
+    if is_not_modified(request, etag):
+        logger.info("Stores not modified since last request.")
+        return not_modified_response(etag)
+
     # Charger les données des magasins et gérer les cas où le fichier est introuvable
     try:
-        stores = load_stores()
+        with timed("load"):
+            stores = load_stores()
     except FileNotFoundError:
         logger.error("Error loading stores data.")
         return [{"error": "Stores data file not found."}]
@@ -69,6 +82,7 @@ async def get_stores():
         return [{"error": "No stores available."}]
 
     logger.info(f"Retrieved {len(stores)} stores.")
+    set_etag_headers(response, etag)
 
-    # Formater et retourner la réponse
-    return stores
+    # Sérialiser les magasins directement, sans validation Pydantic ligne par ligne
+    return json_response(stores, headers=response.headers)
@@ -0,0 +1,27 @@
+"""
+Modèles des routes de l'api, dérivés du schéma partagé des lignes (`src.schemas`).
+
+Les modèles Pydantic des routes (schéma OpenAPI, projection `fields`, schéma Arrow) sont construits par
+`pydantic_model` à partir des structures msgspec ; les lignes sont sérialisées par msgspec, sans validation
+(voir `src.api.routes.responses`).
+"""
+
+import msgspec
+from pydantic import create_model
+
+
+def pydantic_model(struct):
+    """
+    Construit le modèle Pydantic équivalent à une structure (mêmes nom, champs, types et valeurs par défaut).
+
+    Args:
+        struct (type[msgspec.Struct]): Structure décrivant une ligne.
+
+    Returns:
+        type[BaseModel]: Modèle Pydantic.
+    """
+    fields = {
+        field.name: (field.type, ... if field.required else field.default)
+        for field in msgspec.structs.fields(struct)
+    }
+    return create_model(struct.__name__, **fields)
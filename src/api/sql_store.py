@@ -0,0 +1,370 @@
+"""
+Backend de données SQL embarqué (SQLite) pour les routes de l'api.
+
+Les jeux de données volumineux (`sales`, `retail_data`, `clients`) sont chargés dans une base SQLite
+(`data_api/retail_insights.db` par défaut, variable `API_SQLITE_PATH`) indexée sur les colonnes filtrées
+par les routes : date, magasin, heure et ville. Les routes exécutent des requêtes paramétrées au lieu de
+parcourir une liste Python : seules les lignes demandées sont lues.
+
+La base est alimentée de deux façons :
+- `load_day` : le générateur insère les données d'une journée en une seule transaction ;
+- `sync_from_json` : au premier accès, un jeu de données dont la source a changé depuis le dernier
+  chargement est rechargé entièrement, lui aussi en une seule transaction. La source est l'ensemble des
+  partitions pour un jeu de données partitionné (un éventuel ancien fichier JSON est alors ignoré), le
+  fichier JSON sinon.
+
+Usage :
+    python -m src.api.sql_store [jeu_de_données ...]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+from src.api import partition_store
+from src.api.data_store import DATA_DIR, dataset_path, dataset_version
+from src.api.metrics import timed
+
+DB_PATH = os.getenv("API_SQLITE_PATH", os.path.join(DATA_DIR, "retail_insights.db"))
+
+# Description des tables : colonnes servies, colonnes dérivées (calculées à l'insertion), colonnes
+# obligatoires (une ligne sans l'une d'elles, produite par un générateur en erreur, n'est pas chargée),
+# colonnes booléennes (stockées en entier), colonne de date et index
+TABLES = {
+    "sales": {
+        "columns": {
+            "sale_id": "TEXT", "nb_type_product": "INTEGER", "product_id": "TEXT", "client_id": "TEXT",
+            "store_id": "TEXT", "quantity": "INTEGER", "sale_amount": "REAL", "sale_date": "TEXT",
+            "sale_time": "TEXT",
+        },
+        "derived": {"sale_hour": ("INTEGER", lambda row: int(row["sale_time"][:2]))},
+        "required": ("sale_date", "store_id", "sale_time"),
+        "booleans": (),
+        "date_column": "sale_date",
+        "indexes": (("sale_date", "store_id"), ("sale_date", "sale_hour")),
+    },
+    "retail_data": {
+        "columns": {
+            "store_id": "TEXT", "store_name": "TEXT", "date": "TEXT", "hour": "INTEGER",
+            "visitors": "INTEGER", "sales": "INTEGER",
+        },
+        "derived": {},
+        "required": ("date", "store_id"),
+        "booleans": (),
+        "date_column": "date",
+        "indexes": (("date", "store_id", "hour"),),
+    },
+    "clients": {
+        "columns": {
+            "id": "TEXT", "name": "TEXT", "age": "INTEGER", "gender": "TEXT", "loyalty_card": "INTEGER",
+            "city": "TEXT",
+        },
+        # Ville en minuscules pour une recherche insensible à la casse (y compris les accents)
+        "derived": {"city_key": ("TEXT", lambda row: row["city"].lower())},
+        "required": ("id", "city"),
+        "booleans": ("loyalty_card",),
+        "date_column": None,
+        "indexes": (("city_key",),),
+    },
+}
+
+# Une connexion par thread du pool (les connexions SQLite ne sont pas partagées entre threads)
+_local = threading.local()
+_sync_lock = threading.Lock()
+
+
+def get_connection(path=None):
+    """
+    Retourne la connexion SQLite du thread courant, en créant le schéma si nécessaire.
+
+    Args:
+        path (str, optional): Chemin de la base. Par défaut, `DB_PATH`.
+
+    Returns:
+        sqlite3.Connection: Connexion en mode WAL (lectures concurrentes pendant un chargement).
+    """
+    path = path or DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Les transactions sont gérées explicitement (BEGIN / COMMIT)
+        conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        create_schema(conn)
+        connections[path] = conn
+    return conn
+
+
+def create_schema(conn):
+    """
+    Crée les tables, les index et la table des versions chargées si elles n'existent pas.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base.
+    """
+    for name, spec in TABLES.items():
+        columns = {**spec["columns"], **{column: kind for column, (kind, _) in spec["derived"].items()}}
+        definition = ", ".join(f"{column} {kind}" for column, kind in columns.items())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({definition})")
+        for index in spec["indexes"]:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{'_'.join(index)} ON {name} ({', '.join(index)})")
+    conn.execute("CREATE TABLE IF NOT EXISTS dataset_versions (name TEXT PRIMARY KEY, version TEXT)")
+
+
+def _insert_rows(conn, name, rows):
+    """
+    Insère des lignes dans une table, colonnes dérivées comprises (sans gérer la transaction).
+
+    Comme pour les partitions (`partition_store.write_partitions`), les lignes sans l'une des colonnes
+    obligatoires de la table (génération en erreur) sont ignorées.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base.
+        name (str): Nom du jeu de données.
+        rows (list): Lignes au format des fichiers JSON.
+    """
+    spec = TABLES[name]
+    columns = list(spec["columns"])
+    derived = spec["derived"]
+    required = spec["required"]
+    placeholders = ", ".join("?" * (len(columns) + len(derived)))
+    conn.executemany(
+        f"INSERT INTO {name} ({', '.join(columns + list(derived))}) VALUES ({placeholders})",
+        (
+            [row.get(column) for column in columns] + [compute(row) for _, compute in derived.values()]
+            for row in rows
+            if all(row.get(column) is not None for column in required)
+        ),
+    )
+
+
+def _set_version(conn, name, version):
+    conn.execute("INSERT OR REPLACE INTO dataset_versions (name, version) VALUES (?, ?)", (name, version))
+
+
+def load_day(date, datasets, conn=None, before_commit=None):
+    """
+    Charge les données d'une journée en une seule transaction : les lignes existantes de la date sont
+    remplacées, ce qui rend le chargement rejouable.
+
+    Args:
+        date (str): La date chargée, au format 'YYYY-MM-DD'.
+        datasets (dict): Lignes par jeu de données, par exemple `{"sales": [...], "retail_data": [...]}`.
+        conn (sqlite3.Connection, optional): Connexion à utiliser. Par défaut, celle du thread courant.
+        before_commit (callable, optional): Appelé dans la transaction, avant l'enregistrement des versions,
+            par exemple pour publier la version des partitions (`partition_store.publish_version`).
+    """
+    conn = conn or get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for name, rows in datasets.items():
+            conn.execute(f"DELETE FROM {name} WHERE {TABLES[name]['date_column']} = ?", (date,))
+            _insert_rows(conn, name, rows)
+        # La version publiée pendant la transaction est celle enregistrée : un lecteur qui la voit avant la
+        # validation attend celle-ci dans `sync_from_json` au lieu de recharger la table
+        if before_commit is not None:
+            before_commit()
+        for name in datasets:
+            _set_version(conn, name, dataset_version(name))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _read_source(name):
+    if partition_store.is_partitioned(name):
+        return [row for date in partition_store.list_dates(name) for row in partition_store.read_partitions(name, date)]
+    with open(dataset_path(name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sync_from_json(name, conn=None):
+    """
+    Recharge une table depuis sa source (partitions ou fichier JSON) si celle-ci a changé depuis le dernier
+    chargement.
+
+    Args:
+        name (str): Nom du jeu de données.
+        conn (sqlite3.Connection, optional): Connexion à utiliser. Par défaut, celle du thread courant.
+
+    Returns:
+        bool: True si la table a été rechargée.
+
+    Raises:
+        FileNotFoundError: Si la source est introuvable et que la table n'a jamais été chargée.
+    """
+    conn = conn or get_connection()
+    # La version des partitions fait foi sur un ancien fichier JSON resté d'avant la migration (voir `data_store`)
+    if partition_store.is_partitioned(name) or os.path.exists(dataset_path(name)):
+        version = dataset_version(name)
+    else:
+        version = None
+    loaded = conn.execute("SELECT version FROM dataset_versions WHERE name = ?", (name,)).fetchone()
+    if version is None:
+        # Fichier supprimé (nettoyage du pipeline) : la base continue de servir les données chargées
+        if loaded is None:
+            raise FileNotFoundError(dataset_path(name))
+        return False
+    if loaded is not None and loaded[0] == version:
+        return False
+
+    with _sync_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Un autre thread, ou le générateur (`load_day`), a pu charger la table pendant l'attente des verrous
+            version = dataset_version(name)
+            loaded = conn.execute("SELECT version FROM dataset_versions WHERE name = ?", (name,)).fetchone()
+            if loaded is not None and loaded[0] == version:
+                conn.execute("COMMIT")
+                return False
+            rows = _read_source(name)
+            conn.execute(f"DELETE FROM {name}")
+            _insert_rows(conn, name, rows)
+            _set_version(conn, name, version)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return True
+
+
+def loaded_versions(conn=None):
+    """
+    Retourne la version du fichier JSON chargée dans chaque table de la base.
+
+    Args:
+        conn (sqlite3.Connection, optional): Connexion à utiliser. Par défaut, celle du thread courant.
+
+    Returns:
+        dict: Versions par jeu de données (uniquement les tables déjà chargées).
+    """
+    conn = conn or get_connection()
+    return dict(conn.execute("SELECT name, version FROM dataset_versions").fetchall())
+
+
+@contextmanager
+def snapshot(conn=None):
+    """
+    Ouvre une transaction de lecture : toutes les requêtes exécutées dans le bloc voient le même état de la
+    base, même si un chargement est validé entre-temps. Les tables sont à synchroniser avant (`sync_from_json`)
+    et à lire avec `select(..., sync=False)`.
+
+    Args:
+        conn (sqlite3.Connection, optional): Connexion à utiliser. Par défaut, celle du thread courant.
+
+    Yields:
+        sqlite3.Connection: Connexion portant la transaction de lecture.
+    """
+    conn = conn or get_connection()
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.execute("COMMIT")
+
+
+def select(name, where="1 = 1", params=(), order_by=None, columns=None, sync=True, limit=None):
+    """
+    Exécute une requête paramétrée sur une table et retourne les lignes au format des fichiers JSON.
+
+    Args:
+        name (str): Nom du jeu de données.
+        where (str): Clause WHERE avec des paramètres `?`. Par défaut, toutes les lignes.
+        params (sequence): Valeurs des paramètres de la clause WHERE.
+        order_by (str, optional): Clause ORDER BY. Par défaut, ordre d'insertion.
+        columns (list, optional): Colonnes à lire, parmi les colonnes servies. Par défaut, toutes.
+        sync (bool): Si False, la table n'est pas resynchronisée avec son fichier JSON (lecture dans un
+            `snapshot`). Par défaut, True.
+        limit (int, optional): Nombre maximal de lignes lues (avec `order_by`, une page). Par défaut, toutes.
+
+    Returns:
+        list: Lignes sélectionnées, sous forme de dictionnaires (sans les colonnes dérivées).
+
+    Raises:
+        FileNotFoundError: Si le jeu de données n'a jamais été chargé et que son fichier JSON est introuvable.
+    """
+    conn = get_connection()
+    if sync:
+        with timed("load"):
+            sync_from_json(name, conn)
+    spec = TABLES[name]
+    # Les noms de colonnes ne sont jamais interpolés tels quels : seules les colonnes connues sont retenues
+    columns = [column for column in (columns or spec["columns"]) if column in spec["columns"]]
+    query = f"SELECT {', '.join(columns)} FROM {name} WHERE {where}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params = tuple(params) + (limit,)
+    with timed("filter"):
+        rows = [dict(zip(columns, values)) for values in conn.execute(query, tuple(params))]
+        for column in (column for column in spec["booleans"] if column in columns):
+            for row in rows:
+                row[column] = bool(row[column])
+    return rows
+
+
+def count(name, where="1 = 1", params=()):
+    """
+    Compte les lignes d'une table correspondant à une clause WHERE paramétrée.
+
+    Args:
+        name (str): Nom du jeu de données.
+        where (str): Clause WHERE avec des paramètres `?`. Par défaut, toutes les lignes.
+        params (sequence): Valeurs des paramètres de la clause WHERE.
+
+    Returns:
+        int: Nombre de lignes.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données n'a jamais été chargé et que son fichier JSON est introuvable.
+    """
+    conn = get_connection()
+    with timed("load"):
+        sync_from_json(name, conn)
+    with timed("filter"):
+        return conn.execute(f"SELECT COUNT(*) FROM {name} WHERE {where}", tuple(params)).fetchone()[0]
+
+
+def aggregate(name, keys, measures, where="1 = 1", params=()):
+    """
+    Agrège une table avec `GROUP BY`, en s'appuyant sur les index des colonnes filtrées.
+
+    Args:
+        name (str): Nom du jeu de données.
+        keys (list): Colonnes de regroupement (colonnes servies ou dérivées de la table).
+        measures (list): Mesures `(nom_en_sortie, fonction, colonne)` (voir `src.api.routes.aggregation`).
+        where (str): Clause WHERE avec des paramètres `?`. Par défaut, toutes les lignes.
+        params (sequence): Valeurs des paramètres de la clause WHERE.
+
+    Returns:
+        list: Une ligne par groupe, triée sur les clés.
+
+    Raises:
+        FileNotFoundError: Si le jeu de données n'a jamais été chargé et que son fichier JSON est introuvable.
+    """
+    functions = {"sum": "SUM({})", "count": "COUNT({})", "count_distinct": "COUNT(DISTINCT {})"}
+    conn = get_connection()
+    with timed("load"):
+        sync_from_json(name, conn)
+    selected = keys + [f"{functions[function].format(column)} AS {output}" for output, function, column in measures]
+    group_by = ", ".join(keys)
+    query = f"SELECT {', '.join(selected)} FROM {name} WHERE {where} GROUP BY {group_by} ORDER BY {group_by}"
+    outputs = keys + [output for output, _, _ in measures]
+    with timed("filter"):
+        return [dict(zip(outputs, values)) for values in conn.execute(query, tuple(params))]
+
+
+# Chargement manuel des jeux de données depuis les fichiers JSON
+if __name__ == "__main__":
+    for dataset in sys.argv[1:] or TABLES:
+        reloaded = sync_from_json(dataset)
+        print(f"{dataset}: {'loaded' if reloaded else 'already up to date'} in {DB_PATH}")
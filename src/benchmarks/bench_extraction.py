@@ -0,0 +1,123 @@
+"""
+Benchmark de la récupération des ventes magasin par magasin par l'extraction.
+
+Génère un jeu de données synthétique (voir `load_test`), démarre l'api avec uvicorn, puis récupère les
+ventes d'une journée avec une requête par magasin :
+- en mode séquentiel : `fetch_from_api` appelé magasin après magasin ;
+- en mode concurrent : `fetch_many_from_api`, pour chaque niveau de concurrence demandé.
+
+Le rapport JSON donne, pour chaque mode, la durée, le débit (magasins et ventes par seconde) et le gain
+par rapport au mode séquentiel.
+
+Usage :
+    python -m src.benchmarks.bench_extraction --stores 50 --concurrency 4 8 16 --workers 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src.schemas import SaleDataResponse
+from src.benchmarks.load_test import free_port, generate_dataset, start_server, wait_until_ready
+from src.data_processing.extract.utils import fetch_from_api, fetch_many_from_api
+
+
+def measure(label, fetch, num_stores, repeat):
+    """
+    Mesure la meilleure durée d'une récupération de toutes les ventes de la journée.
+
+    Args:
+        label (str): Nom du mode mesuré.
+        fetch (callable): Récupération renvoyant la liste des résultats par magasin.
+        num_stores (int): Nombre de magasins interrogés.
+        repeat (int): Nombre de répétitions.
+
+    Returns:
+        dict: Mode, durée (ms), nombre de ventes, erreurs et débits.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = fetch()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    errors = sum(isinstance(result, Exception) for result in results)
+    sales = sum(len(result) for result in results if not isinstance(result, Exception))
+    return {
+        "mode": label,
+        "duration_ms": round(best * 1000, 1),
+        "sales": sales,
+        "errors": errors,
+        "stores_per_s": round(num_stores / best, 1),
+        "sales_per_s": round(sales / best),
+    }
+
+
+def sequential(urls):
+    results = []
+    for url in urls:
+        try:
+            results.append(fetch_from_api(url, schema=SaleDataResponse))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def run(args):
+    """
+    Génère les données, démarre le serveur et mesure chaque mode de récupération.
+
+    Args:
+        args (argparse.Namespace): Options de la ligne de commande.
+
+    Returns:
+        dict: Rapport JSON (configuration et résultats par mode).
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_extraction_") as work_dir:
+        dataset = generate_dataset(os.path.join(work_dir, "data_api"), args.stores, 1, args.sales_per_store)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(work_dir, port, args.backend, args.workers)
+        try:
+            wait_until_ready(base_url, server)
+            sale_date = dataset["dates"][0]
+            urls = [f"{base_url}/sales?sale_date={sale_date}&store_id={store_id}" for store_id in dataset["store_ids"]]
+            # Premier passage non mesuré : conversions Arrow, chargement SQLite, caches du système
+            sequential(urls)
+            results = [measure("sequential", lambda: sequential(urls), len(urls), args.repeat)]
+            for concurrency in args.concurrency:
+                results.append(measure(
+                    f"concurrent x{concurrency}",
+                    lambda: fetch_many_from_api(urls, schema=SaleDataResponse, max_concurrency=concurrency),
+                    len(urls),
+                    args.repeat,
+                ))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    baseline = results[0]["duration_ms"]
+    for result in results:
+        result["speedup"] = round(baseline / result["duration_ms"], 2)
+    return {
+        "config": {"backend": args.backend, "workers": args.workers, "stores": args.stores,
+                   "sales": dataset["num_sales"]},
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent per-store sales extraction.")
+    parser.add_argument("--backend", default="json", choices=["json", "arrow", "sqlite"])
+    parser.add_argument("--workers", type=int, default=1, help="Number of uvicorn workers.")
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--sales-per-store", type=int, default=500, help="Sales per store.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode, the best one is reported.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(parse_args()), indent=2))
@@ -0,0 +1,140 @@
+"""
+Benchmark de la sérialisation des réponses de l'api.
+
+Compare, pour 10 000 et 100 000 lignes de ventes :
+- l'ancien chemin : validation de chaque ligne par FastAPI contre `List[Union[SaleDataResponse, ErrorResponse]]`,
+  puis `jsonable_encoder` et `json.dumps` (ce que fait `JSONResponse`) ;
+- le chemin rapide : sérialisation directe avec msgspec (`json_response`) ;
+- la route `GET /sales` de bout en bout, via l'application ASGI ;
+- côté extraction, le décodage du corps JSON : `json.loads` (dictionnaires non validés) contre le décodage
+  typé et validé avec le schéma partagé (`src.schemas.decode_rows`).
+
+Usage :
+    python -m src.benchmarks.bench_serialization [nb_lignes ...]
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from typing import List
+from unittest.mock import patch
+
+from fastapi.encoders import jsonable_encoder
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+
+from src.api.main import app
+from src.schemas import SaleDataResponse, decode_rows
+from src.api.routes.responses import json_response
+from src.api.routes.sales_route import SaleResponse
+
+DEFAULT_SIZES = [10_000, 100_000]
+REPEAT = 3
+
+
+def make_sales(num_rows, sale_date="2024-12-14", store_id="store_1"):
+    """
+    Génère des lignes de ventes synthétiques au format de 'sales.json'.
+
+    Args:
+        num_rows (int): Nombre de lignes à générer.
+        sale_date (str): Date des ventes.
+        store_id (str): Identifiant du magasin.
+
+    Returns:
+        list: Lignes de ventes.
+    """
+    return [
+        {
+            "sale_id": str(uuid.uuid4()),
+            "nb_type_product": random.randint(1, 5),
+            "product_id": str(uuid.uuid4()),
+            "client_id": str(uuid.uuid4()),
+            "store_id": store_id,
+            "quantity": random.randint(1, 5),
+            "sale_amount": round(random.uniform(1, 500), 2),
+            "sale_date": sale_date,
+            "sale_time": f"{random.randint(7, 21):02}:{random.randint(0, 59):02}:{random.randint(0, 59):02}",
+        }
+        for _ in range(num_rows)
+    ]
+
+
+def best_of(func):
+    """
+    Exécute une fonction plusieurs fois et retourne la meilleure durée.
+
+    Args:
+        func (callable): Fonction à mesurer.
+
+    Returns:
+        float: Meilleure durée en millisecondes.
+    """
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def validated_path(rows, adapter):
+    """
+    Reproduit le chemin FastAPI par défaut : validation ligne par ligne puis encodage JSON.
+    """
+    validated = adapter.validate_python(rows)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode("utf-8")
+
+
+async def end_to_end(rows):
+    """
+    Mesure la route `GET /sales` de bout en bout avec des données injectées.
+
+    Args:
+        rows (list): Lignes de ventes renvoyées par `load_sales`.
+
+    Returns:
+        float: Meilleure durée en millisecondes.
+    """
+    timings = []
+    with patch("src.api.routes.sales_route.load_sales", return_value=rows):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                response = await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+                response.raise_for_status()
+                timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def run(sizes):
+    """
+    Lance le benchmark pour chaque taille et affiche les résultats.
+
+    Args:
+        sizes (list): Nombres de lignes à tester.
+    """
+    adapter = TypeAdapter(List[SaleResponse])
+    print(
+        f"{'rows':>8} | {'validated (ms)':>15} | {'msgspec (ms)':>12} | {'speedup':>8} | {'GET /sales (ms)':>16} | "
+        f"{'json.loads (ms)':>16} | {'typed decode (ms)':>18}"
+    )
+    for size in sizes:
+        rows = make_sales(size)
+        slow = best_of(lambda: validated_path(rows, adapter))
+        fast = best_of(lambda: json_response(rows))
+        route = asyncio.run(end_to_end(rows))
+        body = json_response(rows).body
+        untyped = best_of(lambda: json.loads(body))
+        typed = best_of(lambda: decode_rows(body, SaleDataResponse))
+        print(
+            f"{size:>8} | {slow:>15.1f} | {fast:>12.1f} | {slow / fast:>7.1f}x | {route:>16.1f} | "
+            f"{untyped:>16.1f} | {typed:>18.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
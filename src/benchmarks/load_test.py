@@ -0,0 +1,363 @@
+"""
+Test de charge de l'api.
+
+Génère un jeu de données synthétique de taille configurable dans un répertoire de travail temporaire,
+démarre `src.api.main:app` avec uvicorn dans un processus séparé (backend et nombre de workers au choix),
+puis envoie un trafic mixte (magasins, produits, clients, ventes, données retail, synthèses) à plusieurs
+niveaux de concurrence. Chaque niveau dure un temps fixe ; le rapport JSON donne, globalement et par
+route, le débit (requêtes par seconde), le nombre d'erreurs et les latences p50, p95 et p99.
+
+Un rapport précédent peut être fourni comme référence : le script signale les routes dont la latence
+p95 ou le débit se sont dégradés au-delà d'une tolérance, et se termine avec le code 1 le cas échéant.
+
+Usage :
+    python -m src.benchmarks.load_test --backend arrow --concurrency 1 8 32 --output arrow.json
+    python -m src.benchmarks.load_test --backend sqlite --baseline arrow.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+import httpx
+
+from src.api import partition_store
+from src.benchmarks.bench_serialization import make_sales
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CITIES = ["Paris", "Lyon", "Marseille", "Nice", "Lille", "Nantes"]
+STARTUP_TIMEOUT = 120
+
+# Trafic mixte : (route, poids, construction des paramètres à partir du jeu de données)
+TRAFFIC_MIX = [
+    ("/stores", 1, lambda data: {}),
+    ("/products", 1, lambda data: {}),
+    ("/clients", 1, lambda data: {"city": random.choice(CITIES)}),
+    ("/sales", 4, lambda data: {"sale_date": random.choice(data["dates"]),
+                                "store_id": random.choice(data["store_ids"])}),
+    ("/sales/hour", 2, lambda data: {"sale_date": random.choice(data["dates"]), "hour": random.randint(7, 21)}),
+    ("/sales/bulk", 1, lambda data: {"sale_date": random.choice(data["dates"]),
+                                     "store_ids": random.sample(data["store_ids"], min(3, len(data["store_ids"])))}),
+    ("/sales/summary", 2, lambda data: {"sale_date": random.choice(data["dates"])}),
+    ("/retail_data", 2, lambda data: {"date": random.choice(data["dates"])}),
+    ("/retail_data/summary", 1, lambda data: {"date": random.choice(data["dates"])}),
+]
+
+
+def generate_dataset(data_dir, num_stores, num_days, sales_per_store_day, start_date="2024-12-01"):
+    """
+    Écrit un jeu de données synthétique au format des fichiers de `data_api` : fichiers JSON complets (sources
+    des backends Arrow et SQLite) et partitions par date et par magasin (lues par le backend JSON).
+
+    Args:
+        data_dir (str): Répertoire de destination.
+        num_stores (int): Nombre de magasins.
+        num_days (int): Nombre de jours de données.
+        sales_per_store_day (int): Nombre de ventes par magasin et par jour.
+        start_date (str): Premier jour, au format 'YYYY-MM-DD'.
+
+    Returns:
+        dict: Dates, identifiants des magasins et nombre de ventes générés.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    first_day = date.fromisoformat(start_date)
+    dates = [(first_day + timedelta(days=i)).isoformat() for i in range(num_days)]
+    stores = [
+        {"id": f"store_{i}", "name": f"Magasin_{i}", "location": CITIES[i % len(CITIES)],
+         "capacity": 500, "opening_hour": "7", "closing_hour": "22"}
+        for i in range(1, num_stores + 1)
+    ]
+    products = [
+        {"id": str(uuid.uuid4()), "name": f"Produit_{i}", "category": "Catégorie",
+         "price": round(random.uniform(1, 100), 2), "cost": round(random.uniform(1, 50), 2)}
+        for i in range(200)
+    ]
+    clients = [
+        {"id": str(uuid.uuid4()), "name": f"Client_{i}", "age": random.randint(18, 80),
+         "gender": random.choice(["M", "F"]), "loyalty_card": random.random() < 0.5,
+         "city": CITIES[i % len(CITIES)]}
+        for i in range(max(1000, num_stores * 100))
+    ]
+    sales = []
+    retail_data = []
+    for day in dates:
+        for store in stores:
+            sales.extend(make_sales(sales_per_store_day, day, store["id"]))
+            retail_data.extend(
+                {"store_id": store["id"], "store_name": store["name"], "date": day, "hour": hour,
+                 "visitors": random.randint(0, 200), "sales": random.randint(0, 50)}
+                for hour in range(24)
+            )
+
+    for name, rows in (("stores", stores), ("products", products), ("clients", clients),
+                       ("sales", sales), ("retail_data", retail_data)):
+        with open(os.path.join(data_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False)
+    partition_store.write_partitions("sales", sales, data_dir)
+    partition_store.write_partitions("retail_data", retail_data, data_dir)
+    return {"dates": dates, "store_ids": [store["id"] for store in stores], "num_sales": len(sales)}
+
+
+def free_port():
+    """
+    Retourne un port TCP libre sur l'interface locale.
+
+    Returns:
+        int: Numéro de port.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(work_dir, port, backend, workers):
+    """
+    Démarre l'api avec uvicorn dans un processus séparé, le répertoire de travail contenant `data_api`.
+
+    Args:
+        work_dir (str): Répertoire de travail du serveur.
+        port (int): Port d'écoute.
+        backend (str): Backend de données (`json`, `arrow` ou `sqlite`).
+        workers (int): Nombre de workers uvicorn.
+
+    Returns:
+        subprocess.Popen: Processus du serveur.
+    """
+    env = dict(os.environ, API_DATA_BACKEND=backend, PYTHONPATH=REPO_ROOT)
+    command = [sys.executable, "-m", "uvicorn", "src.api.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=work_dir, env=env)
+
+
+def wait_until_ready(base_url, process, timeout=STARTUP_TIMEOUT):
+    """
+    Attend que l'api soit prête (`/health/ready`), en vérifiant que le processus du serveur ne s'est pas arrêté.
+
+    Args:
+        base_url (str): URL de l'api.
+        process (subprocess.Popen): Processus du serveur.
+        timeout (float): Délai maximal en secondes.
+
+    Raises:
+        RuntimeError: Si le serveur s'arrête ou ne répond pas dans le délai.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API server not ready after {timeout}s")
+
+
+def percentile(sorted_values, fraction):
+    """
+    Retourne un percentile (rang le plus proche) d'une liste triée.
+
+    Args:
+        sorted_values (list): Valeurs triées par ordre croissant.
+        fraction (float): Percentile entre 0 et 1.
+
+    Returns:
+        float: Valeur du percentile, None si la liste est vide.
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(latencies, errors, elapsed):
+    """
+    Calcule le débit et les percentiles de latence d'une série de requêtes.
+
+    Args:
+        latencies (list): Latences des requêtes, en secondes.
+        errors (int): Nombre de requêtes en erreur (statut HTTP >= 400 ou erreur de transport).
+        elapsed (float): Durée de la mesure, en secondes.
+
+    Returns:
+        dict: Nombre de requêtes, erreurs, débit et latences p50/p95/p99 en millisecondes.
+    """
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+        **{f"p{int(q * 100)}_ms": None if percentile(ordered, q) is None else round(percentile(ordered, q) * 1000, 2)
+           for q in (0.5, 0.95, 0.99)},
+    }
+
+
+async def run_level(base_url, dataset, concurrency, duration, seed):
+    """
+    Envoie un trafic mixte à un niveau de concurrence donné pendant une durée fixe.
+
+    Chaque client virtuel enchaîne les requêtes sans pause : la concurrence est le nombre de requêtes
+    en vol à tout instant.
+
+    Args:
+        base_url (str): URL de l'api.
+        dataset (dict): Dates et magasins du jeu de données.
+        concurrency (int): Nombre de clients virtuels.
+        duration (float): Durée de la mesure, en secondes.
+        seed (int): Graine du tirage des requêtes, pour rejouer le même trafic.
+
+    Returns:
+        dict: Synthèse globale et par route.
+    """
+    random.seed(seed)
+    routes = [route for route, _, _ in TRAFFIC_MIX]
+    weights = [weight for _, weight, _ in TRAFFIC_MIX]
+    builders = {route: build for route, _, build in TRAFFIC_MIX}
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def virtual_client():
+            while time.perf_counter() < deadline:
+                route = random.choices(routes, weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = await client.get(route, params=builders[route](dataset))
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies[route].append(time.perf_counter() - start)
+                errors[route] += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        **summarize(all_latencies, sum(errors.values()), elapsed),
+        "routes": {route: summarize(latencies[route], errors[route], elapsed) for route in routes if latencies[route]},
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compare un rapport à un rapport de référence, route par route et niveau par niveau.
+
+    Args:
+        report (dict): Rapport courant.
+        baseline (dict): Rapport de référence.
+        tolerance (float): Dégradation relative acceptée (0.2 = 20 %).
+
+    Returns:
+        list: Descriptions des régressions (latence p95 plus élevée ou débit plus faible).
+    """
+    regressions = []
+    reference = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in report["levels"]:
+        previous = reference.get(level["concurrency"])
+        if previous is None:
+            continue
+        for route, stats in level["routes"].items():
+            old = previous["routes"].get(route)
+            if old is None:
+                continue
+            if old["p95_ms"] and stats["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{route} @ {level['concurrency']}: p95 {old['p95_ms']} ms -> {stats['p95_ms']} ms"
+                )
+            if stats["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{route} @ {level['concurrency']}: throughput {old['throughput_rps']} -> "
+                    f"{stats['throughput_rps']} req/s"
+                )
+    return regressions
+
+
+def run(args):
+    """
+    Génère les données, démarre le serveur, mesure chaque niveau de concurrence et construit le rapport.
+
+    Args:
+        args (argparse.Namespace): Options de la ligne de commande.
+
+    Returns:
+        dict: Rapport JSON (configuration et résultats par niveau de concurrence).
+    """
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory(prefix="load_test_") as work_dir:
+        dataset = generate_dataset(os.path.join(work_dir, "data_api"), args.stores, args.days, args.sales_per_store)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(work_dir, port, args.backend, args.workers)
+        try:
+            wait_until_ready(base_url, server)
+            # Premier passage non mesuré : conversions Arrow, chargement SQLite, caches du système
+            asyncio.run(run_level(base_url, dataset, 1, args.warmup, args.seed))
+            levels = [asyncio.run(run_level(base_url, dataset, concurrency, args.duration, args.seed))
+                      for concurrency in args.concurrency]
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {
+        "config": {
+            "backend": args.backend,
+            "workers": args.workers,
+            "stores": args.stores,
+            "days": args.days,
+            "sales": dataset["num_sales"],
+            "duration_s": args.duration,
+            "seed": args.seed,
+        },
+        "levels": levels,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the retail insights API with mixed traffic.")
+    parser.add_argument("--backend", default="json", choices=["json", "arrow", "sqlite"])
+    parser.add_argument("--workers", type=int, default=1, help="Number of uvicorn workers.")
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--sales-per-store", type=int, default=500, help="Sales per store and per day.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before the first level.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Accepted relative degradation.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    result = run(options)
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as output:
+            json.dump(result, output, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if options.baseline:
+        with open(options.baseline, "r", encoding="utf-8") as f:
+            found = compare(result, json.load(f), options.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
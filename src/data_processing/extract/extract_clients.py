@@ -49,7 +49,7 @@ def fetch_and_save_clients(is_test=False):
     for city in cities:
         url = f"{base_url}/clients?city={city}"
         try:
-            data = fetch_from_api(url, is_test=is_test)
+            data = fetch_from_api(url, is_test=is_test, conditional=True)
             if data:
                 all_clients.extend(data)
                 extraction_logger.info(f"Successfully extracted {len(data)} clients for city {city}.")
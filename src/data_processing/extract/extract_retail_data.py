@@ -1,12 +1,15 @@
+import io
 import sys
 from datetime import datetime
 
 import pandas as pd
-from utils import fetch_from_api, read_parquet_from_s3, save_to_s3
+from src.data_processing.extract.utils import (fetch_changes_from_api, fetch_columnar_from_api, read_parquet_from_s3,
+                                               read_watermark, save_to_s3, write_watermark)
 from src.data_processing.extract.logger_extraction import extraction_logger
 
 # Paramètres S3
 S3_FOLDER = "extracted_data/retail_data"
+WATERMARK_KEY = f"{S3_FOLDER}/_watermark.json"
 
 
 def fetch_and_save_retail_data(date):
@@ -24,8 +27,10 @@ def fetch_and_save_retail_data(date):
     extraction_logger.info(f"Starting retail data extraction for date {date}.")
 
     try:
-        new_data = fetch_from_api(url)  # Récupère les nouvelles données depuis l'api
-        if new_data:
+        # Récupère les nouvelles données depuis l'api, au format Parquet
+        body = fetch_columnar_from_api(url)
+        new_data = pd.read_parquet(io.BytesIO(body)) if body else pd.DataFrame()
+        if not new_data.empty:
             extraction_logger.info(f"Successfully fetched retail data for date {date}, {len(new_data)} records.")
 
             # Formater la date pour nommer le fichier
@@ -38,15 +43,16 @@ def fetch_and_save_retail_data(date):
                 if existing_data is not None:
                     # Ajouter les nouvelles données aux anciennes
                     updated_data = pd.concat(
-                        [existing_data, pd.DataFrame(new_data)], ignore_index=True
+                        [existing_data, new_data], ignore_index=True
                     )
                     updated_data.drop_duplicates(inplace=True)
                 else:
-                    updated_data = pd.DataFrame(new_data)
+                    updated_data = new_data
                 extraction_logger.info(f"Existing data loaded and merged for date {date}.")
             except Exception as e:
                 extraction_logger.warning(f"No existing data found for date {date}. Creating a new file: {e}")
-                updated_data = pd.DataFrame(new_data)
+                # Rien à fusionner : le fichier Parquet renvoyé par l'api est transmis tel quel
+                updated_data = body
 
             # Sauvegarder les données mises à jour sur S3
             save_to_s3(updated_data, s3_key)
@@ -59,9 +65,51 @@ def fetch_and_save_retail_data(date):
         raise
 
 
+def fetch_and_save_retail_data_changes():
+    """
+    Extrait uniquement les données retail publiées depuis la dernière extraction, à partir du journal
+    des modifications.
+
+    Chaque lot reçu est écrit dans un nouveau fichier Parquet de la partition de sa date, nommé d'après
+    sa séquence, sans relecture des données déjà extraites. Le watermark conservé sur S3 n'avance
+    qu'une fois le lot sauvegardé.
+
+    Returns:
+        int: Dernière séquence extraite.
+
+    Raises:
+        Exception: Si une erreur survient lors de la récupération ou de l'écriture sur S3.
+    """
+    since = read_watermark(WATERMARK_KEY)
+    extraction_logger.info(f"Starting incremental retail data extraction from sequence {since}.")
+
+    for page in fetch_changes_from_api("http://127.0.0.1:8000/retail_data/changes", since):
+        if page["rows"]:
+            retail_data = pd.DataFrame(page["rows"])
+            for day_str, day_data in retail_data.groupby("date"):
+                s3_key = f"{S3_FOLDER}/date={day_str}/retail_data_{day_str}_{page['sequence']:012d}.parquet"
+                save_to_s3(day_data, s3_key)
+                extraction_logger.info(f"{len(day_data)} new retail records saved to S3 at '{s3_key}'.")
+        if page["sequence"] != since:
+            since = page["sequence"]
+            write_watermark(WATERMARK_KEY, since)
+
+    extraction_logger.info(f"Incremental retail data extraction completed up to sequence {since}.")
+    return since
+
+
 # Point d'entrée pour exécuter la récupération et la sauvegarde des données retail_data.
-# L'utilisateur doit fournir une date au format 'YYYY-MM-DD' en argument.
+# L'utilisateur doit fournir une date au format 'YYYY-MM-DD' en argument, ou `--changes` pour
+# n'extraire que les données publiées depuis la dernière extraction.
 if __name__ == "__main__":
+    if sys.argv[1:] == ["--changes"]:
+        try:
+            fetch_and_save_retail_data_changes()
+        except Exception as e:
+            extraction_logger.critical(f"Incremental retail data extraction failed: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
     if len(sys.argv) != 2:
         extraction_logger.error("Date parameter missing. Use format 'YYYY-MM-DD'.")
         print("Vous devez renseigner une date en argument (format : YYYY-MM-DD)")
@@ -1,17 +1,29 @@
+import io
 import json
 import os
 import sys
+import time
 from datetime import datetime
 
 import pandas as pd
 
-from src.data_processing.extract.utils import (fetch_from_api,
+from src.schemas import SaleDataResponse
+from src.data_processing.extract.utils import (EXPORT_DOWNLOAD_DIR,
+                                               download_from_api,
+                                               fetch_changes_from_api,
+                                               fetch_columnar_from_api,
+                                               fetch_from_api,
+                                               fetch_many_from_api,
                                                read_parquet_from_s3,
-                                               save_to_s3)
+                                               read_watermark,
+                                               rows_to_frame,
+                                               save_to_s3,
+                                               write_watermark)
 from src.data_processing.extract.logger_extraction import extraction_logger
 
 # Paramètres S3
 S3_FOLDER = "extracted_data/sales"
+WATERMARK_KEY = f"{S3_FOLDER}/_watermark.json"
 
 
 def fetch_stores():
@@ -40,33 +52,145 @@ def fetch_stores():
     return stores
 
 
-def fetch_and_save_sales(date):
+def fetch_sales_bulk(date):
+    """
+    Récupère en une seule requête les ventes de tous les magasins pour une date donnée.
+
+    Les ventes sont demandées au format Parquet et lues directement en colonnes,
+    sans décodage JSON ligne par ligne.
+
+    Args:
+        date (str): La date pour laquelle récupérer les données, au format 'YYYY-MM-DD'.
+
+    Returns:
+        pd.DataFrame: Ventes de la date (vide si aucune vente n'existe).
+
+    Raises:
+        Exception: Si la requête vers l'api échoue.
+    """
+    url = f"http://127.0.0.1:8000/sales/bulk?sale_date={date}"
+    body = fetch_columnar_from_api(url)
+    # La route renvoie un message d'erreur JSON (et non une exception) lorsqu'aucune vente n'existe
+    if body is None:
+        return pd.DataFrame()
+    sales = pd.read_parquet(io.BytesIO(body))
+    extraction_logger.info(f"Fetched {len(sales)} sales for all stores in one request.")
+    return sales
+
+
+def fetch_sales_export(date):
+    """
+    Télécharge l'export journalier des ventes (fichier Parquet pré-calculé par l'api) pour une date donnée.
+
+    Le fichier est copié depuis le disque de l'api sans sérialisation ; un téléchargement interrompu
+    reprend là où il s'est arrêté lors de l'exécution suivante.
+
+    Args:
+        date (str): La date pour laquelle récupérer les données, au format 'YYYY-MM-DD'.
+
+    Returns:
+        pd.DataFrame: Ventes de la date.
+
+    Raises:
+        Exception: Si l'export est indisponible ou si le téléchargement échoue.
+    """
+    url = f"http://127.0.0.1:8000/exports/sales/{date}.parquet"
+    output_file = download_from_api(url, os.path.join(EXPORT_DOWNLOAD_DIR, "sales", f"{date}.parquet"))
+    sales = pd.read_parquet(output_file)
+    extraction_logger.info(f"Fetched {len(sales)} sales from the daily export.")
+    return sales
+
+
+def fetch_sales_per_store(date, concurrent=False):
+    """
+    Récupère les ventes magasin par magasin pour une date donnée (une requête par magasin).
+
+    Les ventes sont décodées et validées avec le schéma partagé de l'api. Les erreurs d'un magasin sont
+    journalisées sans interrompre la récupération des autres. En mode concurrent, les requêtes des magasins
+    sont envoyées en parallèle sur un pool de connexions (voir `fetch_many_from_api`) ; les ventes sont
+    assemblées dans l'ordre des magasins, comme en mode séquentiel. Le débit obtenu est journalisé.
+
+    Args:
+        date (str): La date pour laquelle récupérer les données, au format 'YYYY-MM-DD'.
+        concurrent (bool): Si True, interroge les magasins en parallèle. Par défaut, False.
+
+    Returns:
+        list: Liste des ventes récupérées (instances de `SaleDataResponse`).
+    """
+    stores = fetch_stores()
+    urls = [f"http://127.0.0.1:8000/sales?sale_date={date}&store_id={store}" for store in stores]
+    all_sales = []
+    start = time.perf_counter()
+
+    if concurrent:
+        results = fetch_many_from_api(urls, schema=SaleDataResponse)
+    else:
+        results = []
+        for url in urls:
+            try:
+                results.append(fetch_from_api(url, schema=SaleDataResponse))
+            except Exception as e:
+                results.append(e)
+
+    # Assembler les ventes dans l'ordre des magasins (chaque échec est déjà journalisé par la récupération)
+    failed = []
+    for store, data in zip(stores, results):
+        if isinstance(data, Exception):
+            failed.append(store)
+            continue
+        if data:
+            all_sales.extend(data)
+            extraction_logger.info(f"Fetched {len(data)} sales for store {store}.")
+
+    if failed:
+        extraction_logger.warning(f"Sales of {len(failed)} stores were not fetched: {', '.join(failed)}.")
+
+    elapsed = max(time.perf_counter() - start, 1e-6)
+    extraction_logger.info(
+        f"Fetched {len(all_sales)} sales from {len(stores)} stores in {elapsed:.2f}s "
+        f"({'concurrent' if concurrent else 'sequential'}: {len(stores) / elapsed:.1f} stores/s, "
+        f"{len(all_sales) / elapsed:.0f} sales/s)."
+    )
+    return all_sales
+
+
+def fetch_and_save_sales(date, bulk=True, export=False, concurrent=False):
     """
     Récupère les données de ventes pour une date donnée et les sauvegarde sur S3.
 
+    Par défaut, les ventes de tous les magasins sont récupérées en une seule requête sur `/sales/bulk`.
+    Si cette requête échoue, la récupération repasse magasin par magasin. Avec `export`, l'export journalier
+    pré-calculé (`/exports/sales/<date>.parquet`) est téléchargé en priorité.
+
     Args:
         date (str): La date pour laquelle récupérer les données, au format 'YYYY-MM-DD'.
+        bulk (bool): Si True, utilise la route `/sales/bulk`. Par défaut, True.
+        export (bool): Si True, télécharge d'abord l'export journalier. Par défaut, False.
+        concurrent (bool): Si True, la récupération magasin par magasin interroge les magasins en parallèle.
+            Par défaut, False.
 
     Raises:
         Exception: Si une erreur inattendue survient lors de la lecture ou de l'écriture sur S3.
     """
     extraction_logger.info(f"Starting sales data extraction for date {date}.")
-    stores = fetch_stores()
-    all_sales = []
+    all_sales = None
 
-    # Récupérer les données pour chaque magasin
-    for store in stores:
-        url = f"http://127.0.0.1:8000/sales?sale_date={date}&store_id={store}"
+    if export:
         try:
-            data = fetch_from_api(url)
-            if data:
-                all_sales.extend(data)
-                extraction_logger.info(f"Fetched {len(data)} sales for store {store}.")
+            all_sales = fetch_sales_export(date)
         except Exception as e:
-            extraction_logger.error(f"Error fetching sales for store {store}: {e}")
-            continue
+            extraction_logger.warning(f"Sales export download failed for date {date}, falling back to the API: {e}")
+
+    if bulk and all_sales is None:
+        try:
+            all_sales = fetch_sales_bulk(date)
+        except Exception as e:
+            extraction_logger.warning(f"Bulk sales fetch failed for date {date}, falling back to per-store: {e}")
+
+    if all_sales is None:
+        all_sales = rows_to_frame(fetch_sales_per_store(date, concurrent), SaleDataResponse)
 
-    if all_sales:
+    if not all_sales.empty:
         # Formater la date pour nommer le fichier
         day_str = pd.to_datetime(date).strftime("%Y-%m-%d")
         s3_key = f"{S3_FOLDER}/sale_date={day_str}/sales_{day_str}.parquet"
@@ -77,18 +201,18 @@ def fetch_and_save_sales(date):
             if existing_data is not None:
                 # Ajouter les nouvelles données aux anciennes
                 updated_data = pd.concat(
-                    [existing_data, pd.DataFrame(all_sales)], ignore_index=True
+                    [existing_data, all_sales], ignore_index=True
                 )
                 updated_data.drop_duplicates(inplace=True)
             else:
-                updated_data = pd.DataFrame(all_sales)
+                updated_data = all_sales
             extraction_logger.info(f"Existing data merged for date {date}.")
         except Exception as e:
             if "NoSuchKey" in str(e):
                 extraction_logger.warning(f"No existing data found for {s3_key}. Creating a new file.")
             else:
                 extraction_logger.error(f"Unexpected error while reading S3 data: {e}")
-            updated_data = pd.DataFrame(all_sales)
+            updated_data = all_sales
 
         try:
             # Sauvegarder les données mises à jour sur S3
@@ -101,9 +225,53 @@ def fetch_and_save_sales(date):
         extraction_logger.warning(f"No sales data retrieved for date {date}.")
 
 
+def fetch_and_save_sales_changes():
+    """
+    Extrait uniquement les ventes publiées depuis la dernière extraction, à partir du journal des modifications.
+
+    La dernière séquence extraite est conservée sur S3 (watermark). Chaque lot reçu est écrit dans un
+    nouveau fichier Parquet de la partition de sa date, nommé d'après sa séquence : aucune relecture ni
+    dédoublonnage des données déjà extraites n'est nécessaire. Le watermark n'avance qu'une fois le lot
+    sauvegardé ; une extraction interrompue reprend donc au même lot et réécrit les mêmes fichiers.
+
+    Returns:
+        int: Dernière séquence extraite.
+
+    Raises:
+        Exception: Si une erreur survient lors de la récupération ou de l'écriture sur S3.
+    """
+    since = read_watermark(WATERMARK_KEY)
+    extraction_logger.info(f"Starting incremental sales extraction from sequence {since}.")
+
+    for page in fetch_changes_from_api("http://127.0.0.1:8000/sales/changes", since):
+        if page["rows"]:
+            sales = pd.DataFrame(page["rows"])
+            for day_str, day_sales in sales.groupby("sale_date"):
+                s3_key = f"{S3_FOLDER}/sale_date={day_str}/sales_{day_str}_{page['sequence']:012d}.parquet"
+                save_to_s3(day_sales, s3_key)
+                extraction_logger.info(f"{len(day_sales)} new sales saved to S3 at '{s3_key}'.")
+        if page["sequence"] != since:
+            since = page["sequence"]
+            write_watermark(WATERMARK_KEY, since)
+
+    extraction_logger.info(f"Incremental sales extraction completed up to sequence {since}.")
+    return since
+
+
 # Point d'entrée pour exécuter la récupération et la sauvegarde des données de ventes.
-# L'utilisateur doit fournir une date en argument (format : 'YYYY-MM-DD').
+# L'utilisateur doit fournir une date en argument (format : 'YYYY-MM-DD'), suivie éventuellement de
+# `--export` pour télécharger l'export journalier, de `--per-store` pour interroger les magasins un par un
+# (avec `--concurrent` pour les interroger en parallèle), ou `--changes` pour n'extraire que les ventes
+# publiées depuis la dernière extraction.
 if __name__ == "__main__":
+    if sys.argv[1:] == ["--changes"]:
+        try:
+            fetch_and_save_sales_changes()
+        except Exception as e:
+            extraction_logger.critical(f"Incremental sales extraction failed: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
     if len(sys.argv) < 2:
         extraction_logger.error("Date parameter missing. Use format 'YYYY-MM-DD'.")
         print("Vous devez renseigner une date en argument (format : YYYY-MM-DD)")
@@ -115,7 +283,13 @@ if __name__ == "__main__":
         # Valider le format de la date
         date_obj = datetime.strptime(date_param, "%Y-%m-%d")
         extraction_logger.info(f"Received date parameter: {date_obj.strftime('%Y-%m-%d')}.")
-        fetch_and_save_sales(date_param)
+        options = sys.argv[2:]
+        fetch_and_save_sales(
+            date_param,
+            bulk="--per-store" not in options,
+            export="--export" in options,
+            concurrent="--concurrent" in options,
+        )
         extraction_logger.info(f"Sales data extraction process completed successfully for date {date_param}.")
     except ValueError:
         extraction_logger.error("Invalid date format. Use 'YYYY-MM-DD'.")
@@ -1,4 +1,5 @@
-from src.data_processing.extract.utils import fetch_from_api, save_to_s3
+from src.schemas import StoreDataResponse
+from src.data_processing.extract.utils import fetch_from_api, rows_to_frame, save_to_s3
 from src.data_processing.extract.logger_extraction import extraction_logger
 
 # Paramètres S3
@@ -16,12 +17,13 @@ def fetch_and_save_stores():
     extraction_logger.info("Starting store data extraction.")
 
     try:
-        data = fetch_from_api(url)  # Récupère les données depuis l'api
+        # Récupère (ou revalide) les données depuis l'api, décodées avec le schéma partagé
+        data = fetch_from_api(url, conditional=True, schema=StoreDataResponse)
         if data:
             extraction_logger.info(f"Successfully fetched {len(data)} stores from the API.")
 
             s3_key = f"{S3_FOLDER}/stores.parquet"  # Chemin dans S3
-            save_to_s3(data, s3_key)
+            save_to_s3(rows_to_frame(data, StoreDataResponse), s3_key)
             extraction_logger.info(f"Store data successfully saved to S3 at '{s3_key}'.")
         else:
             extraction_logger.warning("No store data retrieved from the API.")
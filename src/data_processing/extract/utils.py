@@ -1,10 +1,21 @@
+import asyncio
+import hashlib
 import io
+import json
 import os
 import tempfile
+import time
 
 import boto3
+import httpx
+import msgspec
 import pandas as pd
+import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
+from src.schemas import ErrorResponse, decode_rows
 from src.data_processing.extract.logger_extraction import extraction_logger
 
 # Charger les variables d'environnement
@@ -22,6 +33,159 @@ s3 = boto3.client(
 BUCKET_NAME = "retail-insights-bucket"
 S3_FOLDER = "extracted_data/sales"
 
+# Formats colonnaires proposés par l'api
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Encodages de compression demandés à l'api : seuls ceux que urllib3 sait décompresser
+# sont annoncés (zstd nécessite le paquet `zstandard`), la décompression reste ainsi transparente.
+ACCEPT_ENCODING = ", ".join(
+    encoding for encoding in ("zstd", "gzip") if encoding in HTTPResponse.CONTENT_DECODERS
+)
+# Client asynchrone : httpx 0.27 ne décompresse que gzip et deflate sans paquet optionnel (zstd n'est pris en
+# charge qu'à partir de httpx 0.28, br nécessite `brotli`, absent de requirements.txt)
+ASYNC_ACCEPT_ENCODING = "gzip"
+
+
+# Dossier local conservant le dernier ETag et le dernier corps reçus pour chaque URL
+ETAG_CACHE_DIR = os.getenv("API_ETAG_CACHE_DIR", os.path.join("data", "etag_cache"))
+# Dossier local des exports journaliers téléchargés depuis l'api
+EXPORT_DOWNLOAD_DIR = os.getenv("API_EXPORT_DOWNLOAD_DIR", os.path.join("data", "exports"))
+# Taille des blocs écrits sur disque lors d'un téléchargement (1 Mio)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Délais d'établissement de la connexion et de lecture d'une réponse (secondes)
+CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "60"))
+# Nombre maximal de requêtes simultanées (et de connexions gardées ouvertes) en mode concurrent
+MAX_CONCURRENT_REQUESTS = int(os.getenv("API_MAX_CONCURRENT_REQUESTS", "8"))
+# Nouvelles tentatives sur erreur de connexion ou réponse 5xx, espacées de façon exponentielle
+# (RETRY_BACKOFF_FACTOR x 2^(n-1) secondes avant la n-ième nouvelle tentative)
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
+RETRY_BACKOFF_FACTOR = float(os.getenv("API_RETRY_BACKOFF_FACTOR", "0.5"))
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def create_session(max_retries=MAX_RETRIES, backoff_factor=RETRY_BACKOFF_FACTOR, pool_size=MAX_CONCURRENT_REQUESTS):
+    """
+    Crée une session HTTP dont les connexions à l'api sont gardées ouvertes et réutilisées d'un appel à l'autre,
+    avec nouvelles tentatives automatiques des requêtes GET.
+
+    Les erreurs de connexion, délais de lecture dépassés et réponses 5xx sont retentés avec un délai croissant
+    (en respectant `Retry-After`). Une fois les tentatives épuisées, la dernière réponse 5xx est renvoyée à
+    l'appelant, qui la traite comme avant.
+
+    Args:
+        max_retries (int): Nombre maximal de nouvelles tentatives. Par défaut, `MAX_RETRIES`.
+        backoff_factor (float): Facteur du délai exponentiel. Par défaut, `RETRY_BACKOFF_FACTOR`.
+        pool_size (int): Nombre de connexions conservées par hôte. Par défaut, `MAX_CONCURRENT_REQUESTS`.
+
+    Returns:
+        requests.Session: Session configurée.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Session partagée par les appels à l'api du processus
+session = create_session()
+
+
+def api_get(url, **kwargs):
+    """
+    Envoie une requête GET à l'api avec la session partagée et journalise sa latence.
+
+    Les délais `CONNECT_TIMEOUT` et `READ_TIMEOUT` s'appliquent si aucun délai n'est fourni. En mode
+    `stream=True`, la latence mesurée est celle de la réception des en-têtes.
+
+    Args:
+        url (str): URL de l'api.
+        **kwargs: Arguments transmis à `requests.Session.get` (`headers`, `params`, `stream`...).
+
+    Returns:
+        requests.Response: Réponse reçue (après les éventuelles nouvelles tentatives).
+
+    Raises:
+        requests.RequestException: Si l'api reste injoignable après les nouvelles tentatives.
+    """
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    start = time.perf_counter()
+    try:
+        response = session.get(url, **kwargs)
+    except requests.RequestException as e:
+        extraction_logger.error(f"GET {url} failed after {(time.perf_counter() - start) * 1000:.1f} ms: {e}")
+        raise
+    extraction_logger.info(f"GET {url} -> {response.status_code} in {(time.perf_counter() - start) * 1000:.1f} ms.")
+    return response
+
+
+def _etag_cache_path(url):
+    """
+    Retourne le chemin du fichier de cache ETag associé à une URL.
+
+    Args:
+        url (str): URL de l'api.
+
+    Returns:
+        str: Chemin du fichier de cache.
+    """
+    return os.path.join(ETAG_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def load_cached_response(url):
+    """
+    Charge le dernier ETag et le dernier corps reçus pour une URL.
+
+    Args:
+        url (str): URL de l'api.
+
+    Returns:
+        dict: Dictionnaire `{"etag": ..., "body": ...}`.
+        None: Si aucune réponse n'est en cache ou si le cache est illisible.
+    """
+    try:
+        with open(_etag_cache_path(url), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def store_cached_response(url, etag, body):
+    """
+    Conserve localement l'ETag et le corps d'une réponse pour une revalidation ultérieure.
+
+    Args:
+        url (str): URL de l'api.
+        etag (str): ETag renvoyé par l'api.
+        body (list | dict): Corps JSON décodé de la réponse.
+    """
+    create_output_folder(ETAG_CACHE_DIR)
+    with open(_etag_cache_path(url), "w", encoding="utf-8") as f:
+        json.dump({"etag": etag, "body": body}, f, ensure_ascii=False)
+
+
+def log_transfer(url, response):
+    """
+    Journalise l'encodage et la taille transférée d'une réponse de l'api.
+
+    Args:
+        url (str): URL de l'api.
+        response (requests.Response): Réponse reçue.
+    """
+    encoding = response.headers.get("content-encoding", "identity")
+    transferred = response.headers.get("content-length", "unknown")
+    extraction_logger.info(f"Response from {url}: encoding={encoding}, transferred={transferred} bytes.")
+
 
 # Créer le dossier de sortie s'il n'existe pas
 def create_output_folder(folder_name="data"):
@@ -59,16 +223,24 @@ def save_with_pandas(data, output_file):
 
 
 # Récupérer des données depuis une api
-def fetch_from_api(url, is_test=False):
+def fetch_from_api(url, is_test=False, conditional=False, schema=None):
     """
     Récupère les données depuis une api via une requête HTTP GET.
 
+    En mode conditionnel, le dernier ETag reçu pour l'URL est renvoyé dans `If-None-Match` :
+    si l'api répond `304 Not Modified`, le corps conservé localement est réutilisé.
+
+    Avec `schema`, le corps (une liste de lignes) est décodé et validé en une seule passe avec le schéma
+    partagé (`src.schemas`), directement en instances typées.
+
     Args:
         url (str): URL de l'api.
         is_test (bool): Si True, simule une réponse pour les tests. Par défaut, False.
+        conditional (bool): Si True, revalide la dernière réponse connue via son ETag. Par défaut, False.
+        schema (type[msgspec.Struct], optional): Type des lignes attendues. Par défaut, None (décodage générique).
 
     Returns:
-        list | dict: Données récupérées depuis l'api.
+        list | dict: Données récupérées depuis l'api (instances de `schema` si un schéma est fourni).
 
     Raises:
         Exception: Si une erreur HTTP est rencontrée.
@@ -95,13 +267,24 @@ def fetch_from_api(url, is_test=False):
         mock_response.status_code = 200
         return mock_response.json()
     else:
-        import requests
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        cached = load_cached_response(url) if conditional else None
+        if cached:
+            headers["If-None-Match"] = cached["etag"]
 
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
+            response = api_get(url, headers=headers)
+            if response.status_code == 304 and cached:
+                extraction_logger.info(f"Data not modified at {url}, using cached copy.")
+                return cached["body"] if schema is None else msgspec.convert(cached["body"], list[schema])
+            elif response.status_code == 200:
+                log_transfer(url, response)
                 extraction_logger.info(f"Data fetched successfully from {url}.")
-                return response.json()
+                body = response.json() if schema is None else decode_typed(url, response.content, schema)
+                etag = response.headers.get("ETag")
+                if conditional and etag:
+                    store_cached_response(url, etag, msgspec.to_builtins(body))
+                return body
             else:
                 extraction_logger.error(f"Error fetching data from {url}: {response.status_code}")
                 raise Exception(f"Error fetching data from {url}: {response.status_code}")
@@ -110,15 +293,397 @@ def fetch_from_api(url, is_test=False):
             raise
 
 
+def decode_typed(url, body, schema):
+    """
+    Décode une liste de lignes typées renvoyée par l'api.
+
+    Certaines routes signalent un problème (fichier de données absent, aucune donnée pour le magasin) par une
+    liste contenant un message d'erreur (`[{"error": "..."}]`) : le message est renvoyé dans l'exception, qui
+    est journalisée par l'appelant comme toute requête en échec, au lieu d'être confondu avec une liste vide.
+
+    Args:
+        url (str): URL de l'api.
+        body (bytes): Corps JSON de la réponse.
+        schema (type[msgspec.Struct]): Type des lignes attendues.
+
+    Returns:
+        list: Lignes décodées, instances de `schema`.
+
+    Raises:
+        Exception: Si l'api renvoie un message d'erreur ou si le corps ne respecte pas le schéma.
+    """
+    try:
+        return decode_rows(body, schema)
+    except msgspec.ValidationError as e:
+        try:
+            errors = decode_rows(body, ErrorResponse)
+        except msgspec.ValidationError:
+            raise Exception(f"Invalid {schema.__name__} payload from {url}: {e}")
+        raise Exception(f"API error from {url}: {'; '.join(error.error for error in errors)}")
+
+
+def rows_to_frame(rows, schema):
+    """
+    Construit un DataFrame à partir de lignes typées, colonne par colonne dans l'ordre du schéma.
+
+    Args:
+        rows (list): Lignes décodées, instances de `schema`.
+        schema (type[msgspec.Struct]): Type des lignes.
+
+    Returns:
+        pd.DataFrame: Une colonne par champ du schéma.
+    """
+    return pd.DataFrame.from_records(
+        [msgspec.structs.astuple(row) for row in rows], columns=list(schema.__struct_fields__)
+    )
+
+
+def retry_delay(retry, retry_after=None):
+    """
+    Retourne le délai avant une nouvelle tentative, selon la même règle que la session partagée.
+
+    Args:
+        retry (int): Numéro de la nouvelle tentative (à partir de 1).
+        retry_after (str, optional): Valeur de l'en-tête `Retry-After` de la dernière réponse, en secondes.
+
+    Returns:
+        float: Délai en secondes (`RETRY_BACKOFF_FACTOR` x 2^(n-1), ou `Retry-After` s'il est renseigné).
+    """
+    if retry_after is not None and retry_after.isdigit():
+        return float(retry_after)
+    return RETRY_BACKOFF_FACTOR * 2 ** (retry - 1)
+
+
+async def _get_with_retries(client, url, semaphore):
+    # Les échecs de connexion sont retentés par le transport ; les réponses 5xx et les autres erreurs de
+    # transport (délai de lecture dépassé, connexion coupée) le sont ici, avec le même délai exponentiel
+    retry_after = None
+    for retry in range(MAX_RETRIES + 1):
+        if retry:
+            # Attente hors du sémaphore : elle ne bloque pas les requêtes des autres URL
+            await asyncio.sleep(retry_delay(retry, retry_after))
+        start = time.perf_counter()
+        try:
+            async with semaphore:
+                response = await client.get(url)
+        except httpx.TransportError as e:
+            if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)) or retry == MAX_RETRIES:
+                raise
+            extraction_logger.warning(f"GET {url} failed ({e!r}), retrying.")
+            retry_after = None
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        extraction_logger.info(f"GET {url} -> {response.status_code} in {elapsed:.1f} ms.")
+        if response.status_code not in RETRY_STATUSES or retry == MAX_RETRIES:
+            return response
+        retry_after = response.headers.get("Retry-After")
+
+
+async def _fetch_many(urls, schema, max_concurrency):
+    # Un seul client pour toutes les requêtes : les connexions HTTP/1.1 sont réutilisées (keep-alive)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    transport = httpx.AsyncHTTPTransport(retries=MAX_RETRIES, limits=limits)
+    timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+    headers = {"Accept-Encoding": ASYNC_ACCEPT_ENCODING}
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with httpx.AsyncClient(transport=transport, timeout=timeout, headers=headers) as client:
+
+        async def fetch(url):
+            # Le sémaphore borne les requêtes en cours : les suivantes attendent sans consommer leur délai.
+            # Chaque échec est journalisé une seule fois, ici, avant d'être renvoyé à l'appelant
+            try:
+                response = await _get_with_retries(client, url, semaphore)
+                if response.status_code != 200:
+                    raise Exception(f"Error fetching data from {url}: {response.status_code}")
+                log_transfer(url, response)
+                extraction_logger.info(f"Data fetched successfully from {url}.")
+                return response.json() if schema is None else decode_typed(url, response.content, schema)
+            except Exception as e:
+                extraction_logger.error(f"Exception during API fetch from {url}: {e!r}")
+                raise
+
+        return await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
+
+
+# Récupérer des données depuis plusieurs routes en parallèle
+def fetch_many_from_api(urls, schema=None, max_concurrency=MAX_CONCURRENT_REQUESTS):
+    """
+    Récupère les données de plusieurs URL de l'api de manière concurrente.
+
+    Les requêtes partagent un pool de connexions HTTP/1.1 gardées ouvertes ; au plus `max_concurrency`
+    requêtes sont en cours à la fois, chacune bornée par les délais `CONNECT_TIMEOUT` et `READ_TIMEOUT`.
+    Comme avec `api_get`, les erreurs de connexion et réponses 5xx sont retentées jusqu'à `MAX_RETRIES` fois
+    avec un délai exponentiel, et seuls les encodages décompressables sont annoncés (`Accept-Encoding`).
+    L'échec d'une requête n'interrompt pas les autres : il est journalisé, et l'exception est renvoyée à la
+    place de son résultat.
+
+    Args:
+        urls (list): URL de l'api.
+        schema (type[msgspec.Struct], optional): Type des lignes attendues (voir `fetch_from_api`).
+        max_concurrency (int): Nombre maximal de requêtes simultanées. Par défaut, `MAX_CONCURRENT_REQUESTS`.
+
+    Returns:
+        list: Résultat de chaque URL, dans l'ordre de `urls` : données récupérées ou exception levée.
+    """
+    return asyncio.run(_fetch_many(list(urls), schema, max_concurrency))
+
+
+# Récupérer des données colonnaires depuis une api
+def fetch_columnar_from_api(url, media_type=PARQUET_MEDIA_TYPE):
+    """
+    Récupère les données d'une route au format colonnaire (Parquet ou flux Arrow IPC).
+
+    Le corps de la réponse est renvoyé tel quel : il peut être transmis directement à `save_to_s3`
+    ou lu avec `pd.read_parquet`, sans décodage JSON ligne par ligne.
+
+    Args:
+        url (str): URL de l'api.
+        media_type (str): Format demandé via l'en-tête `Accept`. Par défaut, Parquet.
+
+    Returns:
+        bytes: Corps de la réponse au format demandé.
+        None: Si l'api a répondu en JSON (message d'erreur, aucune donnée disponible).
+
+    Raises:
+        Exception: Si une erreur HTTP est rencontrée.
+    """
+    try:
+        response = api_get(url, headers={"Accept": media_type, "Accept-Encoding": ACCEPT_ENCODING})
+        if response.status_code != 200:
+            extraction_logger.error(f"Error fetching data from {url}: {response.status_code}")
+            raise Exception(f"Error fetching data from {url}: {response.status_code}")
+    except Exception as e:
+        extraction_logger.error(f"Exception during API fetch from {url}: {e}")
+        raise
+
+    if not response.headers.get("content-type", "").startswith(media_type):
+        extraction_logger.warning(f"No columnar data returned by {url}: {response.text[:200]}")
+        return None
+
+    log_transfer(url, response)
+    extraction_logger.info(f"Columnar data fetched successfully from {url} ({len(response.content)} bytes).")
+    return response.content
+
+
+# Consommer une réponse NDJSON diffusée par l'api
+def iter_from_api(url):
+    """
+    Récupère les données d'une route en mode NDJSON et les renvoie ligne par ligne.
+
+    La réponse est lue en flux (`stream=True`) : chaque ligne est décodée dès sa réception,
+    sans attendre ni garder en mémoire le corps complet.
+
+    Args:
+        url (str): URL de l'api.
+
+    Yields:
+        dict: Enregistrement décodé.
+
+    Raises:
+        Exception: Si une erreur HTTP est rencontrée.
+    """
+    try:
+        headers = {"Accept": "application/x-ndjson", "Accept-Encoding": ACCEPT_ENCODING}
+        with api_get(url, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                extraction_logger.error(f"Error fetching data from {url}: {response.status_code}")
+                raise Exception(f"Error fetching data from {url}: {response.status_code}")
+
+            count = 0
+            for line in response.iter_lines():
+                if line:
+                    count += 1
+                    yield json.loads(line)
+            extraction_logger.info(f"Streamed {count} records from {url}.")
+    except Exception as e:
+        extraction_logger.error(f"Exception during API stream from {url}: {e}")
+        raise
+
+
+# Récupérer des données paginées depuis une api
+def fetch_pages_from_api(url, limit=5000):
+    """
+    Parcourt les pages d'une route paginée par curseur et les renvoie une à une.
+
+    Le curseur de la page suivante est lu dans l'en-tête `X-Next-Cursor` de chaque réponse,
+    ce qui permet de consommer de gros volumes avec une mémoire bornée par la taille d'une page.
+
+    Args:
+        url (str): URL de l'api (avec ses filtres, sans `limit` ni `cursor`).
+        limit (int): Nombre de lignes demandées par page. Par défaut, 5000.
+
+    Yields:
+        list: Lignes d'une page.
+
+    Raises:
+        Exception: Si une erreur HTTP est rencontrée.
+    """
+    cursor = None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        try:
+            response = api_get(url, params=params, headers={"Accept-Encoding": ACCEPT_ENCODING})
+        except Exception as e:
+            extraction_logger.error(f"Exception during API fetch from {url}: {e}")
+            raise
+        if response.status_code != 200:
+            extraction_logger.error(f"Error fetching data from {url}: {response.status_code}")
+            raise Exception(f"Error fetching data from {url}: {response.status_code}")
+
+        page = response.json()
+        extraction_logger.info(
+            f"Page fetched from {url}: {len(page)} rows (total {response.headers.get('X-Total-Count')})."
+        )
+        yield page
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+
+# Télécharger un fichier exporté par l'api, avec reprise
+def download_from_api(url, output_file):
+    """
+    Télécharge un fichier servi par l'api (export journalier) vers un fichier local.
+
+    Le téléchargement est écrit dans `<output_file>.part`, accompagné de l'ETag du fichier distant. Si un
+    téléchargement précédent a été interrompu, seule la suite est demandée (`Range`), conditionnée par
+    `If-Range` : si le fichier distant a changé entre-temps, l'api renvoie le fichier complet et le
+    téléchargement repart de zéro. Le fichier final n'apparaît qu'une fois complet.
+
+    Args:
+        url (str): URL du fichier (par exemple `http://127.0.0.1:8000/exports/sales/2024-12-14.parquet`).
+        output_file (str): Chemin du fichier local.
+
+    Returns:
+        str: Chemin du fichier téléchargé.
+
+    Raises:
+        Exception: Si une erreur HTTP est rencontrée.
+    """
+    partial_file, etag_file = f"{output_file}.part", f"{output_file}.part.etag"
+    create_output_folder(os.path.dirname(output_file) or ".")
+    # Le contenu doit être reçu tel quel : une plage d'octets porte sur le fichier non compressé
+    headers = {"Accept-Encoding": "identity"}
+    offset = os.path.getsize(partial_file) if os.path.exists(partial_file) else 0
+    if offset and os.path.exists(etag_file):
+        with open(etag_file, "r", encoding="utf-8") as f:
+            headers.update({"Range": f"bytes={offset}-", "If-Range": f.read().strip()})
+
+    try:
+        with api_get(url, headers=headers, stream=True) as response:
+            if response.status_code == 416:
+                # La partie déjà reçue couvre tout le fichier : le téléchargement était complet
+                if response.headers.get("content-range") != f"*/{offset}":
+                    os.remove(partial_file)
+                    raise Exception(f"Error downloading {url}: local copy does not match remote file")
+                extraction_logger.info(f"Download of {url} was already complete ({offset} bytes).")
+            elif response.status_code in (200, 206):
+                resumed = response.status_code == 206
+                if not resumed:
+                    offset = 0
+                    with open(etag_file, "w", encoding="utf-8") as f:
+                        f.write(response.headers.get("ETag", ""))
+                with open(partial_file, "ab" if resumed else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                extraction_logger.info(
+                    f"Downloaded {url} to {output_file}"
+                    + (f" (resumed at byte {offset})." if resumed else ".")
+                )
+            else:
+                extraction_logger.error(f"Error downloading {url}: {response.status_code}")
+                raise Exception(f"Error downloading {url}: {response.status_code}")
+    except Exception as e:
+        extraction_logger.error(f"Exception during download from {url}: {e}")
+        raise
+
+    os.replace(partial_file, output_file)
+    if os.path.exists(etag_file):
+        os.remove(etag_file)
+    return output_file
+
+
+# Parcourir le journal des modifications d'une route
+def fetch_changes_from_api(url, since=0):
+    """
+    Récupère les lots publiés après une séquence donnée sur une route de type `/changes`.
+
+    Les appels se succèdent tant que l'api indique que d'autres lots restent à lire (`has_more`).
+
+    Args:
+        url (str): URL de la route (par exemple `http://127.0.0.1:8000/sales/changes`).
+        since (int): Dernière séquence déjà reçue. Par défaut, 0 (depuis le premier lot).
+
+    Yields:
+        dict: Réponse de l'api : `sequence` atteinte et `rows` des lots reçus.
+
+    Raises:
+        Exception: Si une erreur HTTP est rencontrée.
+    """
+    while True:
+        page = fetch_from_api(f"{url}?since={since}")
+        extraction_logger.info(
+            f"Changes fetched from {url}: {len(page['rows'])} rows up to sequence {page['sequence']}."
+        )
+        yield page
+        if not page["has_more"] or page["sequence"] == since:
+            break
+        since = page["sequence"]
+
+
+def read_watermark(s3_key):
+    """
+    Lit la dernière séquence extraite (« watermark ») conservée sur S3.
+
+    Args:
+        s3_key (str): Chemin du fichier de watermark dans le bucket S3.
+
+    Returns:
+        int: Dernière séquence extraite, 0 si aucune extraction incrémentale n'a encore eu lieu.
+    """
+    try:
+        response = s3.get_object(Bucket=BUCKET_NAME, Key=s3_key)
+        return int(json.loads(response["Body"].read())["sequence"])
+    except Exception as e:
+        if "NoSuchKey" not in str(e):
+            extraction_logger.error(f"Error reading watermark from S3: s3://{BUCKET_NAME}/{s3_key} - {e}")
+            raise
+        extraction_logger.warning(f"No watermark found at s3://{BUCKET_NAME}/{s3_key}, starting from sequence 0.")
+        return 0
+
+
+def write_watermark(s3_key, sequence):
+    """
+    Enregistre sur S3 la dernière séquence extraite.
+
+    Args:
+        s3_key (str): Chemin du fichier de watermark dans le bucket S3.
+        sequence (int): Dernière séquence sauvegardée.
+    """
+    s3.put_object(Bucket=BUCKET_NAME, Key=s3_key, Body=json.dumps({"sequence": sequence}).encode("utf-8"))
+    extraction_logger.info(f"Watermark {sequence} saved to s3://{BUCKET_NAME}/{s3_key}.")
+
+
 def save_to_s3(data, s3_key):
     """
     Sauvegarde les données au format Parquet directement sur S3.
 
     Args:
-        data (list | pd.DataFrame): Données à sauvegarder.
+        data (list | pd.DataFrame | bytes): Données à sauvegarder. Des `bytes` sont considérés
+            comme un fichier Parquet déjà sérialisé (réponse colonnaire de l'api) et envoyés tels quels.
         s3_key (str): Chemin du fichier dans le bucket S3.
     """
     try:
+        # Transmettre directement un fichier Parquet déjà sérialisé
+        if isinstance(data, bytes):
+            s3.upload_fileobj(io.BytesIO(data), BUCKET_NAME, s3_key)
+            extraction_logger.info(f"File successfully saved to S3: s3://{BUCKET_NAME}/{s3_key}.")
+            return
+
         # Vérifier si les données sont déjà un DataFrame
         if not isinstance(data, pd.DataFrame):
             df = pd.DataFrame(data)
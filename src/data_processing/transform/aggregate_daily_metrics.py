@@ -133,13 +133,21 @@ def read_parquet_from_s3(s3_folder, is_test=False):
         return pd.DataFrame()
 
 
-def read_parquet_from_s3_filtered(s3_folder, processed_dates):
+def read_parquet_from_s3_filtered(s3_folder, processed_dates, partition_keys=None):
     """
     Lit et concatène uniquement les fichiers Parquet non traités dans un dossier S3.
 
+    Les fichiers sont nommés d'après leur date : `<nom>_<date>.parquet` (extraction journalière) ou
+    `<nom>_<date>_<séquence>.parquet` (un fichier par lot de l'extraction incrémentale). Un lot publié par
+    le générateur remplace toutes les données de ses couples `partition_keys` (régénération d'une journée) :
+    pour chaque couple, seules les lignes du fichier de plus grande séquence sont conservées, le fichier
+    journalier comptant comme la séquence 0.
+
     Args:
         s3_folder (str): Chemin du dossier dans le bucket S3.
         processed_dates (set): Ensemble des dates déjà traitées.
+        partition_keys (list, optional): Colonnes identifiant les données remplacées par un lot, par exemple
+            `["sale_date", "store_id"]`. Par défaut, None (toutes les lignes sont conservées).
 
     Returns:
         pd.DataFrame: Données des fichiers non traités.
@@ -150,8 +158,8 @@ def read_parquet_from_s3_filtered(s3_folder, processed_dates):
         transformation_logger.warning(f"No files found in S3 folder: {s3_folder}")
         return pd.DataFrame()
 
-    data_frames = []
-    date_pattern = re.compile(r".*_(\d{4}-\d{2}-\d{2})\.parquet")
+    batches = []
+    date_pattern = re.compile(r".*_(\d{4}-\d{2}-\d{2})(?:_(\d+))?\.parquet")
 
     for obj in response["Contents"]:
         file_key = obj["Key"]
@@ -163,12 +171,27 @@ def read_parquet_from_s3_filtered(s3_folder, processed_dates):
                     try:
                         response = s3.get_object(Bucket=BUCKET_NAME, Key=file_key)
                         buffer = io.BytesIO(response["Body"].read())
-                        data_frames.append(pd.read_parquet(buffer))
+                        batches.append((int(match.group(2) or 0), pd.read_parquet(buffer)))
                         transformation_logger.info(f"File {file_key} read successfully.")
                     except Exception as e:
                         transformation_logger.error(f"Error reading file {file_key}: {e}")
 
-    concatenated_df = pd.concat(data_frames, ignore_index=True) if data_frames else pd.DataFrame()
+    if not batches:
+        transformation_logger.info("Successfully concatenated 0 records from filtered files.")
+        return pd.DataFrame()
+
+    batches.sort(key=lambda batch: batch[0])
+    concatenated_df = pd.concat(
+        [df.assign(_sequence=sequence) for sequence, df in batches], ignore_index=True
+    )
+    if partition_keys:
+        # Ne garder, pour chaque couple de clés, que le dernier lot publié
+        latest = concatenated_df.groupby(partition_keys)["_sequence"].transform("max")
+        superseded = int((concatenated_df["_sequence"] != latest).sum())
+        concatenated_df = concatenated_df[concatenated_df["_sequence"] == latest].reset_index(drop=True)
+        if superseded:
+            transformation_logger.info(f"Dropped {superseded} records superseded by a later batch.")
+    concatenated_df = concatenated_df.drop(columns="_sequence")
     transformation_logger.info(f"Successfully concatenated {len(concatenated_df)} records from filtered files.")
     return concatenated_df
 
@@ -518,9 +541,11 @@ def calculate_daily_metrics():
 
         # Lire les données
         retail_data = read_parquet_from_s3_filtered(
-            "extracted_data/retail_data/", processed_dates
+            "extracted_data/retail_data/", processed_dates, partition_keys=["date", "store_id"]
+        )
+        sales_data = read_parquet_from_s3_filtered(
+            "extracted_data/sales/", processed_dates, partition_keys=["sale_date", "store_id"]
         )
-        sales_data = read_parquet_from_s3_filtered("extracted_data/sales/", processed_dates)
         products_data = read_parquet_from_s3("extracted_data/products.parquet")
 
         if retail_data.empty or sales_data.empty or products_data.empty:
@@ -0,0 +1,99 @@
+"""
+Schéma des lignes échangées entre l'api et l'extraction.
+
+Chaque type de ligne est décrit une seule fois, par une `msgspec.Struct`. Ce module ne dépend ni de l'api
+ni du pipeline :
+- l'api en dérive les modèles Pydantic de ses routes (voir `src.api.schemas`) ;
+- l'extraction décode et valide un corps JSON avec `decode_rows`, en une seule passe, directement en
+  instances typées, plus rapidement que `json.loads` suivi d'une validation.
+
+Le format échangé est une liste JSON d'objets portant les noms de champs des structures.
+"""
+
+from functools import lru_cache
+from typing import List, Optional
+
+import msgspec
+
+
+class SaleDataResponse(msgspec.Struct):
+    sale_id: str
+    nb_type_product: int
+    product_id: str
+    client_id: str
+    store_id: str
+    quantity: int
+    sale_amount: float
+    sale_date: str
+    sale_time: str
+
+
+class RetailResponse(msgspec.Struct):
+    store_id: str
+    store_name: str
+    date: str
+    hour: int
+    visitors: Optional[int]
+    sales: Optional[int]
+
+
+class ClientResponse(msgspec.Struct):
+    id: str
+    name: str
+    age: int
+    gender: str
+    loyalty_card: bool
+    city: str
+
+
+class ProductResponse(msgspec.Struct):
+    id: str
+    name: str
+    category: str
+    price: float
+    cost: float
+
+
+class StoreDataResponse(msgspec.Struct):
+    id: str
+    name: str
+    location: str
+    capacity: int
+    opening_hour: str
+    closing_hour: str
+
+
+class ErrorResponse(msgspec.Struct):
+    error: str
+
+
+@lru_cache(maxsize=None)
+def rows_decoder(struct):
+    """
+    Retourne le décodeur JSON d'une liste de lignes d'un type donné (créé une fois par type).
+
+    Args:
+        struct (type[msgspec.Struct]): Structure décrivant une ligne.
+
+    Returns:
+        msgspec.json.Decoder: Décodeur de `List[struct]`.
+    """
+    return msgspec.json.Decoder(List[struct])
+
+
+def decode_rows(body, struct):
+    """
+    Décode et valide un corps JSON contenant une liste de lignes.
+
+    Args:
+        body (bytes): Corps JSON.
+        struct (type[msgspec.Struct]): Structure décrivant une ligne.
+
+    Returns:
+        list: Lignes décodées, instances de `struct`.
+
+    Raises:
+        msgspec.ValidationError: Si le corps ne respecte pas le schéma.
+        msgspec.DecodeError: Si le corps n'est pas du JSON valide.
+    """
+    return rows_decoder(struct).decode(body)
@@ -1,14 +1,24 @@
+import asyncio
 import io
+import json
 import os
 import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
 
+import httpx
 import pandas as pd
 import pytest
 
+from src.schemas import SaleDataResponse, StoreDataResponse
 from src.data_processing.extract.extract_clients import fetch_and_save_clients
-from src.data_processing.extract.utils import (create_output_folder,
-                                               read_parquet_from_s3,
+from src.data_processing.extract.extract_sales import fetch_and_save_sales, fetch_and_save_sales_changes
+from src.data_processing.extract.utils import (CONNECT_TIMEOUT, READ_TIMEOUT, create_output_folder,
+                                               create_session, download_from_api,
+                                               fetch_from_api,
+                                               fetch_pages_from_api, iter_from_api,
+                                               read_parquet_from_s3, rows_to_frame,
                                                save_to_s3, save_with_pandas)
 from io import BytesIO, TextIOWrapper
 
@@ -193,3 +203,298 @@ def test_read_parquet_from_s3(mock_s3):
     # Vérifier les données
     pd.testing.assert_frame_equal(result, test_data)
     mock_s3.get_object.assert_called_once()
+
+
+@patch("src.data_processing.extract.utils.session.get")
+def test_fetch_pages_from_api(mock_get):
+    """
+    Teste que `fetch_pages_from_api` suit le curseur `X-Next-Cursor` jusqu'à la dernière page.
+    """
+    first_page = MagicMock(status_code=200, headers={"X-Next-Cursor": "abc", "X-Total-Count": "3"})
+    first_page.json.return_value = [{"id": "1"}, {"id": "2"}]
+    last_page = MagicMock(status_code=200, headers={"X-Total-Count": "3"})
+    last_page.json.return_value = [{"id": "3"}]
+    mock_get.side_effect = [first_page, last_page]
+
+    pages = list(fetch_pages_from_api("http://test/clients?city=Paris", limit=2))
+
+    assert pages == [[{"id": "1"}, {"id": "2"}], [{"id": "3"}]]
+    assert mock_get.call_args_list[1].kwargs["params"] == {"limit": 2, "cursor": "abc"}
+
+
+@patch("src.data_processing.extract.utils.session.get")
+def test_iter_from_api(mock_get):
+    """
+    Teste que `iter_from_api` décode une réponse NDJSON ligne par ligne.
+    """
+    mock_response = MagicMock(status_code=200)
+    mock_response.iter_lines.return_value = [b'{"id": "1"}', b"", b'{"id": "2"}']
+    mock_get.return_value.__enter__.return_value = mock_response
+
+    records = list(iter_from_api("http://test/sales?sale_date=2023-12-01&store_id=1"))
+
+    assert records == [{"id": "1"}, {"id": "2"}]
+    assert mock_get.call_args.kwargs["headers"]["Accept"] == "application/x-ndjson"
+
+
+def test_fetch_and_save_sales_bulk():
+    """
+    Teste que `fetch_and_save_sales` récupère les ventes de tous les magasins en une seule requête,
+    au format Parquet.
+    """
+    buffer = io.BytesIO()
+    pd.DataFrame({"sale_id": ["1", "2"], "store_id": ["store_1", "store_2"]}).to_parquet(buffer, index=False)
+    with patch(
+        "src.data_processing.extract.extract_sales.fetch_columnar_from_api", return_value=buffer.getvalue()
+    ) as mock_api, patch(
+        "src.data_processing.extract.extract_sales.read_parquet_from_s3", return_value=None
+    ), patch("src.data_processing.extract.extract_sales.save_to_s3") as mock_save:
+        fetch_and_save_sales("2023-12-01")
+
+    mock_api.assert_called_once_with("http://127.0.0.1:8000/sales/bulk?sale_date=2023-12-01")
+    saved, s3_key = mock_save.call_args.args
+    assert list(saved["sale_id"]) == ["1", "2"]
+    assert s3_key == "extracted_data/sales/sale_date=2023-12-01/sales_2023-12-01.parquet"
+
+
+def test_fetch_and_save_sales_bulk_fallback():
+    """
+    Teste que `fetch_and_save_sales` repasse magasin par magasin si la requête groupée échoue.
+    """
+    with patch(
+        "src.data_processing.extract.extract_sales.fetch_columnar_from_api", side_effect=Exception("404")
+    ), patch(
+        "src.data_processing.extract.extract_sales.fetch_from_api",
+        side_effect=lambda url, schema: [
+            schema(sale_id=url[-1], nb_type_product=1, product_id="p1", client_id="c1", store_id=url[-7:],
+                   quantity=1, sale_amount=9.5, sale_date="2023-12-01", sale_time="10:00:00")
+        ],
+    ), patch(
+        "src.data_processing.extract.extract_sales.fetch_stores", return_value=["store_1", "store_2"]
+    ), patch("src.data_processing.extract.extract_sales.read_parquet_from_s3", return_value=None), patch(
+        "src.data_processing.extract.extract_sales.save_to_s3"
+    ) as mock_save:
+        fetch_and_save_sales("2023-12-01")
+
+    saved, _ = mock_save.call_args.args
+    assert list(saved["sale_id"]) == ["1", "2"]
+    assert list(saved.columns) == list(SaleDataResponse.__struct_fields__)
+
+
+def test_fetch_and_save_sales_concurrent():
+    """
+    Teste la récupération concurrente magasin par magasin : les requêtes se recouvrent, les ventes sont
+    assemblées dans l'ordre des magasins quel que soit l'ordre des réponses, les réponses 5xx sont retentées
+    comme avec la session partagée, et l'échec d'un magasin, journalisé une seule fois, n'interrompt pas
+    les autres.
+    """
+    from src.data_processing.extract import utils
+
+    delays = {"store_1": 0.05, "store_2": 0.0, "store_3": 0.0}
+    in_flight, peak = 0, 0
+    attempts = {"store_1": 0, "store_2": 0, "store_3": 0}
+    encodings = set()
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        store = request.url.params["store_id"]
+        attempts[store] += 1
+        encodings.add(request.headers["Accept-Encoding"])
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(delays[store])
+        in_flight -= 1
+        # store_2 est toujours en erreur, store_3 seulement à la première tentative
+        if store == "store_2" or (store == "store_3" and attempts[store] == 1):
+            return httpx.Response(503 if store == "store_3" else 500)
+        return httpx.Response(200, json=[{
+            "sale_id": store[-1], "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": store,
+            "quantity": 1, "sale_amount": 9.5, "sale_date": "2023-12-01", "sale_time": "10:00:00",
+        }])
+
+    with patch(
+        "src.data_processing.extract.utils.httpx.AsyncHTTPTransport",
+        side_effect=lambda **kwargs: httpx.MockTransport(handler),
+    ), patch("src.data_processing.extract.utils.RETRY_BACKOFF_FACTOR", 0), patch(
+        "src.data_processing.extract.extract_sales.fetch_stores", return_value=["store_1", "store_2", "store_3"]
+    ), patch("src.data_processing.extract.extract_sales.read_parquet_from_s3", return_value=None), patch(
+        "src.data_processing.extract.extract_sales.save_to_s3"
+    ) as mock_save, patch.object(utils.extraction_logger, "error") as mock_error:
+        fetch_and_save_sales("2023-12-01", bulk=False, concurrent=True)
+
+    saved, _ = mock_save.call_args.args
+    assert list(saved["sale_id"]) == ["1", "3"]
+    assert peak == 3
+    assert attempts == {"store_1": 1, "store_2": utils.MAX_RETRIES + 1, "store_3": 2}
+    assert encodings == {"gzip"}
+    # Un seul message d'erreur pour le magasin en échec, après les nouvelles tentatives
+    assert mock_error.call_count == 1
+    assert "store_2" in mock_error.call_args.args[0]
+
+
+@patch("src.data_processing.extract.utils.s3")
+def test_save_to_s3_forwards_parquet_bytes(mock_s3):
+    """
+    Teste que `save_to_s3` transmet tel quel un fichier Parquet déjà sérialisé par l'api.
+    """
+    save_to_s3(b"PAR1...", "test_data/test_file.parquet")
+
+    mock_s3.upload_fileobj.assert_called_once()
+    mock_s3.upload_file.assert_not_called()
+    assert mock_s3.upload_fileobj.call_args.args[0].getvalue() == b"PAR1..."
+
+
+@patch("src.data_processing.extract.utils.session.get")
+def test_fetch_from_api_conditional(mock_get):
+    """
+    Teste la revalidation par ETag de fetch_from_api : le premier appel conserve l'ETag et le corps,
+    le second envoie `If-None-Match` et réutilise le corps conservé sur une réponse 304.
+    """
+    first = MagicMock(status_code=200, headers={"ETag": '"v1"'}, content=b"[]")
+    first.json.return_value = [{"id": "store_1"}]
+    second = MagicMock(status_code=304, headers={"ETag": '"v1"'}, content=b"")
+    mock_get.side_effect = [first, second]
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+            patch("src.data_processing.extract.utils.ETAG_CACHE_DIR", temp_dir):
+        assert fetch_from_api("http://api/stores", conditional=True) == [{"id": "store_1"}]
+        assert fetch_from_api("http://api/stores", conditional=True) == [{"id": "store_1"}]
+
+    assert "If-None-Match" not in mock_get.call_args_list[0].kwargs["headers"]
+    assert mock_get.call_args_list[0].kwargs["timeout"] == (CONNECT_TIMEOUT, READ_TIMEOUT)
+    assert mock_get.call_args_list[1].kwargs["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_fetch_from_api_retries():
+    """
+    Teste la session partagée : les réponses 5xx sont retentées, les connexions sont réutilisées
+    (keep-alive) et le délai par défaut est appliqué ; une fois les tentatives épuisées, l'erreur est levée.
+    """
+    statuses = [503, 502, 200, 500, 500, 500]
+    ports = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            ports.add(self.client_address[1])
+            status = statuses.pop(0)
+            body = b'[{"id": "store_1"}]' if status == 200 else b""
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/stores"
+    try:
+        with patch("src.data_processing.extract.utils.session", create_session(max_retries=2, backoff_factor=0)):
+            assert fetch_from_api(url) == [{"id": "store_1"}]
+            with pytest.raises(Exception, match="500"):
+                fetch_from_api(url)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert statuses == []
+    assert len(ports) == 1
+
+
+@patch("src.data_processing.extract.utils.session.get")
+def test_fetch_from_api_typed(mock_get):
+    """
+    Teste le décodage typé de fetch_from_api avec le schéma partagé de l'api : les lignes sont décodées en
+    structures, une réponse d'erreur et une ligne non conforme sont rejetées.
+    """
+    store = {"id": "store_1", "name": "Magasin_1", "location": "Paris", "capacity": 100,
+             "opening_hour": "08:00", "closing_hour": "20:00"}
+    mock_get.side_effect = [
+        MagicMock(status_code=200, headers={}, content=json.dumps([store]).encode()),
+        MagicMock(status_code=200, headers={}, content=b'[{"error": "No stores found"}]'),
+        MagicMock(status_code=200, headers={}, content=json.dumps([dict(store, capacity="big")]).encode()),
+    ]
+
+    stores = fetch_from_api("http://api/stores", schema=StoreDataResponse)
+    assert stores == [StoreDataResponse(**store)]
+    with pytest.raises(Exception, match="API error from http://api/stores: No stores found"):
+        fetch_from_api("http://api/stores", schema=StoreDataResponse)
+    with pytest.raises(Exception, match="Invalid StoreDataResponse payload"):
+        fetch_from_api("http://api/stores", schema=StoreDataResponse)
+    assert rows_to_frame(stores, StoreDataResponse).to_dict("records") == [store]
+
+
+@patch("src.data_processing.extract.utils.session.get")
+def test_download_from_api_resume(mock_get):
+    """
+    Teste la reprise d'un téléchargement interrompu : seule la suite du fichier est demandée (`Range`),
+    conditionnée par l'ETag reçu au premier essai (`If-Range`).
+    """
+    def interrupted(chunk_size):
+        yield b"abc"
+        raise ConnectionError("connection reset")
+
+    first = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+    first.iter_content.side_effect = interrupted
+    second = MagicMock(status_code=206, headers={"ETag": '"v1"'})
+    second.iter_content.return_value = [b"def"]
+    for response in (first, second):
+        response.__enter__.return_value = response
+    mock_get.side_effect = [first, second]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, "sales", "2024-12-14.parquet")
+        with pytest.raises(ConnectionError):
+            download_from_api("http://api/exports/sales/2024-12-14.parquet", output_file)
+        assert not os.path.exists(output_file)
+
+        assert download_from_api("http://api/exports/sales/2024-12-14.parquet", output_file) == output_file
+        with open(output_file, "rb") as f:
+            assert f.read() == b"abcdef"
+        assert os.listdir(os.path.dirname(output_file)) == ["2024-12-14.parquet"]
+
+    assert "Range" not in mock_get.call_args_list[0].kwargs["headers"]
+    assert mock_get.call_args_list[1].kwargs["headers"]["Range"] == "bytes=3-"
+    assert mock_get.call_args_list[1].kwargs["headers"]["If-Range"] == '"v1"'
+
+
+def test_fetch_and_save_sales_changes():
+    """
+    Teste l'extraction incrémentale des ventes : seuls les lots postérieurs au watermark sont demandés,
+    chaque lot est écrit dans son propre fichier sans relecture de S3, puis le watermark avance.
+    """
+    pages = [
+        {"since": 4, "sequence": 5, "has_more": True, "rows": [
+            {"sale_id": "1", "sale_date": "2023-12-01"}, {"sale_id": "2", "sale_date": "2023-12-02"},
+        ]},
+        {"since": 5, "sequence": 6, "has_more": False, "rows": [{"sale_id": "3", "sale_date": "2023-12-02"}]},
+    ]
+    with patch(
+        "src.data_processing.extract.extract_sales.read_watermark", return_value=4
+    ), patch(
+        "src.data_processing.extract.extract_sales.fetch_from_api", side_effect=AssertionError
+    ), patch(
+        "src.data_processing.extract.utils.fetch_from_api", side_effect=pages
+    ) as mock_api, patch(
+        "src.data_processing.extract.extract_sales.read_parquet_from_s3"
+    ) as mock_read, patch(
+        "src.data_processing.extract.extract_sales.save_to_s3"
+    ) as mock_save, patch(
+        "src.data_processing.extract.extract_sales.write_watermark"
+    ) as mock_watermark:
+        assert fetch_and_save_sales_changes() == 6
+
+    assert [call.args[0] for call in mock_api.call_args_list] == [
+        "http://127.0.0.1:8000/sales/changes?since=4",
+        "http://127.0.0.1:8000/sales/changes?since=5",
+    ]
+    mock_read.assert_not_called()
+    assert [call.args[1] for call in mock_save.call_args_list] == [
+        "extracted_data/sales/sale_date=2023-12-01/sales_2023-12-01_000000000005.parquet",
+        "extracted_data/sales/sale_date=2023-12-02/sales_2023-12-02_000000000005.parquet",
+        "extracted_data/sales/sale_date=2023-12-02/sales_2023-12-02_000000000006.parquet",
+    ]
+    assert [call.args[1] for call in mock_watermark.call_args_list] == [5, 6]
@@ -1,5 +1,6 @@
 import json
 import os
+import sqlite3
 import tempfile
 from datetime import datetime
 from io import BytesIO, TextIOWrapper
@@ -8,6 +9,7 @@ from unittest.mock import MagicMock, mock_open, patch
 import duckdb
 import pytest
 
+from src.api import sql_store
 from src.api.client_generator import ClientGenerator
 from src.api.product_generator import ProductGenerator
 from src.api.retail_data_generator import (RetailDataGenerator, generate_data,
@@ -193,7 +195,7 @@ def test_gen_data_day():
     Vérifie que les données générées sont complètes et conformes pour chaque magasin.
     """
     test_data_dir = os.path.join("data_test")
-    file_name = os.path.join(test_data_dir, "retail_data.json")
+    date_dir = os.path.join(test_data_dir, "retail_data", "date=2024-12-14")
     generator = RetailDataGenerator(test_data_dir)
     date_test = "2024-12-14"
 
@@ -203,16 +205,18 @@ def test_gen_data_day():
     # Vérifie si le dossier 'data_test' existe, sinon le crée
     os.makedirs("data_test", exist_ok=True)
 
-    # Vérifier que les données ont bien été générées
-    with open(file_name, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        assert len(data) > 0  # S'assurer que des données ont été générées
-        assert all(
-            "store_id" in record for record in data
-        )  # Vérifier que le 'store_id' existe
-        assert all(
-            "visitors" in record and "sales" in record for record in data
-        )  # Vérifier que les données sont complètes
+    # Vérifier que les données ont bien été générées dans les partitions de la journée
+    data = []
+    for partition in os.listdir(date_dir):
+        with open(os.path.join(date_dir, partition, "part.jsonl"), "r", encoding="utf-8") as f:
+            data.extend(json.loads(line) for line in f)
+    assert len(data) > 0  # S'assurer que des données ont été générées
+    assert all(
+        "store_id" in record for record in data
+    )  # Vérifier que le 'store_id' existe
+    assert all(
+        "visitors" in record and "sales" in record for record in data
+    )  # Vérifier que les données sont complètes
 
 
 def test_validate_sales_consistency():
@@ -652,3 +656,103 @@ def test_save_sales_to_file_existing(_mock_exists, _mock_open):
     file_path = os.path.join(sale_generator.data_dir, "sales.json")
     _mock_open.assert_any_call(file_path, "r", encoding="utf-8")
     _mock_open.assert_any_call(file_path, "w", encoding="utf-8")
+
+
+def test_save_day_to_database():
+    """
+    Teste le chargement d'une journée dans la base SQLite : les lignes de la date sont insérées en une
+    transaction, et un nouveau chargement de la même date remplace les lignes au lieu de les dupliquer.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "retail.db")
+        with patch("src.api.retail_data_generator.load_stores", return_value=[]), \
+                patch("src.api.sql_store.DB_PATH", db_path):
+            generator = RetailDataGenerator(data_dir=temp_dir)
+            generator.sales_buffer = [
+                {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1",
+                 "store_id": "store_1", "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14",
+                 "sale_time": "10:00:00"}
+            ]
+            generator.retail_data = [
+                {"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 10, "visitors": 5,
+                 "sales": 1}
+            ]
+            generator.save_day_to_database("2024-12-14")
+            generator.save_day_to_database("2024-12-14")
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 1
+        assert conn.execute("SELECT sale_hour FROM sales").fetchone()[0] == 10
+        assert conn.execute("SELECT COUNT(*) FROM retail_data WHERE date = ?", ("2024-12-14",)).fetchone()[0] == 1
+        conn.close()
+
+
+def test_save_partitions():
+    """
+    Teste l'écriture partitionnée : un fichier par date et par magasin, remplacé (et non complété) lorsque
+    la journée est régénérée, et les lignes en erreur (sans date ni magasin) ignorées.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with patch("src.api.retail_data_generator.load_stores", return_value=[]):
+            generator = RetailDataGenerator(data_dir=temp_dir)
+        sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+                "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+        generator.sales_buffer = [sale, dict(sale, sale_id="2", store_id="store_2")]
+        generator.retail_data = [
+            {"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 10, "visitors": 5, "sales": 1},
+            {},
+        ]
+        generator.save_partitions()
+        generator.save_partitions()
+
+        part = os.path.join(temp_dir, "sales", "sale_date=2024-12-14", "store_id=store_1", "part.jsonl")
+        with open(part, "r", encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == [sale]
+        assert sorted(os.listdir(os.path.join(temp_dir, "sales", "sale_date=2024-12-14"))) == [
+            "store_id=store_1", "store_id=store_2"
+        ]
+        assert os.listdir(os.path.join(temp_dir, "retail_data", "date=2024-12-14")) == ["store_id=store_1"]
+
+
+def test_generate_data_day_publishes_version_after_database_load():
+    """
+    Teste l'ordre de publication avec le backend SQLite : la version des partitions ne change qu'une fois la
+    journée chargée dans la base (une requête intermédiaire ne peut pas associer la nouvelle version aux
+    anciennes lignes), et la version enregistrée dans la base est celle publiée.
+    """
+    from src.api import data_store
+
+    def fake_generate_data(date_str, hour, store, data_dir):
+        sale = {"sale_id": f"{date_str}-{store['id']}", "nb_type_product": 1, "product_id": "p1",
+                "client_id": "c1", "store_id": store["id"], "quantity": 1, "sale_amount": 1.0,
+                "sale_date": date_str, "sale_time": f"{hour:02}:00:00"}
+        retail = {"store_id": store["id"], "store_name": store["name"], "date": date_str, "hour": hour,
+                  "visitors": 1, "sales": 1}
+        return retail, [sale]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with patch("src.api.retail_data_generator.load_stores", return_value=[{"id": "store_1", "name": "A"}]), \
+                patch("src.api.retail_data_generator.generate_data", side_effect=fake_generate_data), \
+                patch("src.api.retail_data_generator.DATA_BACKEND", "sqlite"), \
+                patch("src.api.data_store.DATA_DIR", temp_dir), \
+                patch("src.api.sql_store.DB_PATH", os.path.join(temp_dir, "retail.db")):
+            generator = RetailDataGenerator(data_dir=temp_dir)
+            generator.generate_data_day("2024-12-14", is_test=True)
+            first_version = data_store.dataset_version("sales")
+
+            seen = []
+            load_day = sql_store.load_day
+
+            def checked_load_day(*args, **kwargs):
+                # Partitions écrites, base pas encore chargée : la version n'a pas changé
+                seen.append(data_store.dataset_version("sales"))
+                return load_day(*args, **kwargs)
+
+            with patch("src.api.sql_store.load_day", side_effect=checked_load_day):
+                generator.generate_data_day("2024-12-15", is_test=True)
+            second_version = data_store.dataset_version("sales")
+            loaded = sql_store.loaded_versions()
+
+    assert seen == [first_version]
+    assert second_version != first_version
+    assert loaded["sales"] == second_version
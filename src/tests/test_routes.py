@@ -1,4 +1,8 @@
+import asyncio
+import io
 import json
+import os
+import time
 from unittest.mock import mock_open, patch
 
 import pytest
@@ -6,6 +10,7 @@ import pytest_asyncio
 from httpx import AsyncClient
 
 from src.api.main import app
+from src.api.metrics import registry
 from src.api.routes.sales_route import load_sales
 from src.api.routes.stores_route import load_stores
 from io import StringIO
@@ -106,6 +111,34 @@ async def test_get_products(mock_load_products, async_client):
         assert "price" in product
 
 
+@pytest.mark.asyncio
+async def test_products_and_stores_serialized_directly():
+    """
+    Teste que `/products` et `/stores` sérialisent les lignes directement (sans validation Pydantic qui
+    convertirait `cost` en flottant), avec leur ETag, et que l'erreur « aucun produit » est bien renvoyée.
+    """
+    product = {"id": "1", "name": "Product A", "category": "Category A", "price": 10.0, "cost": 120}
+    store = {"id": "1", "name": "Store A", "location": "Paris", "capacity": 760, "opening_hour": "8",
+             "closing_hour": "22"}
+
+    with patch("src.api.routes.products_route.load_products", return_value=[product]), \
+            patch("src.api.routes.stores_route.load_stores", return_value=[store]), \
+            patch("src.api.routes.products_route.make_etag", return_value='"p1"'), \
+            patch("src.api.routes.stores_route.make_etag", return_value='"s1"'):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            products = await client.get("/products", headers={"Accept-Encoding": "identity"})
+            stores = await client.get("/stores", headers={"Accept-Encoding": "identity"})
+            with patch("src.api.routes.products_route.load_products", return_value=[]):
+                empty = await client.get("/products")
+
+    assert products.content == b'[{"id":"1","name":"Product A","category":"Category A","price":10.0,"cost":120}]'
+    assert products.headers["ETag"] == '"p1"'
+    assert stores.json() == [store]
+    assert stores.headers["ETag"] == '"s1"'
+    assert empty.status_code == 200
+    assert empty.json() == [{"error": "No products available."}]
+
+
 # Test des routes retail data
 @pytest.mark.asyncio
 async def test_get_retail_data_valid(async_client):
@@ -446,3 +479,1230 @@ async def test_get_store_visitors_no_match():
             assert response.json() == [
                 {"error": "No retail data found for store ID: 2 on 2023-12-02."}
             ]
+
+
+# Test de la pagination par curseur
+@pytest.mark.asyncio
+async def test_get_sales_paginated():
+    """
+    Teste que la route `GET /sales` pagine les ventes avec `limit` et `cursor`,
+    et renvoie le total et le curseur suivant dans les en-têtes.
+    """
+    mock_sales_data = [
+        {
+            "sale_id": f"sale_{i}",
+            "sale_date": "2023-12-01",
+            "store_id": "store_1",
+            "nb_type_product": 1,
+            "product_id": "product_1",
+            "client_id": "client_1",
+            "quantity": 1,
+            "sale_amount": 10.0,
+            "sale_time": f"10:00:0{i}",
+        }
+        for i in range(5)
+    ]
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            seen = []
+            cursor = None
+            while True:
+                url = "/sales?sale_date=2023-12-01&store_id=store_1&limit=2"
+                if cursor:
+                    url += f"&cursor={cursor}"
+                response = await client.get(url)
+                assert response.status_code == 200
+                assert response.headers["X-Total-Count"] == "5"
+                seen.extend(sale["sale_id"] for sale in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+
+    assert seen == [f"sale_{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_get_clients_invalid_cursor():
+    """
+    Teste que la route `GET /clients` retourne une erreur 400 lorsque le curseur est invalide.
+    """
+    mock_clients = [
+        {"id": "1", "name": "John Doe", "city": "Paris", "age": 72, "gender": "Homme", "loyalty_card": True}
+    ]
+    with patch("src.api.routes.clients_route.load_clients", return_value=mock_clients):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/clients?city=Paris&limit=1&cursor=not-a-cursor")
+            assert response.status_code == 400
+            assert response.json() == {"error": "Invalid cursor."}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["json", "arrow", "sqlite"])
+async def test_get_clients_paginated(backend, tmp_path):
+    """
+    Teste la pagination des clients sur chaque backend : pages triées sur `id`, total dans `X-Total-Count`,
+    et page sélectionnée par les backends SQLite et Arrow (curseur et `LIMIT` appliqués par le backend).
+    """
+    from src.api import arrow_store, sql_store
+
+    clients = [
+        {"id": client_id, "name": f"Client {client_id}", "age": 30, "gender": "Femme", "loyalty_card": False,
+         "city": city}
+        for client_id, city in (("4", "Paris"), ("1", "paris"), ("3", "Lyon"), ("2", "Paris"), ("5", "Paris"))
+    ]
+    (tmp_path / "clients.json").write_text(json.dumps(clients), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.routes.clients_route.load_clients", return_value=clients), \
+            patch("src.api.routes.clients_route.DATA_BACKEND", backend), \
+            patch("src.api.arrow_store.select", wraps=arrow_store.select) as arrow_select, \
+            patch("src.api.sql_store.select", wraps=sql_store.select) as sql_select:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            seen, cursor = [], None
+            while True:
+                url = "/clients?city=Paris&limit=3" + (f"&cursor={cursor}" if cursor else "")
+                response = await client.get(url)
+                assert response.headers["X-Total-Count"] == "4"
+                seen.extend(row["id"] for row in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+
+    assert seen == ["1", "2", "4", "5"]
+    page_calls = {"arrow": arrow_select, "sqlite": sql_select}.get(backend)
+    if page_calls is not None:
+        assert [call.kwargs["limit"] for call in page_calls.call_args_list] == [4, 4]
+
+
+@pytest.mark.asyncio
+async def test_get_retail_data_paginated():
+    """
+    Teste que la route `GET /retail_data` renvoie une page triée par magasin et heure.
+    """
+    mock_retail_data = [
+        {"store_id": "2", "store_name": "Store B", "date": "2023-12-01", "hour": 9, "visitors": 10, "sales": 2},
+        {"store_id": "1", "store_name": "Store A", "date": "2023-12-01", "hour": 9, "visitors": 20, "sales": 4},
+        {"store_id": "1", "store_name": "Store A", "date": "2023-12-01", "hour": 8, "visitors": 30, "sales": 6},
+    ]
+    with patch("src.api.routes.retail_data_route.load_retail_data", return_value=mock_retail_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/retail_data?date=2023-12-01&limit=2")
+            assert response.status_code == 200
+            assert [(row["store_id"], row["hour"]) for row in response.json()] == [("1", 8), ("1", 9)]
+            assert response.headers["X-Total-Count"] == "3"
+            assert "X-Next-Cursor" in response.headers
+
+
+# Test du mode de diffusion NDJSON
+@pytest.mark.asyncio
+async def test_get_sales_ndjson_stream():
+    """
+    Teste que la route `GET /sales` diffuse les ventes au format NDJSON
+    lorsque le client envoie `Accept: application/x-ndjson`.
+    """
+    mock_sales_data = [
+        {"sale_id": "1", "sale_date": "2023-12-01", "store_id": "store_1", "sale_time": "10:00:00"},
+        {"sale_id": "2", "sale_date": "2023-12-01", "store_id": "store_2", "sale_time": "11:00:00"},
+        {"sale_id": "3", "sale_date": "2023-12-01", "store_id": "store_1", "sale_time": "12:00:00"},
+    ]
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get(
+                "/sales?sale_date=2023-12-01&store_id=store_1",
+                headers={"Accept": "application/x-ndjson"},
+            )
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            rows = [json.loads(line) for line in response.text.splitlines()]
+            assert [row["sale_id"] for row in rows] == ["1", "3"]
+
+
+@pytest.mark.asyncio
+async def test_get_clients_stream_query_param():
+    """
+    Teste que la route `GET /clients` diffuse les clients au format NDJSON avec `?stream=true`.
+    """
+    mock_clients = [
+        {"id": "1", "name": "A", "city": "Paris", "age": 30, "gender": "Homme", "loyalty_card": True},
+        {"id": "2", "name": "B", "city": "Lyon", "age": 40, "gender": "Femme", "loyalty_card": False},
+    ]
+    with patch("src.api.routes.clients_route.load_clients", return_value=mock_clients):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/clients?city=paris&stream=true")
+            assert response.status_code == 200
+            assert [json.loads(line) for line in response.text.splitlines()] == [mock_clients[0]]
+
+
+# Test de la route de ventes multi-magasins
+@pytest.mark.asyncio
+async def test_get_sales_bulk():
+    """
+    Teste que la route `GET /sales/bulk` renvoie en une requête les ventes de tous les magasins
+    d'une date, ou uniquement celles des magasins listés dans `store_ids`.
+    """
+    mock_sales_data = [
+        {
+            "sale_id": sale_id,
+            "sale_date": sale_date,
+            "store_id": store_id,
+            "nb_type_product": 1,
+            "product_id": "product_1",
+            "client_id": "client_1",
+            "quantity": 1,
+            "sale_amount": 10.0,
+            "sale_time": "10:00:00",
+        }
+        for sale_id, sale_date, store_id in [
+            ("1", "2023-12-01", "store_1"),
+            ("2", "2023-12-01", "store_2"),
+            ("3", "2023-12-01", "store_3"),
+            ("4", "2023-12-02", "store_1"),
+        ]
+    ]
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/sales/bulk?sale_date=2023-12-01")
+            assert [sale["sale_id"] for sale in response.json()] == ["1", "2", "3"]
+
+            response = await client.get("/sales/bulk?sale_date=2023-12-01&store_ids=store_1&store_ids=store_3")
+            assert [sale["sale_id"] for sale in response.json()] == ["1", "3"]
+
+            response = await client.get("/sales/bulk?sale_date=2023-12-03")
+            assert response.json() == [{"error": "No sales found on 2023-12-03"}]
+
+
+# Test des formats colonnaires
+@pytest.mark.asyncio
+async def test_get_sales_arrow_and_parquet():
+    """
+    Teste que la route `GET /sales` renvoie les ventes au format Arrow IPC ou Parquet
+    selon l'en-tête `Accept`.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    mock_sales_data = [
+        {
+            "sale_id": "1",
+            "sale_date": "2023-12-01",
+            "store_id": "store_1",
+            "nb_type_product": 1,
+            "product_id": "product_1",
+            "client_id": "client_1",
+            "quantity": 2,
+            "sale_amount": 20.0,
+            "sale_time": "10:00:00",
+        }
+    ]
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get(
+                "/sales?sale_date=2023-12-01&store_id=store_1",
+                headers={"Accept": "application/vnd.apache.arrow.stream"},
+            )
+            assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+            table = pa.ipc.open_stream(response.content).read_all()
+            assert table.to_pylist() == mock_sales_data
+            assert table.schema.field("sale_amount").type == pa.float64()
+
+            response = await client.get(
+                "/sales?sale_date=2023-12-01&store_id=store_1",
+                headers={"Accept": "application/vnd.apache.parquet"},
+            )
+            assert response.headers["content-type"] == "application/vnd.apache.parquet"
+            table = pq.read_table(io.BytesIO(response.content))
+            assert table.column("sale_id").to_pylist() == ["1"]
+
+
+@pytest.mark.asyncio
+async def test_get_retail_data_fast_path():
+    """
+    Teste que la route `GET /retail_data` sérialise directement les lignes du fichier,
+    tout en conservant le modèle de réponse dans le schéma OpenAPI.
+    """
+    mock_retail_data = [
+        {"store_id": "1", "store_name": "Store A", "date": "2023-12-01", "hour": 8, "visitors": None, "sales": None},
+        {"store_id": "1", "store_name": "Store A", "date": "2023-12-02", "hour": 8, "visitors": 10, "sales": 2},
+    ]
+    with patch("src.api.routes.retail_data_route.load_retail_data", return_value=mock_retail_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/retail_data?date=2023-12-01")
+            assert response.status_code == 200
+            assert response.json() == [mock_retail_data[0]]
+
+    schema = app.openapi()["paths"]["/retail_data"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert "RetailResponse" in json.dumps(schema)
+
+
+# Test de la compression des réponses
+async def fetch_raw(client, url, encoding):
+    """
+    Effectue une requête et retourne les en-têtes et le corps brut (non décompressé) de la réponse.
+    """
+    async with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        return response.headers, raw
+
+
+def decompress(raw, encoding):
+    """
+    Décompresse un corps de réponse gzip ou zstd.
+    """
+    import gzip
+
+    import zstandard
+
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_response_compression(encoding):
+    """
+    Teste que les réponses volumineuses sont compressées selon l'en-tête `Accept-Encoding`
+    et que les petites réponses sont transmises sans compression.
+    """
+    mock_sales_data = [
+        {
+            "sale_id": str(i),
+            "sale_date": "2023-12-01",
+            "store_id": "store_1",
+            "nb_type_product": 1,
+            "product_id": "product_1",
+            "client_id": "client_1",
+            "quantity": 1,
+            "sale_amount": 10.0,
+            "sale_time": "10:00:00",
+        }
+        for i in range(200)
+    ]
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales_data):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            headers, raw = await fetch_raw(client, "/sales?sale_date=2023-12-01&store_id=store_1", encoding)
+            assert headers["content-encoding"] == encoding
+            assert int(headers["content-length"]) == len(raw)
+            body = decompress(raw, encoding)
+            assert len(raw) < len(body) / 5
+            assert json.loads(body) == mock_sales_data
+
+            headers, raw = await fetch_raw(
+                client, "/sales?sale_date=2023-12-01&store_id=store_1&stream=true", encoding
+            )
+            assert headers["content-encoding"] == encoding
+            assert len(decompress(raw, encoding).splitlines()) == 200
+
+            headers, raw = await fetch_raw(client, "/", encoding)
+            assert "content-encoding" not in headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_streamed_compression_buffering(encoding):
+    """
+    Teste qu'une réponse diffusée ligne par ligne (un message par ligne NDJSON) est compressée par fragments
+    d'au moins `flush_size` octets, et non message par message.
+    """
+    from src.api.compression import CompressionMiddleware
+
+    lines = [json.dumps({"sale_id": str(i), "store_id": "store_1", "sale_date": "2023-12-01"}).encode() + b"\n"
+             for i in range(2000)]
+
+    async def ndjson_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for line in lines:
+            await send({"type": "http.response.body", "body": line, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def capture(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", encoding.encode())]}
+    await CompressionMiddleware(ndjson_app, flush_size=16 * 1024)(scope, receive, capture)
+
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    raw = b"".join(bodies)
+    assert decompress(raw, encoding) == b"".join(lines)
+    # Environ 70 Kio de lignes : quelques fragments au lieu d'un par ligne
+    assert len(bodies) <= len(b"".join(lines)) // (16 * 1024) + 2
+    assert len(raw) < len(b"".join(lines)) / 5
+
+
+@pytest.mark.asyncio
+async def test_get_stores_etag_revalidation():
+    """
+    Teste la revalidation de la route `/stores` : l'ETag est renvoyé avec les données,
+    puis un `If-None-Match` correspondant (fort ou faible) donne un `304 Not Modified` sans corps.
+    """
+    mock_stores = [{"id": "store_1", "name": "Store A", "location": "Paris", "capacity": 100,
+                    "opening_hour": "08:00", "closing_hour": "20:00"}]
+
+    with patch("src.api.routes.conditional.dataset_version", return_value="1-2"), \
+            patch("src.api.routes.stores_route.load_stores", return_value=mock_stores) as mock_load:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/stores")
+            etag = response.headers["ETag"]
+
+            not_modified = await client.get("/stores", headers={"If-None-Match": etag})
+            weak = await client.get("/stores", headers={"If-None-Match": "W/" + etag})
+            stale = await client.get("/stores", headers={"If-None-Match": '"outdated"'})
+
+        with patch("src.api.routes.conditional.dataset_version", return_value="1-3"):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                changed = await client.get("/stores", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert weak.status_code == 304
+    assert stale.status_code == 200
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    # Les réponses 304 ne rechargent pas les données
+    assert mock_load.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_stores_latency_during_large_sales_requests():
+    """
+    Teste que le chargement des ventes ne bloque pas la boucle d'événements : pendant que plusieurs
+    requêtes `/sales` lentes sont en cours, le p99 de la latence de `/stores` reste faible.
+    """
+    mock_sales = [{"sale_id": str(i), "nb_type_product": 1, "product_id": "p", "client_id": "c",
+                   "store_id": "store_1", "quantity": 1, "sale_amount": 1.0, "sale_date": "2024-12-14",
+                   "sale_time": "10:00:00"} for i in range(1000)]
+    mock_stores = [{"id": "store_1", "name": "Store A", "location": "Paris", "capacity": 100,
+                    "opening_hour": "08:00", "closing_hour": "20:00"}]
+
+    def slow_load_sales():
+        time.sleep(0.5)  # Simule la lecture bloquante d'un gros fichier
+        return mock_sales
+
+    async def timed_stores(client, scheduled):
+        # La latence est mesurée depuis l'instant d'envoi prévu : un blocage de la boucle est compté
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        response = await client.get("/stores")
+        assert response.status_code == 200
+        return time.perf_counter() - scheduled
+
+    with patch("src.api.routes.sales_route.load_sales", side_effect=slow_load_sales), \
+            patch("src.api.routes.stores_route.load_stores", return_value=mock_stores):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            start = time.perf_counter()
+            sales_calls = [client.get("/sales?sale_date=2024-12-14&store_id=store_1") for _ in range(4)]
+            stores_calls = [timed_stores(client, start + 0.05 + i * 0.01) for i in range(20)]
+            results = await asyncio.gather(*sales_calls, *stores_calls)
+
+    assert all(response.status_code == 200 for response in results[:4])
+    latencies = sorted(results[4:])
+    p99 = latencies[int(0.99 * (len(latencies) - 1))]
+    assert p99 < 0.25
+
+
+@pytest.mark.asyncio
+async def test_get_sales_arrow_backend(tmp_path):
+    """
+    Teste le backend Arrow : le fichier JSON est converti en fichier Arrow mappé en mémoire, les routes
+    de ventes filtrent la table, et une mise à jour du fichier JSON déclenche une nouvelle conversion.
+    """
+    sales = [
+        {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"},
+        {"sale_id": "2", "nb_type_product": 1, "product_id": "p2", "client_id": "c2", "store_id": "store_2",
+         "quantity": 1, "sale_amount": 5.0, "sale_date": "2024-12-14", "sale_time": "15:30:00"},
+    ]
+    (tmp_path / "sales.json").write_text(json.dumps(sales), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", "arrow"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            by_store = await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+            by_hour = await client.get("/sales/hour?sale_date=2024-12-14&hour=15")
+            bulk = await client.get("/sales/bulk?sale_date=2024-12-14&store_ids=store_1&store_ids=store_2")
+
+            # Nouvelle vente publiée par le générateur : le fichier Arrow est reconstruit
+            sales.append(dict(sales[0], sale_id="3"))
+            (tmp_path / "sales.json").write_text(json.dumps(sales), encoding="utf-8")
+            os.utime(tmp_path / "sales.json", ns=(time.time_ns() + 10**9,) * 2)
+            refreshed = await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+
+    assert (tmp_path / "sales.arrow").exists()
+    assert by_store.json() == [sales[0]]
+    assert by_hour.json() == [sales[1]]
+    assert bulk.json() == sales[:2]
+    assert [sale["sale_id"] for sale in refreshed.json()] == ["1", "3"]
+
+
+@pytest.mark.asyncio
+async def test_arrow_backend_after_cleanup(tmp_path):
+    """
+    Teste le backend Arrow après le nettoyage du pipeline : les fichiers JSON complets supprimés, les tables
+    Arrow sont construites depuis les partitions, et la suppression d'une date de partitions est prise en compte.
+    """
+    from src.api import partition_store
+
+    def sale(sale_id, sale_date):
+        return {"sale_id": sale_id, "nb_type_product": 1, "product_id": "p1", "client_id": "c1",
+                "store_id": "store_1", "quantity": 1, "sale_amount": 1.0, "sale_date": sale_date,
+                "sale_time": "10:00:00"}
+
+    sales = [sale("1", "2024-12-13"), sale("2", "2024-12-14")]
+    retail = [{"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 9, "visitors": 3, "sales": 1}]
+    partition_store.write_partitions("sales", sales, str(tmp_path))
+    partition_store.write_partitions("retail_data", retail, str(tmp_path))
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", "arrow"), \
+            patch("src.api.routes.retail_data_route.DATA_BACKEND", "arrow"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            before = await client.get("/sales?store_id=store_1&sale_date=2024-12-13")
+            # Tâche `cleanup_files` : suppression d'une date de partitions (aucun fichier JSON complet)
+            partition_store.drop_partitions("sales", ["2024-12-13"], data_dir=str(tmp_path))
+            os.utime(tmp_path / "sales" / "_version", ns=(time.time_ns() + 10**9,) * 2)
+            dropped = await client.get("/sales?store_id=store_1&sale_date=2024-12-13")
+            kept = await client.get("/sales?store_id=store_1&sale_date=2024-12-14")
+            traffic = await client.get("/retail_data?date=2024-12-14")
+
+    assert not (tmp_path / "sales.json").exists()
+    assert before.status_code == 200 and before.json() == [sales[0]]
+    assert dropped.json() == [{"error": "No sales found for store ID: store_1 on 2024-12-13"}]
+    assert kept.status_code == 200 and kept.json() == [sales[1]]
+    assert traffic.status_code == 200 and traffic.json() == retail
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend(tmp_path):
+    """
+    Teste le backend SQLite : les fichiers JSON sont chargés dans la base au premier accès, puis les
+    routes interrogent les tables indexées (ventes par magasin et par heure, clients par ville
+    insensible à la casse, données retail par date).
+    """
+    sales = [
+        {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"},
+        {"sale_id": "2", "nb_type_product": 1, "product_id": "p2", "client_id": "c2", "store_id": "store_2",
+         "quantity": 1, "sale_amount": 5.0, "sale_date": "2024-12-14", "sale_time": "15:30:00"},
+    ]
+    clients = [{"id": "1", "name": "Jean", "age": 30, "gender": "Homme", "loyalty_card": True, "city": "Évry"}]
+    retail = [{"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 9, "visitors": 3,
+               "sales": None}]
+    for name, rows in (("sales", sales), ("clients", clients), ("retail_data", retail)):
+        (tmp_path / f"{name}.json").write_text(json.dumps(rows), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", "sqlite"), \
+            patch("src.api.routes.clients_route.DATA_BACKEND", "sqlite"), \
+            patch("src.api.routes.retail_data_route.DATA_BACKEND", "sqlite"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            by_store = await client.get("/sales?sale_date=2024-12-14&store_id=store_2")
+            by_hour = await client.get("/sales/hour?sale_date=2024-12-14&hour=10")
+            by_city = await client.get("/clients?city=évry")
+            by_date = await client.get("/retail_data?date=2024-12-14")
+
+    assert by_store.json() == [sales[1]]
+    assert by_hour.json() == [sales[0]]
+    assert by_city.json() == clients
+    assert by_date.json() == retail
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    """
+    Teste l'endpoint `/metrics` : nombre de requêtes par route et statut, histogrammes de latence
+    et de taille, et temps de chargement et de filtrage, au format texte Prometheus.
+    """
+    mock_sales = [{"sale_id": "1", "nb_type_product": 1, "product_id": "p", "client_id": "c",
+                   "store_id": "store_1", "quantity": 1, "sale_amount": 1.0, "sale_date": "2024-12-14",
+                   "sale_time": "10:00:00"}]
+    registry.reset()
+
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+            await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+            await client.get("/does-not-exist")
+            response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'api_requests_total{route="/sales",method="GET",status="200"} 2' in body
+    assert 'api_requests_total{route="<unmatched>",method="GET",status="404"} 1' in body
+    assert 'api_request_duration_seconds_count{route="/sales"} 2' in body
+    assert 'api_request_duration_seconds_bucket{route="/sales",le="+Inf"} 2' in body
+    assert 'api_response_size_bytes_count{route="/sales"} 2' in body
+    assert 'api_phase_duration_seconds_count{route="/sales",phase="load"} 2' in body
+    assert 'api_phase_duration_seconds_count{route="/sales",phase="filter"} 2' in body
+
+
+@pytest.mark.asyncio
+async def test_field_projection():
+    """
+    Teste le paramètre `fields` : les lignes sont réduites aux champs demandés (y compris avec la
+    pagination, dont la clé de tri n'est pas projetée), le schéma colonnaire suit la projection,
+    et un champ inconnu est refusé.
+    """
+    import pyarrow as pa
+
+    mock_sales = [
+        {"sale_id": str(i), "nb_type_product": 1, "product_id": "p", "client_id": "c", "store_id": "store_1",
+         "quantity": i, "sale_amount": 1.5, "sale_date": "2024-12-14", "sale_time": f"1{i}:00:00"}
+        for i in range(3)
+    ]
+    mock_retail = [{"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 9, "visitors": 3,
+                    "sales": 1}]
+
+    with patch("src.api.routes.sales_route.load_sales", return_value=mock_sales), \
+            patch("src.api.routes.retail_data_route.load_retail_data", return_value=mock_retail):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            projected = await client.get("/sales?sale_date=2024-12-14&store_id=store_1&fields=quantity,store_id")
+            paged = await client.get("/sales?sale_date=2024-12-14&store_id=store_1&fields=quantity&limit=2")
+            arrow = await client.get(
+                "/retail_data?date=2024-12-14&fields=store_id,visitors",
+                headers={"Accept": "application/vnd.apache.arrow.stream"},
+            )
+            unknown = await client.get("/retail_data?date=2024-12-14&fields=store_id,price")
+
+    assert projected.json() == [{"quantity": i, "store_id": "store_1"} for i in range(3)]
+    assert paged.json() == [{"quantity": 0}, {"quantity": 1}]
+    assert paged.headers["X-Total-Count"] == "3"
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column_names == ["store_id", "visitors"]
+    assert table.to_pylist() == [{"store_id": "store_1", "visitors": 3}]
+    assert unknown.status_code == 400
+    assert unknown.json() == {"error": "Unknown fields: price"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["json", "arrow", "sqlite"])
+async def test_summary_endpoints(backend, tmp_path):
+    """
+    Teste les synthèses `/sales/summary` et `/retail_data/summary` sur chaque backend : totaux par magasin
+    et par jour, détail par heure, et mode `count_only`.
+    """
+    sales = [
+        {"sale_id": "s1", "nb_type_product": 2, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 2, "sale_amount": 10.1, "sale_date": "2024-12-14", "sale_time": "10:05:00"},
+        {"sale_id": "s1", "nb_type_product": 2, "product_id": "p2", "client_id": "c1", "store_id": "store_1",
+         "quantity": 1, "sale_amount": 4.2, "sale_date": "2024-12-14", "sale_time": "10:05:00"},
+        {"sale_id": "s2", "nb_type_product": 1, "product_id": "p1", "client_id": "c2", "store_id": "store_1",
+         "quantity": 3, "sale_amount": 6.0, "sale_date": "2024-12-14", "sale_time": "15:30:00"},
+        {"sale_id": "s3", "nb_type_product": 1, "product_id": "p3", "client_id": "c3", "store_id": "store_2",
+         "quantity": 1, "sale_amount": 2.5, "sale_date": "2024-12-14", "sale_time": "11:00:00"},
+    ]
+    retail = [
+        {"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 10, "visitors": 30, "sales": 2},
+        {"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 11, "visitors": None,
+         "sales": None},
+        {"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 15, "visitors": 12, "sales": 1},
+    ]
+    for name, rows in (("sales", sales), ("retail_data", retail)):
+        (tmp_path / f"{name}.json").write_text(json.dumps(rows), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.routes.sales_route.load_sales", return_value=sales), \
+            patch("src.api.routes.retail_data_route.load_retail_data", return_value=retail), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", backend), \
+            patch("src.api.routes.retail_data_route.DATA_BACKEND", backend):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            daily = await client.get("/sales/summary?sale_date=2024-12-14")
+            hourly = await client.get("/sales/summary?sale_date=2024-12-14&store_ids=store_1&by_hour=true")
+            count = await client.get("/sales/summary?sale_date=2024-12-14&store_ids=store_2&count_only=true")
+            traffic = await client.get("/retail_data/summary?date=2024-12-14")
+            traffic_count = await client.get("/retail_data/summary?date=2024-12-14&count_only=true")
+
+    assert daily.json() == [
+        {"store_id": "store_1", "sale_date": "2024-12-14", "quantity": 6, "revenue": 20.3, "transactions": 2},
+        {"store_id": "store_2", "sale_date": "2024-12-14", "quantity": 1, "revenue": 2.5, "transactions": 1},
+    ]
+    assert hourly.json() == [
+        {"store_id": "store_1", "sale_date": "2024-12-14", "hour": 10, "quantity": 3, "revenue": 14.3,
+         "transactions": 1},
+        {"store_id": "store_1", "sale_date": "2024-12-14", "hour": 15, "quantity": 3, "revenue": 6.0,
+         "transactions": 1},
+    ]
+    assert count.json() == {"count": 1}
+    assert traffic.json() == [{"store_id": "store_1", "date": "2024-12-14", "visitors": 42, "sales": 3}]
+    assert traffic_count.json() == {"count": 3}
+
+
+@pytest.mark.asyncio
+async def test_date_range_required_and_ordered():
+    """
+    Teste les plages de dates avec le fichier JSON complet (non partitionné) : sans date ni `start_date`, les
+    routes répondent 422, et une plage est renvoyée par date croissante même si le fichier n'est pas trié.
+    """
+    def sale(sale_id, sale_date):
+        return {"sale_id": sale_id, "nb_type_product": 1, "product_id": "p1", "client_id": "c1",
+                "store_id": "store_1", "quantity": 1, "sale_amount": 1.0, "sale_date": sale_date,
+                "sale_time": "10:00:00"}
+
+    sales = [sale("s3", "2024-12-15"), sale("s1", "2024-12-13"), sale("s2", "2024-12-14")]
+    retail = [
+        {"store_id": "store_1", "store_name": "A", "date": date, "hour": 9, "visitors": 1, "sales": 1}
+        for date in ("2024-12-15", "2024-12-13", "2024-12-14")
+    ]
+
+    with patch("src.api.routes.sales_route.load_sales", return_value=sales), \
+            patch("src.api.routes.retail_data_route.load_retail_data", return_value=retail), \
+            patch("src.api.partition_store.is_partitioned", return_value=False), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", "json"), \
+            patch("src.api.routes.retail_data_route.DATA_BACKEND", "json"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            missing = [
+                await client.get("/sales?store_id=store_1"),
+                await client.get("/sales/bulk"),
+                await client.get("/retail_data"),
+            ]
+            by_store = await client.get("/sales?store_id=store_1&start_date=2024-12-13&end_date=2024-12-15")
+            bulk = await client.get("/sales/bulk?start_date=2024-12-13&end_date=2024-12-15")
+            traffic = await client.get("/retail_data?start_date=2024-12-13&end_date=2024-12-15")
+
+    for response in missing:
+        assert response.status_code == 422
+        assert response.json() == {"error": "A date or both start_date and end_date are required."}
+    assert [row["sale_id"] for row in by_store.json()] == ["s1", "s2", "s3"]
+    assert [row["sale_id"] for row in bulk.json()] == ["s1", "s2", "s3"]
+    assert [row["date"] for row in traffic.json()] == ["2024-12-13", "2024-12-14", "2024-12-15"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["json", "arrow", "sqlite"])
+async def test_date_range_paginated(backend, tmp_path):
+    """
+    Teste les plages `start_date`/`end_date` sur chaque backend (partitions de dates pour le backend JSON) :
+    seules les dates de la plage sont renvoyées, par date croissante, page par page (la page est sélectionnée
+    par les backends SQLite et Arrow), et les paramètres ou curseurs incohérents sont refusés.
+    """
+    from src.api import arrow_store, partition_store, sql_store
+    from src.api.routes.pagination import encode_cursor
+
+    def sale(sale_id, store_id, sale_date, sale_time):
+        return {"sale_id": sale_id, "nb_type_product": 1, "product_id": "p1", "client_id": "c1",
+                "store_id": store_id, "quantity": 1, "sale_amount": 1.0, "sale_date": sale_date,
+                "sale_time": sale_time}
+
+    # Fichiers volontairement non triés par date
+    sales = [
+        sale("s4", "store_1", "2024-12-16", "09:00:00"),
+        sale("s3", "store_1", "2024-12-15", "08:00:00"),
+        sale("s2", "store_1", "2024-12-14", "17:00:00"),
+        sale("s0", "store_1", "2024-12-13", "12:00:00"),
+        sale("s5", "store_2", "2024-12-14", "10:00:00"),
+        sale("s1", "store_1", "2024-12-14", "09:00:00"),
+    ]
+    retail = [
+        {"store_id": "store_1", "store_name": "A", "date": date, "hour": hour, "visitors": 1, "sales": 1}
+        for date in ("2024-12-15", "2024-12-13", "2024-12-14") for hour in (10, 9)
+    ]
+    if backend == "json":
+        partition_store.write_partitions("sales", sales, str(tmp_path))
+        partition_store.write_partitions("retail_data", retail, str(tmp_path))
+    else:
+        for name, rows in (("sales", sales), ("retail_data", retail)):
+            (tmp_path / f"{name}.json").write_text(json.dumps(rows), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.routes.sales_route.load_sales", side_effect=AssertionError), \
+            patch("src.api.routes.retail_data_route.load_retail_data", side_effect=AssertionError), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", backend), \
+            patch("src.api.routes.retail_data_route.DATA_BACKEND", backend), \
+            patch("src.api.arrow_store.select", wraps=arrow_store.select) as arrow_select, \
+            patch("src.api.sql_store.select", wraps=sql_store.select) as sql_select:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            sales_range = "/sales?store_id=store_1&start_date=2024-12-14&end_date=2024-12-15&limit=2"
+            first = await client.get(sales_range)
+            second = await client.get(f"{sales_range}&cursor={first.headers['X-Next-Cursor']}")
+            tampered = await client.get(f"{sales_range}&cursor={encode_cursor(['2024-12-14', 9, 's1', 'p1'])}")
+            bulk = await client.get("/sales/bulk?start_date=2024-12-15&end_date=2024-12-16")
+            traffic_range = "/retail_data?start_date=2024-12-14&end_date=2024-12-15&limit=3"
+            traffic_first = await client.get(traffic_range)
+            traffic_second = await client.get(f"{traffic_range}&cursor={traffic_first.headers['X-Next-Cursor']}")
+            both = await client.get("/sales?store_id=store_1&sale_date=2024-12-14&end_date=2024-12-15")
+            reversed_range = await client.get("/retail_data?start_date=2024-12-15&end_date=2024-12-14")
+
+    assert [row["sale_id"] for row in first.json()] == ["s1", "s2"]
+    assert first.headers["X-Total-Count"] == "3"
+    assert [row["sale_id"] for row in second.json()] == ["s3"]
+    assert "X-Next-Cursor" not in second.headers
+    assert tampered.json() == [{"error": "Invalid cursor."}]
+    # Avec SQLite et Arrow, le backend ne renvoie que la page et une ligne de plus (curseur suivant)
+    page_calls = {"arrow": arrow_select, "sqlite": sql_select}.get(backend)
+    if page_calls is not None:
+        assert page_calls.call_args_list[0].kwargs["limit"] == 3
+    assert sorted(row["sale_id"] for row in bulk.json()) == ["s3", "s4"]
+    assert [(row["date"], row["hour"]) for row in traffic_first.json() + traffic_second.json()] == [
+        ("2024-12-14", 9), ("2024-12-14", 10), ("2024-12-15", 9), ("2024-12-15", 10),
+    ]
+    assert both.json() == [{"error": "Use either a single date or start_date/end_date, not both."}]
+    assert reversed_range.status_code == 400
+    assert reversed_range.json() == {"error": "start_date must be before or equal to end_date."}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["json", "arrow", "sqlite"])
+async def test_query_batch(backend, tmp_path):
+    """
+    Teste `POST /query/batch` sur chaque backend : les requêtes sont servies depuis un seul chargement de
+    chaque jeu de données, les résultats sont renvoyés par identifiant et une requête invalide n'affecte pas
+    les autres.
+    """
+    sales = [
+        {"sale_id": "s1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"},
+        {"sale_id": "s2", "nb_type_product": 1, "product_id": "p2", "client_id": "c2", "store_id": "store_2",
+         "quantity": 1, "sale_amount": 5.0, "sale_date": "2024-12-14", "sale_time": "11:00:00"},
+        {"sale_id": "s3", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 4, "sale_amount": 20.0, "sale_date": "2024-12-15", "sale_time": "09:00:00"},
+    ]
+    clients = [
+        {"id": "c1", "name": "Alice", "age": 30, "gender": "F", "loyalty_card": True, "city": "Paris"},
+        {"id": "c2", "name": "Bob", "age": 40, "gender": "M", "loyalty_card": False, "city": "Lyon"},
+    ]
+    stores = [{"id": "store_1", "name": "A", "location": "Paris", "capacity": 10, "opening_hour": "08:00",
+               "closing_hour": "20:00"}]
+    for name, rows in (("sales", sales), ("clients", clients)):
+        (tmp_path / f"{name}.json").write_text(json.dumps(rows), encoding="utf-8")
+
+    batch = {"queries": [
+        {"id": "day", "resource": "sales", "filters": {"sale_date": "2024-12-14", "store_ids": ["store_1"]}},
+        {"id": "range", "resource": "sales",
+         "filters": {"start_date": "2024-12-14", "end_date": "2024-12-15", "fields": "sale_id,quantity"}},
+        {"id": "paris", "resource": "clients", "filters": {"city": "paris", "fields": "id"}},
+        {"id": "stores", "resource": "stores"},
+        {"id": "bad", "resource": "sales", "filters": {"sale_date": "14/12/2024"}},
+        {"id": "unknown", "resource": "clients", "filters": {"city": "Paris", "country": "FR"}},
+        {"id": "bad_hour", "resource": "sales", "filters": {"sale_date": "2024-12-14", "hour": "ten"}},
+        {"id": "late", "resource": "sales", "filters": {"sale_date": "2024-12-14", "hour": 25}},
+        {"id": "hour", "resource": "sales", "filters": {"sale_date": "2024-12-14", "hour": "11"}},
+    ]}
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.routes.sales_route.load_sales", return_value=sales) as sales_loader, \
+            patch("src.api.routes.clients_route.load_clients", return_value=clients), \
+            patch("src.api.routes.stores_route.load_stores", return_value=stores), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", backend), \
+            patch("src.api.routes.clients_route.DATA_BACKEND", backend), \
+            patch("src.api.routes.query_route.DATA_BACKEND", backend):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/query/batch", json=batch)
+            duplicated = await client.post("/query/batch", json={"queries": [batch["queries"][0]] * 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    results = body["results"]
+    assert list(results) == ["day", "range", "paris", "stores", "bad", "unknown", "bad_hour", "late", "hour"]
+    assert results["day"] == {"count": 1, "rows": [sales[0]]}
+    assert sorted(row["sale_id"] for row in results["range"]["rows"]) == ["s1", "s2", "s3"]
+    assert set(results["range"]["rows"][0]) == {"sale_id", "quantity"}
+    assert results["paris"] == {"count": 1, "rows": [{"id": "c1"}]}
+    assert results["stores"] == {"count": 1, "rows": stores}
+    assert results["bad"] == {"error": "Date format is incorrect. Use 'YYYY-MM-DD'."}
+    assert results["unknown"]["error"].startswith("Invalid filters: country")
+    # Une heure invalide est signalée pour sa requête sans faire échouer le lot
+    assert results["bad_hour"]["error"].startswith("Invalid filters: hour")
+    assert results["late"]["error"].startswith("Invalid filters: hour")
+    assert results["hour"] == {"count": 1, "rows": [sales[1]]}
+    assert "sales" in body["versions"]
+    # Avec le backend JSON, les deux requêtes de ventes partagent un seul chargement
+    assert sales_loader.call_count == (1 if backend == "json" else 0)
+    assert duplicated.status_code == 400
+    assert duplicated.json() == {"error": "Duplicate query ids: day"}
+
+
+@pytest.mark.asyncio
+async def test_daily_exports(tmp_path):
+    """
+    Teste `/exports/{dataset}/{date}.{format}` : fichier servi tel quel (JSON Lines ou Parquet), requêtes
+    `HEAD` et `Range` (reprise conditionnée par `If-Range`), export régénéré lorsque les partitions changent.
+    """
+    import pyarrow.parquet as pq
+
+    from src.api import export_store, partition_store
+
+    sales = [
+        {"sale_id": str(i), "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": f"store_{i % 2}",
+         "quantity": 1, "sale_amount": 1.5, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+        for i in range(50)
+    ]
+    partition_store.write_partitions("sales", sales, str(tmp_path))
+    assert export_store.materialize("sales", "2024-12-14", str(tmp_path)) == 50
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            full = await client.get("/exports/sales/2024-12-14.jsonl", headers={"Accept-Encoding": "gzip"})
+            head = await client.head("/exports/sales/2024-12-14.jsonl")
+            resumed = await client.get(
+                "/exports/sales/2024-12-14.jsonl",
+                headers={"Range": "bytes=100-", "If-Range": full.headers["ETag"]},
+            )
+            parquet = await client.get("/exports/sales/2024-12-14.parquet")
+            unknown_format = await client.get("/exports/sales/2024-12-14.csv")
+            unknown_dataset = await client.get("/exports/clients/2024-12-14.jsonl")
+            missing = await client.get("/exports/sales/2024-12-15.jsonl")
+
+            # Une nouvelle publication de la journée invalide l'export
+            time.sleep(0.01)
+            partition_store.write_partitions("sales", sales[:1], str(tmp_path))
+            refreshed = await client.get(
+                "/exports/sales/2024-12-14.jsonl",
+                headers={"Range": "bytes=100-", "If-Range": full.headers["ETag"]},
+            )
+
+    assert full.status_code == 200
+    assert "content-encoding" not in full.headers
+    assert full.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in full.text.splitlines()] == sorted(sales, key=lambda sale: sale["store_id"])
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["content-length"] == str(len(full.content))
+    assert resumed.status_code == 206
+    assert resumed.content == full.content[100:]
+    assert resumed.headers["content-range"] == f"bytes 100-{len(full.content) - 1}/{len(full.content)}"
+    assert pq.read_table(io.BytesIO(parquet.content)).num_rows == 50
+    assert unknown_format.status_code == 404
+    assert unknown_dataset.status_code == 404
+    assert missing.status_code == 404
+    assert missing.json() == {"error": "No sales data found on 2024-12-15"}
+    # L'ETag a changé : `If-Range` ne correspond plus et le fichier complet est renvoyé
+    assert refreshed.status_code == 200
+    assert len(refreshed.text.splitlines()) == 26
+
+
+def test_openapi_operation_ids_unique():
+    """
+    Teste que le schéma OpenAPI se génère sans avertissement et que chaque opération (notamment `GET` et
+    `HEAD` de `/exports`) a son propre identifiant.
+    """
+    import warnings
+
+    from fastapi.openapi.utils import get_openapi
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+
+    operation_ids = [operation["operationId"] for path in schema["paths"].values() for operation in path.values()]
+    assert len(operation_ids) == len(set(operation_ids))
+    assert set(schema["paths"]["/exports/{dataset}/{date}.{fmt}"]) == {"get", "head"}
+
+
+@pytest.mark.asyncio
+async def test_response_cache(tmp_path):
+    """
+    Teste le cache des réponses sérialisées : une requête répétée est servie sans rappeler la route, une
+    nouvelle version des données ou un autre encodage donnent une autre entrée, et les succès et échecs
+    sont exposés dans `/metrics`.
+    """
+    from src.api.response_cache import response_cache
+
+    stores = [{"id": "store_1", "name": "A", "location": "Paris", "capacity": 10, "opening_hour": "08:00",
+               "closing_hour": "20:00"}]
+    stores_file = tmp_path / "stores.json"
+    stores_file.write_text(json.dumps(stores), encoding="utf-8")
+    response_cache.clear()
+    registry.reset()
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.routes.stores_route.load_stores", return_value=stores) as loader:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            first = await client.get("/stores", headers={"Accept-Encoding": "identity"})
+            second = await client.get("/stores", headers={"Accept-Encoding": "identity"})
+            compressed = await client.get("/stores", headers={"Accept-Encoding": "gzip"})
+            revalidated = await client.get("/stores", headers={"If-None-Match": first.headers["ETag"]})
+            assert loader.call_count == 2
+
+            # Une nouvelle publication change la version du jeu de données : la réponse est recalculée
+            stores_file.write_text(json.dumps(stores * 2), encoding="utf-8")
+            refreshed = await client.get("/stores")
+            metrics = (await client.get("/metrics")).text
+
+    assert first.json() == second.json() == compressed.json() == stores
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert revalidated.status_code == 304
+    assert refreshed.status_code == 200
+    assert loader.call_count == 3
+    assert "api_response_cache_hits_total 1" in metrics
+    assert "api_response_cache_misses_total 3" in metrics
+    assert 'api_requests_total{route="/stores",method="GET",status="200"} 4' in metrics
+
+
+@pytest.mark.asyncio
+async def test_changes_feed(tmp_path):
+    """
+    Teste le journal des modifications : chaque lot publié reçoit une séquence croissante, et
+    `/sales/changes` ne renvoie que les lots postérieurs à la séquence fournie, par lots entiers.
+    """
+    from src.api import change_log
+
+    sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+            "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+    retail = {"store_id": "store_1", "store_name": "Magasin_1", "date": "2024-12-14", "hour": 10,
+              "visitors": 12, "sales": 3}
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)):
+        assert change_log.append_batch("sales", [sale, dict(sale, sale_id="2")]) == 1
+        assert change_log.append_batch("sales", [dict(sale, sale_id="3")]) == 2
+        change_log.append_batch("retail_data", [retail])
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            everything = await client.get("/sales/changes")
+            newer = await client.get("/sales/changes?since=1")
+            first_batch = await client.get("/sales/changes?since=0&max_rows=1")
+            up_to_date = await client.get("/sales/changes?since=2")
+            retail_changes = await client.get("/retail_data/changes?since=0")
+
+    assert [row["sale_id"] for row in everything.json()["rows"]] == ["1", "2", "3"]
+    assert everything.json()["sequence"] == 2
+    assert newer.json() == {"since": 1, "sequence": 2, "has_more": False, "rows": [dict(sale, sale_id="3")]}
+    # Les lots ne sont jamais coupés : le premier lot est renvoyé entier malgré max_rows=1
+    assert first_batch.json()["sequence"] == 1
+    assert first_batch.json()["has_more"] is True
+    assert len(first_batch.json()["rows"]) == 2
+    assert up_to_date.json() == {"since": 2, "sequence": 2, "has_more": False, "rows": []}
+    assert retail_changes.json()["rows"] == [retail]
+
+
+@pytest.mark.asyncio
+async def test_sales_stream(tmp_path):
+    """
+    Teste le flux SSE `/sales/stream` : reprise après `Last-Event-ID`, un événement par lot avec un
+    identifiant cumulant les séquences des ventes et des données retail, et rejet d'un identifiant invalide.
+    """
+    from src.api import change_log
+
+    sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+            "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+    retail = {"store_id": "store_1", "store_name": "Magasin_1", "date": "2024-12-14", "hour": 10,
+              "visitors": 12, "sales": 3}
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)):
+        change_log.append_batch("sales", [sale])
+        change_log.append_batch("sales", [dict(sale, sale_id="2")])
+        change_log.append_batch("retail_data", [retail])
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            resumed = await client.get("/sales/stream?limit=2", headers={"Last-Event-ID": "1:0"})
+            sales_only = await client.get("/sales/stream?limit=1&include_retail=false",
+                                          headers={"Last-Event-ID": "0"})
+            invalid = await client.get("/sales/stream?limit=1", headers={"Last-Event-ID": "abc"})
+
+    assert resumed.status_code == 200
+    assert resumed.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in resumed.headers
+    events = [block.split("\n") for block in resumed.text.strip().split("\n\n")]
+    assert events[0][0].startswith("retry: ")
+    assert events[1][:2] == ["id: 2:0", "event: sales"]
+    assert json.loads(events[1][2][len("data: "):]) == {"sequence": 2, "rows": [dict(sale, sale_id="2")]}
+    assert events[2][:2] == ["id: 2:1", "event: retail_data"]
+    assert json.loads(events[2][2][len("data: "):])["rows"] == [retail]
+    assert "id: 1\nevent: sales" in sales_only.text
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_change_log_retention(tmp_path):
+    """
+    Teste la rétention du journal des modifications : les lots publiés avant une date ou jusqu'à une séquence
+    sont purgés sans réutilisation de leurs séquences, et le flux SSE ne liste le journal qu'à son démarrage.
+    """
+    from src.api import change_log
+
+    sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+            "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)):
+        for sale_id in ("1", "2", "3"):
+            change_log.append_batch("sales", [dict(sale, sale_id=sale_id)])
+        old_batch = tmp_path / "changes" / "sales" / f"{1:012d}.jsonl"
+        os.utime(old_batch, (time.time() - 3 * 86400,) * 2)
+
+        assert change_log.prune_batches("sales", before=time.strftime("%Y-%m-%d")) == [1]
+        assert change_log.prune_batches("sales", through=2) == [2]
+        assert change_log.list_sequences("sales") == [3]
+        assert change_log.append_batch("sales", [dict(sale, sale_id="4")]) == 4
+        assert change_log.read_changes("sales", since=0)["rows"] == [dict(sale, sale_id="3"), dict(sale, sale_id="4")]
+
+        with patch("src.api.change_log.list_sequences", wraps=change_log.list_sequences) as listings:
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                stream = await client.get("/sales/stream?limit=2&include_retail=false",
+                                          headers={"Last-Event-ID": "0"})
+
+    assert "id: 3\nevent: sales" in stream.text and "id: 4\nevent: sales" in stream.text
+    assert listings.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_health_ready(tmp_path):
+    """
+    Teste `/health/ready` : 503 avant le démarrage, puis 200 une fois les données préchargées, avec la
+    version de chaque jeu de données chargée dans la base SQLite et celle du fichier JSON.
+    """
+    from src.api.main import lifespan
+
+    sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+            "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+    (tmp_path / "sales.json").write_text(json.dumps([sale]), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.main.DATA_BACKEND", "sqlite"), \
+            patch("src.api.routes.health_route.DATA_BACKEND", "sqlite"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            starting = await client.get("/health/ready")
+            async with lifespan(app):
+                ready = await client.get("/health/ready")
+
+    assert starting.status_code == 503
+    assert ready.status_code == 200
+    datasets = ready.json()["datasets"]
+    assert ready.json()["backend"] == "sqlite"
+    assert datasets["sales"]["loaded"] == datasets["sales"]["current"] is not None
+    assert datasets["clients"] == {"loaded": None, "current": None}
+
+
+@pytest.mark.asyncio
+async def test_partitioned_layout(tmp_path):
+    """
+    Teste le stockage partitionné avec le backend JSON : les routes ne lisent que les partitions de la date
+    et des magasins demandés (une partition d'une autre date, illisible, n'est jamais ouverte), et le
+    nettoyage supprime des dates entières.
+    """
+    from src.api import partition_store
+
+    sales = [
+        {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"},
+        {"sale_id": "2", "nb_type_product": 1, "product_id": "p2", "client_id": "c2", "store_id": "store_2",
+         "quantity": 1, "sale_amount": 5.0, "sale_date": "2024-12-14", "sale_time": "15:30:00"},
+    ]
+    retail = [{"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 9, "visitors": 3,
+               "sales": 1}]
+    partition_store.write_partitions("sales", sales, str(tmp_path))
+    partition_store.write_partitions("retail_data", retail, str(tmp_path))
+    other_day = tmp_path / "sales" / "sale_date=2024-12-13" / "store_id=store_1"
+    other_day.mkdir(parents=True)
+    (other_day / "part.jsonl").write_text("not json", encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.routes.sales_route.load_sales", side_effect=AssertionError), \
+            patch("src.api.routes.retail_data_route.load_retail_data", side_effect=AssertionError):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            by_store = await client.get("/sales?sale_date=2024-12-14&store_id=store_2")
+            bulk = await client.get("/sales/bulk?sale_date=2024-12-14")
+            summary = await client.get("/sales/summary?sale_date=2024-12-14&count_only=true")
+            by_date = await client.get("/retail_data?date=2024-12-14")
+            missing = await client.get("/sales?sale_date=2024-12-15&store_id=store_1")
+
+        assert partition_store.drop_partitions("sales", before="2024-12-14") == ["2024-12-13"]
+        assert partition_store.list_dates("sales") == ["2024-12-14"]
+
+    assert by_store.json() == [sales[1]]
+    assert bulk.json() == sales
+    assert summary.json() == {"count": 2}
+    assert by_date.json() == retail
+    assert missing.json() == [{"error": "No sales found for store ID: store_1 on 2024-12-15"}]
+
+
+@pytest.mark.asyncio
+async def test_partition_keys_validated(tmp_path):
+    """
+    Teste la validation des clés de partition : un magasin demandé avec un chemin relatif ne lit aucun fichier
+    hors des partitions, et l'écriture ou le nettoyage refusent les dates et magasins mal formés.
+    """
+    from src.api import partition_store
+
+    sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+            "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+    partition_store.write_partitions("sales", [sale], str(tmp_path))
+    leak = tmp_path / "leak"
+    leak.mkdir()
+    (leak / "part.jsonl").write_text(json.dumps(dict(sale, sale_id="secret")), encoding="utf-8")
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.routes.sales_route.load_sales", side_effect=AssertionError):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            bulk = await client.get(
+                "/sales/bulk?sale_date=2024-12-14&store_ids=store_1&store_ids=store_1/../../../leak"
+            )
+
+    assert bulk.json() == [sale]
+    assert list(partition_store.read_range("sales", "2024-12-14", "2024-12-14", data_dir=str(tmp_path))) == [sale]
+    with pytest.raises(ValueError):
+        partition_store.write_partitions("sales", [dict(sale, store_id="../store_1")], str(tmp_path))
+    with pytest.raises(ValueError):
+        partition_store.drop_partitions("sales", ["../../leak"], data_dir=str(tmp_path))
+    assert (leak / "part.jsonl").exists()
+    assert partition_store.list_dates("sales", str(tmp_path)) == ["2024-12-14"]
+
+
+def test_sqlite_load_day_skips_incomplete_rows(tmp_path):
+    """
+    Teste le chargement d'une journée dans SQLite avec des lignes vides (génération en erreur) : elles sont
+    ignorées, comme pour les partitions, au lieu d'interrompre le chargement ou d'insérer des lignes NULL.
+    """
+    from src.api import sql_store
+
+    sale = {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+            "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"}
+    retail = {"store_id": "store_1", "store_name": "A", "date": "2024-12-14", "hour": 10, "visitors": 3, "sales": 1}
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")):
+        sql_store.load_day("2024-12-14", {"sales": [sale, {}], "retail_data": [{}, retail]})
+        sales = sql_store.select("sales", sync=False)
+        retail_data = sql_store.select("retail_data", sync=False)
+
+    assert sales == [sale]
+    assert retail_data == [retail]
+
+
+@pytest.mark.asyncio
+async def test_partitioned_layout_legacy_json(tmp_path):
+    """
+    Teste un jeu de données partitionné à côté d'un ancien fichier `sales.json` resté d'avant la migration :
+    la version suit le fichier témoin des partitions, et le backend SQLite se charge depuis les partitions
+    sans que l'ancien fichier n'efface les journées publiées ensuite.
+    """
+    from src.api import data_store, partition_store, sql_store
+
+    legacy = [{"sale_id": "0", "nb_type_product": 1, "product_id": "p0", "client_id": "c0", "store_id": "store_1",
+               "quantity": 1, "sale_amount": 1.0, "sale_date": "2024-12-13", "sale_time": "09:00:00"}]
+    sales = [
+        {"sale_id": "1", "nb_type_product": 1, "product_id": "p1", "client_id": "c1", "store_id": "store_1",
+         "quantity": 2, "sale_amount": 10.0, "sale_date": "2024-12-14", "sale_time": "10:00:00"},
+        {"sale_id": "2", "nb_type_product": 1, "product_id": "p2", "client_id": "c2", "store_id": "store_2",
+         "quantity": 1, "sale_amount": 5.0, "sale_date": "2024-12-15", "sale_time": "15:30:00"},
+    ]
+    (tmp_path / "sales.json").write_text(json.dumps(legacy), encoding="utf-8")
+    partition_store.write_partitions("sales", sales[:1], str(tmp_path))
+
+    with patch("src.api.data_store.DATA_DIR", str(tmp_path)), \
+            patch("src.api.sql_store.DB_PATH", str(tmp_path / "retail.db")), \
+            patch("src.api.routes.sales_route.DATA_BACKEND", "sqlite"):
+        first_version = data_store.dataset_version("sales")
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            first_day = await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+            legacy_day = await client.get("/sales?sale_date=2024-12-13&store_id=store_1")
+
+            # Publication d'une nouvelle journée : partitions puis chargement de la journée dans la base
+            partition_store.write_partitions("sales", sales[1:])
+            sql_store.load_day("2024-12-15", {"sales": sales[1:]})
+            second_version = data_store.dataset_version("sales")
+            new_day = await client.get("/sales?sale_date=2024-12-15&store_id=store_2")
+            previous_day = await client.get("/sales?sale_date=2024-12-14&store_id=store_1")
+
+    assert first_version is not None and second_version != first_version
+    assert first_day.json() == [sales[0]]
+    assert legacy_day.json() == [{"error": "No sales found for store ID: store_1 on 2024-12-13"}]
+    assert new_day.json() == [sales[1]]
+    assert previous_day.json() == [sales[0]]
@@ -416,3 +416,88 @@ def test_calculate_daily_metrics():
 
         # Vérifier que les données sont correctement fusionnées et sauvegardées
         mock_append.assert_called_once()
+
+
+class FakeS3:
+    """
+    Bucket S3 en mémoire, partagé par l'extraction et la transformation.
+    """
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def upload_file(self, Filename, Bucket, Key):
+        with open(Filename, "rb") as f:
+            self.objects[Key] = f.read()
+
+    def upload_fileobj(self, Fileobj, Bucket, Key):
+        self.objects[Key] = Fileobj.read()
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(f"NoSuchKey: {Key}")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def list_objects_v2(self, Bucket, Prefix):
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        return {"Contents": [{"Key": key} for key in keys]} if keys else {}
+
+
+def test_incremental_extraction_to_transform():
+    """
+    Teste la chaîne extraction incrémentale -> transformation : les fichiers écrits par lot sont lus par la
+    transformation, et une journée régénérée (nouveau lot pour la même date et le même magasin) remplace
+    les données du lot précédent au lieu de s'y ajouter.
+    """
+    from src.data_processing.extract.extract_retail_data import fetch_and_save_retail_data_changes
+    from src.data_processing.extract.extract_sales import fetch_and_save_sales_changes
+
+    def sale(sale_id, store_id, amount):
+        return {"sale_id": sale_id, "nb_type_product": 1, "product_id": "p1", "client_id": "c1",
+                "store_id": store_id, "quantity": 1, "sale_amount": amount, "sale_date": "2023-12-01",
+                "sale_time": "10:00:00"}
+
+    def retail(store_id, visitors):
+        return {"store_id": store_id, "store_name": store_id, "date": "2023-12-01", "hour": 10,
+                "visitors": visitors, "sales": 1}
+
+    # Lot 1 : génération de la journée ; lot 2 : régénération de la journée pour store_1 uniquement
+    sales_pages = [
+        {"since": 0, "sequence": 1, "has_more": True,
+         "rows": [sale("a", "store_1", 10.0), sale("b", "store_1", 20.0), sale("c", "store_2", 5.0)]},
+        {"since": 1, "sequence": 2, "has_more": False, "rows": [sale("d", "store_1", 7.0)]},
+    ]
+    retail_pages = [
+        {"since": 0, "sequence": 1, "has_more": True, "rows": [retail("store_1", 100), retail("store_2", 50)]},
+        {"since": 1, "sequence": 2, "has_more": False, "rows": [retail("store_1", 80)]},
+    ]
+    fake_s3 = FakeS3()
+    with patch("src.data_processing.extract.utils.s3", fake_s3), \
+            patch("src.data_processing.transform.aggregate_daily_metrics.s3", fake_s3):
+        with patch("src.data_processing.extract.utils.fetch_from_api", side_effect=sales_pages):
+            assert fetch_and_save_sales_changes() == 2
+        with patch("src.data_processing.extract.utils.fetch_from_api", side_effect=retail_pages):
+            assert fetch_and_save_retail_data_changes() == 2
+
+        sales = read_parquet_from_s3_filtered(
+            "extracted_data/sales/", set(), partition_keys=["sale_date", "store_id"]
+        )
+        retail_data = read_parquet_from_s3_filtered(
+            "extracted_data/retail_data/", set(), partition_keys=["date", "store_id"]
+        )
+        # Une date déjà traitée n'est pas relue
+        assert read_parquet_from_s3_filtered("extracted_data/sales/", {"2023-12-01"}).empty
+
+    assert sorted(sales["sale_id"]) == ["c", "d"]
+    assert sales.groupby("store_id")["sale_amount"].sum().to_dict() == {"store_1": 7.0, "store_2": 5.0}
+    assert retail_data.set_index("store_id")["visitors"].to_dict() == {"store_1": 80, "store_2": 50}
+    assert aggregate_retail_data(retail_data).set_index("store_id")["total_visitors"].to_dict() == {
+        "store_1": 80, "store_2": 50
+    }